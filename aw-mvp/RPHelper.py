@@ -4,6 +4,14 @@
 # - name: str
 # - school: str
 
+import collections
+import contextvars
+import functools
+import re
+import threading
+import types
+from typing import Any, TypedDict
+
 def test_print_query(query: dict):
     print(f"Name: {query['name']}")
     print(f"School: {query['school']}")
@@ -19,7 +27,8 @@ def test_print_papers(papers: list):
     for i, paper in enumerate(papers, 1):
         print(f"\nPaper {i}:")
         print(f"Title: {paper.get('title', 'No title')}")
-        print(f"Authors: {', '.join(paper.get('authors', ['No authors']))}")
+        authors = [a.get('name', '') if isinstance(a, dict) else a for a in paper.get('authors', [])]
+        print(f"Authors: {', '.join(authors) or 'No authors'}")
         print(f"Publication Date: {paper.get('publication_date', 'No date')}")
         print(f"Categories: {', '.join(paper.get('categories', ['No categories']))}")
         print(f"Journal: {paper.get('journal', 'No journal')}")
@@ -33,8 +42,9 @@ def test_print_papers(papers: list):
                 print(f"PubMed ID: {links.get('pmid', 'No ID')}")
             elif 'scholar_id' in links:
                 print(f"Scholar ID: {links.get('scholar_id', 'No ID')}")
-                if 'citation_count' in paper:
-                    print(f"Citations: {paper['citation_count']}")
+            
+            if 'citation_count' in paper:
+                print(f"Citations: {paper['citation_count']}")
             
             # Print DOI if available
             if 'doi' in links:
@@ -50,7 +60,883 @@ def test_print_papers(papers: list):
             
         print("-"*100)
 
-def get_papers(query: dict):
+# ================================
+# Metrics
+# ================================
+# Process-wide counters and timings (cache hits, refresh latencies, ...).
+# metrics_snapshot() summarizes them for logs or the service's /metrics.
+# ================================
+_metric_counters = collections.Counter()
+_metric_timings = collections.defaultdict(lambda: collections.deque(maxlen=1000))
+_metrics_lock = threading.Lock()
+
+def increment_metric(name: str, value: int = 1):
+    with _metrics_lock:
+        _metric_counters[name] += value
+
+def record_timing(name: str, seconds: float):
+    # keeps the most recent 1000 samples per name
+    with _metrics_lock:
+        _metric_timings[name].append(seconds)
+
+def metrics_snapshot():
+    with _metrics_lock:
+        counters = dict(_metric_counters)
+        timings = {name: sorted(samples) for name, samples in _metric_timings.items() if samples}
+    return {
+        'counters': counters,
+        'timings': {
+            name: {
+                'count': len(samples),
+                'p50': samples[len(samples) // 2],
+                'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+                'max': samples[-1],
+            }
+            for name, samples in timings.items()
+        },
+    }
+
+def reset_metrics():
+    with _metrics_lock:
+        _metric_counters.clear()
+        _metric_timings.clear()
+
+# ================================
+# Single-flight request coalescing
+# ================================
+# When several callers ask for the same thing at the same time (the same
+# professor from two users, or two strategies that end up on the same URL),
+# only the first caller does the work and everyone else waits for its result.
+# ================================
+_inflight_calls = {}
+_inflight_lock = threading.Lock()
+
+def single_flight(key, fn):
+    with _inflight_lock:
+        call = _inflight_calls.get(key)
+        leader = call is None
+        if leader:
+            call = {'done': threading.Event(), 'result': None, 'error': None}
+            _inflight_calls[key] = call
+
+    if not leader:
+        # join the running call
+        call['done'].wait()
+        if call['error'] is not None:
+            raise call['error']
+        return call['result']
+
+    try:
+        call['result'] = fn()
+        return call['result']
+    except BaseException as e:
+        call['error'] = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight_calls.pop(key, None)
+        call['done'].set()
+
+def normalize_url(url: str, params: dict | None = None):
+    import urllib.parse
+
+    # merge params into the query string and sort it, so the same request
+    # written two different ways maps to the same key
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        for key, value in params.items():
+            if isinstance(value, (list, tuple)):
+                query.extend((key, str(v)) for v in value)
+            elif value is not None:
+                query.append((key, str(value)))
+    query.sort()
+    return urllib.parse.urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path or '/',
+        urllib.parse.urlencode(query),
+        ''
+    ))
+
+def http_get(url: str, params: dict | None = None, hedge: bool = True):
+    # hedge=False keeps the request out of hedging (see set_request_hedging),
+    # for hosts that must not get duplicate requests
+    import requests
+
+    timeout = lookup_request_timeout(f"GET {url}")
+    # one in-flight GET per normalized URL, shared by all waiters
+    key = ('http', normalize_url(url, params))
+    try:
+        return single_flight(key, lambda: _timed_get(url, params, timeout, hedge))
+    except requests.exceptions.Timeout:
+        _mark_source_incomplete()
+        raise
+
+# ================================
+# Timeouts, lookup deadlines and hedged requests
+# ================================
+# Every GET gets connect/read timeouts. A lookup can also run with a budget:
+# run_with_deadline() puts the deadline in a context variable that
+# http_get() checks, so once the budget is spent each source stops fetching
+# and returns what it has, and is flagged incomplete.
+#
+# With hedging on, a GET still running after the host's p95 latency gets a
+# duplicate request; whichever answers first is used. Only idempotent GETs go
+# through here, so the duplicate is safe.
+# ================================
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 30
+HEDGE_MIN_SAMPLES = 20
+
+# {'deadline': monotonic time, 'source': str, 'incomplete': set} while a source runs
+_lookup_context = contextvars.ContextVar('lookup_context', default=None)
+_latency_samples = collections.defaultdict(lambda: collections.deque(maxlen=200))
+_latency_lock = threading.Lock()
+_hedge_pool = None
+_hedge_lock = threading.Lock()
+_hedging = False
+
+def set_request_hedging(enabled: bool):
+    global _hedging
+    _hedging = enabled
+
+def lookup_time_remaining():
+    # seconds left in the current lookup's budget, or None without one
+    import time
+
+    context = _lookup_context.get()
+    if context is None or context['deadline'] is None:
+        return None
+    return context['deadline'] - time.monotonic()
+
+def lookup_request_timeout(request: str):
+    # (connect, read) timeouts for a request. Inside a lookup with a budget,
+    # requests are not started once it is spent and are not waited on for
+    # longer than what is left of it
+    import requests
+
+    remaining = lookup_time_remaining()
+    if remaining is not None and remaining <= 0:
+        _mark_source_incomplete()
+        raise requests.exceptions.Timeout(f"Lookup deadline exceeded before {request}")
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT if remaining is None else min(HTTP_READ_TIMEOUT, remaining))
+
+def run_with_deadline(deadline: float | None, source: str, incomplete: set, fn, *args):
+    # runs fn for one source; requests it makes past the deadline (a
+    # time.monotonic() value) fail fast and add source to incomplete
+    token = _lookup_context.set({'deadline': deadline, 'source': source, 'incomplete': incomplete})
+    try:
+        return fn(*args)
+    finally:
+        _lookup_context.reset(token)
+
+def _mark_source_incomplete():
+    context = _lookup_context.get()
+    if context is not None:
+        context['incomplete'].add(context['source'])
+
+def hedge_delay(host: str):
+    # p95 of recent latencies for the host, None until there are enough samples
+    # copied under the lock, other threads append while requests finish
+    with _latency_lock:
+        samples = list(_latency_samples[host])
+    samples.sort()
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+def _get_and_record(host: str, url: str, params: dict | None, timeout):
+    import requests
+    import time
+
+    start = time.monotonic()
+    response = requests.get(url, params=params, timeout=timeout)
+    with _latency_lock:
+        _latency_samples[host].append(time.monotonic() - start)
+    return response
+
+def _timed_get(url: str, params: dict | None, timeout, hedge: bool = True):
+    import urllib.parse
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    global _hedge_pool
+
+    host = urllib.parse.urlsplit(url).netloc.lower()
+    delay = hedge_delay(host) if _hedging and hedge else None
+    if delay is None:
+        return _get_and_record(host, url, params, timeout)
+
+    with _hedge_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='rp-hedge')
+        pool = _hedge_pool
+    first = pool.submit(_get_and_record, host, url, params, timeout)
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result()
+
+    # slower than p95: race a duplicate against it. The loser is left to
+    # finish (requests cannot be cancelled) within its own timeout
+    hedge = pool.submit(_get_and_record, host, url, params, timeout)
+    done, _ = wait([first, hedge], return_when=FIRST_COMPLETED)
+    winner = done.pop()
+    if winner.exception() is not None:
+        return (hedge if winner is first else first).result()
+    return winner.result()
+
+# ================================
+# JSON decoding schemas
+# ================================
+# Only the fields the parse_*_response functions read. With msgspec installed
+# the decoder skips everything else (Crossref reference lists, licences,
+# funders, ...) without building Python objects for it. Without msgspec the
+# page is decoded with orjson or json and pruned to the same shape.
+# ================================
+DoajAuthor = TypedDict('DoajAuthor', {'name': str, 'affiliation': str}, total=False)
+DoajIdentifier = TypedDict('DoajIdentifier', {'type': str, 'id': str}, total=False)
+DoajLink = TypedDict('DoajLink', {'type': str, 'content_type': str, 'url': str}, total=False)
+DoajJournal = TypedDict('DoajJournal', {'title': str}, total=False)
+DoajBibjson = TypedDict('DoajBibjson', {
+    'title': str,
+    'year': Any,
+    'month': Any,
+    'journal': DoajJournal,
+    'abstract': str,
+    'keywords': list[str],
+    'author': list[DoajAuthor],
+    'identifier': list[DoajIdentifier],
+    'link': list[DoajLink],
+}, total=False)
+DoajArticle = TypedDict('DoajArticle', {'id': str, 'bibjson': DoajBibjson}, total=False)
+DoajPage = TypedDict('DoajPage', {'total': int, 'results': list[DoajArticle]}, total=False)
+
+ZenodoPersonOrOrg = TypedDict('ZenodoPersonOrOrg', {'name': Any}, total=False)
+# 'affiliation' is a string in legacy records and an object in newer ones
+ZenodoCreator = TypedDict('ZenodoCreator', {'person_or_org': ZenodoPersonOrOrg, 'name': Any, 'affiliation': Any}, total=False)
+ZenodoJournal = TypedDict('ZenodoJournal', {'title': Any}, total=False)
+ZenodoMetadata = TypedDict('ZenodoMetadata', {
+    'title': Any,
+    'publication_date': Any,
+    'created': Any,
+    'journal': Any,
+    'description': Any,
+    'keywords': Any,
+    'doi': str,
+    'creators': list[ZenodoCreator],
+}, total=False)
+ZenodoFileLinks = TypedDict('ZenodoFileLinks', {'self': str, 'download': str}, total=False)
+ZenodoFile = TypedDict('ZenodoFile', {'type': Any, 'key': str, 'links': ZenodoFileLinks}, total=False)
+# record-level 'created' is the upload time, which sort=mostrecent orders by
+ZenodoRecord = TypedDict('ZenodoRecord', {'id': Any, 'created': Any, 'metadata': ZenodoMetadata,
+                                          'files': list[ZenodoFile]}, total=False)
+ZenodoHits = TypedDict('ZenodoHits', {'total': Any, 'hits': list[ZenodoRecord]}, total=False)
+ZenodoPage = TypedDict('ZenodoPage', {'hits': ZenodoHits}, total=False)
+
+CrossrefAuthor = TypedDict('CrossrefAuthor', {'given': str, 'family': str, 'affiliation': list[Any]}, total=False)
+CrossrefDate = TypedDict('CrossrefDate', {'date-parts': list[list[Any]]}, total=False)
+CrossrefLink = TypedDict('CrossrefLink', {'URL': str, 'content-type': str, 'intended-application': str}, total=False)
+CrossrefItem = TypedDict('CrossrefItem', {
+    'DOI': str,
+    'title': list[str],
+    'author': list[CrossrefAuthor],
+    'published': CrossrefDate,
+    'published-online': CrossrefDate,
+    'published-print': CrossrefDate,
+    'container-title': list[str],
+    'abstract': str,
+    'subject': list[str],
+    'link': list[CrossrefLink],
+}, total=False)
+CrossrefMessage = TypedDict('CrossrefMessage', {'total-results': int, 'items': list[CrossrefItem]}, total=False)
+CrossrefPage = TypedDict('CrossrefPage', {'message': CrossrefMessage}, total=False)
+
+# PubMed esummary (metadata-only harvests): "result" maps each PMID to its
+# summary, plus a "uids" list
+PubmedSummaryAuthor = TypedDict('PubmedSummaryAuthor', {'name': str, 'authtype': str}, total=False)
+PubmedSummaryArticleId = TypedDict('PubmedSummaryArticleId', {'idtype': str, 'value': str}, total=False)
+PubmedSummary = TypedDict('PubmedSummary', {
+    'uid': str,
+    'title': str,
+    'pubdate': str,
+    'sortpubdate': str,
+    'fulljournalname': str,
+    'authors': list[PubmedSummaryAuthor],
+    'articleids': list[PubmedSummaryArticleId],
+}, total=False)
+PubmedSummaryPage = TypedDict('PubmedSummaryPage', {'result': dict[str, PubmedSummary | list[str]]}, total=False)
+
+JSON_SCHEMAS = {
+    'doaj': DoajPage,
+    'zenodo': ZenodoPage,
+    'crossref': CrossrefPage,
+    'pubmed_summary': PubmedSummaryPage,
+}
+
+# fields left out of metadata-only harvests
+METADATA_ONLY_SKIPPED_FIELDS = frozenset({'abstract', 'description', 'files'})
+
+_json_decoders = {}
+
+def decode_json_response(content: bytes | str, source: str, skip_fields: frozenset = frozenset()):
+    schema = JSON_SCHEMAS[source]
+    if skip_fields:
+        schema = _schema_without(schema, skip_fields)
+    try:
+        import msgspec
+    except ImportError:
+        msgspec = None
+
+    if msgspec is not None:
+        decoder = _json_decoders.get((source, skip_fields))
+        if decoder is None:
+            decoder = _json_decoders[(source, skip_fields)] = msgspec.json.Decoder(schema)
+        try:
+            return decoder.decode(content)
+        except msgspec.ValidationError as e:
+            # the API sent a type we did not expect, decode the whole page instead
+            print(f"Schema mismatch for {source} response, falling back to full decode: {e}")
+
+    try:
+        import orjson
+        data = orjson.loads(content)
+    except ImportError:
+        import json
+        data = json.loads(content)
+    return _prune_to_schema(data, schema)
+
+@functools.lru_cache(maxsize=None)
+def _schema_without(schema, skip_fields: frozenset):
+    # copy of a schema with the given field names removed at every level
+    import typing
+
+    if typing.is_typeddict(schema):
+        fields = {
+            key: _schema_without(field_schema, skip_fields)
+            for key, field_schema in _schema_fields(schema).items()
+            if key not in skip_fields
+        }
+        return TypedDict(schema.__name__, fields, total=False)
+    if typing.get_origin(schema) is list:
+        return list[_schema_without(typing.get_args(schema)[0], skip_fields)]
+    return schema
+
+@functools.lru_cache(maxsize=None)
+def _schema_fields(schema):
+    import typing
+    return typing.get_type_hints(schema)
+
+def _prune_to_schema(value, schema):
+    import typing
+
+    if schema is Any:
+        return value
+    if typing.is_typeddict(schema):
+        if not isinstance(value, dict):
+            return value
+        fields = _schema_fields(schema)
+        return {key: _prune_to_schema(value[key], fields[key]) for key in fields if key in value}
+    if typing.get_origin(schema) is list:
+        if not isinstance(value, list):
+            return value
+        item_schema = typing.get_args(schema)[0]
+        return [_prune_to_schema(item, item_schema) for item in value]
+    if typing.get_origin(schema) is dict:
+        if not isinstance(value, dict):
+            return value
+        value_schema = typing.get_args(schema)[1]
+        return {key: _prune_to_schema(item, value_schema) for key, item in value.items()}
+    if isinstance(schema, types.UnionType):
+        # at most one object-like and one list-like member, pick by value
+        for member in typing.get_args(schema):
+            if isinstance(value, dict) and typing.is_typeddict(member):
+                return _prune_to_schema(value, member)
+            if isinstance(value, list) and typing.get_origin(member) is list:
+                return _prune_to_schema(value, member)
+    return value
+
+# ================================
+# Deduplication
+# ================================
+# Papers are checked as they are parsed, before the rest of the paper dict is
+# built, using canonical identifiers: lowercased DOI without the doi.org
+# prefix, arXiv ID without its version, PMID, and DOAJ/Zenodo record IDs.
+# A paper is a duplicate if any of its identifiers has been seen before.
+#
+# Identifiers are stored as 64-bit hashes. For very large batch runs a Bloom
+# filter can sit in front of the exact set (bloom_capacity=...), and with
+# exact=False the exact set is dropped entirely, trading a small
+# false-positive rate for a fixed memory footprint.
+# ================================
+def canonical_doi(doi: str | None):
+    if not doi:
+        return ''
+    doi = doi.strip().lower()
+    for prefix in ('https://doi.org/', 'http://doi.org/', 'https://dx.doi.org/', 'http://dx.doi.org/', 'doi:'):
+        if doi.startswith(prefix):
+            doi = doi[len(prefix):]
+            break
+    return doi.strip()
+
+def canonical_arxiv_id(arxiv_id: str | None):
+    if not arxiv_id:
+        return ''
+    arxiv_id = arxiv_id.strip()
+    if arxiv_id.lower().startswith('arxiv:'):
+        arxiv_id = arxiv_id[len('arxiv:'):]
+    return re.sub(r'v[0-9]+$', '', arxiv_id).lower()
+
+def paper_identifiers(doi: str | None = None, arxiv_id: str | None = None, pmid: str | None = None,
+                      doaj_id: str | None = None, zenodo_id=None):
+    keys = []
+    if doi and canonical_doi(doi):
+        keys.append(f"doi:{canonical_doi(doi)}")
+    if arxiv_id and canonical_arxiv_id(arxiv_id):
+        keys.append(f"arxiv:{canonical_arxiv_id(arxiv_id)}")
+    if pmid:
+        keys.append(f"pmid:{str(pmid).strip()}")
+    if doaj_id:
+        keys.append(f"doaj:{doaj_id}")
+    if zenodo_id is not None and zenodo_id != '':
+        keys.append(f"zenodo:{zenodo_id}")
+    return keys
+
+def canonical_paper_ids(paper: dict, source: str | None = None):
+    # identifiers of an already parsed paper. DOAJ and Zenodo keep their
+    # record ID in paper['id'], so the source is needed to namespace it
+    links = paper.get('links') or {}
+    return paper_identifiers(
+        doi=links.get('doi'),
+        arxiv_id=links.get('arxiv_id'),
+        pmid=links.get('pmid'),
+        doaj_id=paper.get('id') if source == 'doaj' else None,
+        zenodo_id=paper.get('id') if source == 'zenodo' else None,
+    )
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        import math
+
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, h1: int, h2: int):
+        # double hashing: k positions from two 64-bit hashes
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, h1: int, h2: int):
+        for position in self._positions(h1, h2):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, h1: int, h2: int):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(h1, h2))
+
+class PaperDeduplicator:
+    def __init__(self, bloom_capacity: int | None = None, error_rate: float = 0.001, exact: bool = True):
+        self.bloom = BloomFilter(bloom_capacity, error_rate) if bloom_capacity else None
+        self.seen = set() if exact or self.bloom is None else None
+        self.lock = threading.Lock()
+        self.unique = 0
+        self.duplicates = 0
+        self.duplicates_by_source = collections.Counter()
+
+    @staticmethod
+    def _hash(key: str):
+        import hashlib
+
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def _contains(self, h1: int, h2: int):
+        if self.bloom is not None and not self.bloom.might_contain(h1, h2):
+            # definitely new, no need to touch the exact set
+            return False
+        if self.seen is None:
+            return True
+        return h1 in self.seen
+
+    def check_and_add(self, keys: list, source: str | None = None):
+        # True if the paper is new. Papers without any identifier are always
+        # new. Duplicates are also counted per source when it is given
+        hashes = [self._hash(key) for key in keys]
+        with self.lock:
+            if any(self._contains(h1, h2) for h1, h2 in hashes):
+                self.duplicates += 1
+                if source is not None:
+                    self.duplicates_by_source[source] += 1
+                return False
+            for h1, h2 in hashes:
+                if self.bloom is not None:
+                    self.bloom.add(h1, h2)
+                if self.seen is not None:
+                    self.seen.add(h1)
+            self.unique += 1
+            return True
+
+    def add_paper(self, paper: dict, source: str | None = None):
+        return self.check_and_add(canonical_paper_ids(paper, source), source)
+
+# ================================
+# Top-N most recent
+# ================================
+# With a limit, every source is asked for date-descending results and each
+# source stops paging as soon as a page's oldest paper is older than the
+# current N-th newest paper across all sources: later pages are older still
+# and cannot make the cut.
+# ================================
+_MONTHS = {m: i for i, m in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+
+def normalize_publication_date(value):
+    # "2023", "2023-05", "2023-May-01", "2023-05-01T00:00:00Z", 2023 -> "YYYY-MM-DD"
+    # missing parts become 01, unparseable dates become ""
+    if value is None or value == '':
+        return ''
+    parts = re.split(r'[-/ T]', str(value).strip())
+    if not parts[0].isdigit() or len(parts[0]) != 4:
+        return ''
+    date = [parts[0], '01', '01']
+    for i, part in enumerate(parts[1:3], 1):
+        if part.isdigit() and 1 <= int(part) <= (12 if i == 1 else 31):
+            date[i] = part.zfill(2)
+        elif part[:3].lower() in _MONTHS and i == 1:
+            date[i] = str(_MONTHS[part[:3].lower()]).zfill(2)
+        else:
+            break
+    return '-'.join(date)
+
+def sort_papers_by_date(papers: list):
+    # recent to oldest, undated papers last
+    return sorted(papers, key=lambda paper: normalize_publication_date(paper.get('publication_date')), reverse=True)
+
+class TopNCollector:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.dates = []  # min-heap of the newest `limit` dates seen so far
+        self.counted = set()  # identifiers of papers already in the heap
+        self.lock = threading.Lock()
+
+    def cutoff(self):
+        # date a paper must beat to get into the top N, None until N are known
+        with self.lock:
+            return self.dates[0] if len(self.dates) >= self.limit else None
+
+    def offer(self, papers: list, year_only: bool = False, stream_dates: list | None = None):
+        # records a page from a date-descending stream; True once that stream
+        # can no longer contribute to the top N. Pages should include papers
+        # other streams already found: they are only counted once, but their
+        # dates still tell where this stream is. year_only is for streams
+        # sorted by year alone, where later pages can still hold later months
+        # of the cutoff year. stream_dates is for streams sorted by another
+        # date that is never before publication (Zenodo's upload time): the
+        # stream is placed by those instead
+        import heapq
+
+        dates = []
+        with self.lock:
+            for paper in papers:
+                date = normalize_publication_date(paper.get('publication_date'))
+                if not date:
+                    continue
+                dates.append(date)
+                keys = canonical_paper_ids(paper) or [f"title:{(paper.get('title') or '').lower()}"]
+                if any(key in self.counted for key in keys):
+                    continue
+                self.counted.update(keys)
+                if len(self.dates) < self.limit:
+                    heapq.heappush(self.dates, date)
+                elif date > self.dates[0]:
+                    heapq.heapreplace(self.dates, date)
+            if stream_dates is not None:
+                dates = [date for date in map(normalize_publication_date, stream_dates) if date]
+            if not dates or len(self.dates) < self.limit:
+                return False
+            if year_only:
+                return min(dates)[:4] < self.dates[0][:4]
+            # ties at the cutoff cannot get in either
+            return min(dates) <= self.dates[0]
+
+# ================================
+# Process-pool parsing
+# ================================
+# Parsing big PubMed/arXiv XML and Crossref JSON pages holds the GIL and
+# stalls the threads that are downloading. With parse workers enabled the raw
+# response bytes go to a process pool and only the parsed papers come back,
+# so the fetch loop keeps downloading while earlier pages are parsed.
+# ================================
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+_parse_workers = 0
+
+def set_parse_workers(workers: int):
+    # 0 (the default) parses inline on the fetching thread
+    global _parse_pool, _parse_workers
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=True)
+            _parse_pool = None
+        _parse_workers = max(0, workers)
+
+def process_pool(workers: int):
+    # worker processes are spawned rather than forked: a fork copies locks
+    # held by this process's other threads (downloads, the HTTP service) and
+    # can deadlock the child
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+_JSON_TOTAL_RE = re.compile(rb'"total"\s*:\s*(?:\{\s*"value"\s*:\s*)?([0-9]+)')
+
+def json_total_results(content: bytes | str, source: str):
+    # result count of a DOAJ or Zenodo page without parsing it, so paging
+    # doesn't wait on the first page's parse. DOAJ puts "total" before its
+    # results, Zenodo's hits.total comes after the hit list
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    matches = _JSON_TOTAL_RE.findall(content)
+    if not matches:
+        return None
+    return int(matches[0] if source == 'doaj' else matches[-1])
+
+def parse_raw_response(source: str, content: bytes, target_author: str | None = None, target_school: str | None = None,
+                       dedup=None, level: str = 'full'):
+    # top level so it can run in a worker process. Returns the parsed papers
+    # plus the page totals the fetch loops use for pagination
+    result = {'papers': [], 'total': None, 'deduplicated': dedup is not None}
+    metadata_only = level == 'metadata'
+    if source == 'arxiv':
+        result['papers'] = parse_arxiv_response(content, target_author, dedup)
+        result['total'] = arxiv_total_results(content)
+    elif source == 'pubmed' and metadata_only:
+        # esummary JSON instead of efetch XML
+        data = decode_json_response(content, 'pubmed_summary')
+        result['papers'] = parse_pubmed_summary_response(data, target_author, dedup)
+    elif source == 'pubmed':
+        result['papers'] = parse_pubmed_response(content, target_author, dedup)
+    else:
+        # metadata-only pages skip decoding abstracts and file manifests
+        data = decode_json_response(content, source, METADATA_ONLY_SKIPPED_FIELDS if metadata_only else frozenset())
+        if source == 'doaj':
+            result['papers'] = parse_doaj_response(data, target_author, target_school, dedup)
+            result['total'] = data.get('total', 0)
+        elif source == 'zenodo':
+            result['papers'] = parse_zenodo_response(data, target_author, target_school, dedup)
+            # pages are ordered by upload time, not publication date; top-N
+            # paging needs to know where the stream is in that order
+            result['stream_dates'] = [record.get('created') for record in data.get('hits', {}).get('hits', [])]
+            total = data.get('hits', {}).get('total', 0)
+            # newer Zenodo responses wrap the total as {"value": n}
+            result['total'] = total.get('value', 0) if isinstance(total, dict) else total
+        elif source == 'crossref':
+            result['papers'] = parse_crossref_response(data, target_author, target_school, dedup)
+            result['total'] = data.get('message', {}).get('total-results', 0)
+        else:
+            raise ValueError(f"Unknown source: {source}")
+
+    if metadata_only:
+        # hydrate_abstracts() needs to know where each paper came from
+        for paper in result['papers']:
+            paper.pop('abstract', None)
+            paper['source'] = source
+            paper['hydrated'] = False
+    return result
+
+def submit_parse(source: str, content: bytes, target_author: str | None = None, target_school: str | None = None,
+                 dedup=None, level: str = 'full', archive_meta: dict | None = None):
+    # inline parsing drops duplicates while parsing; pool workers cannot see
+    # the deduplicator, so their papers are filtered in collect_parsed.
+    # archive_meta (query, page) is recorded with the raw response when an
+    # archive is set, see set_response_archive. Sources pass the lookup's
+    # school even when their parser ignores it, so the archive can group
+    # a lookup's responses together
+    import time
+    from concurrent.futures import Future
+    global _parse_pool
+
+    fetched_at = time.time()
+    if _response_archive is not None:
+        try:
+            archive_response(_response_archive, source, content, target_author, target_school, level, archive_meta,
+                             fetched_at)
+        except OSError as e:
+            print(f"Error archiving {source} response: {e}")
+
+    if _parse_workers <= 0:
+        future = Future()
+        future.source = source
+        try:
+            future.set_result(parse_raw_response(source, content, target_author, target_school, dedup, level))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = process_pool(_parse_workers)
+        pool = _parse_pool
+    future = pool.submit(parse_raw_response, source, content, target_author, target_school, None, level)
+    future.source = source
+    return future
+
+def collect_parsed(futures: list, dedup=None):
+    papers = []
+    for future in futures:
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error parsing response: {e}")
+            continue
+        if dedup is None or result['deduplicated']:
+            papers.extend(result['papers'])
+        else:
+            source = getattr(future, 'source', None)
+            papers.extend(paper for paper in result['papers'] if dedup.add_paper(paper, source))
+    return papers
+
+# ================================
+# Raw response archive
+# ================================
+# Every response handed to the parsers can be kept on disk, gzip compressed
+# and stored under its sha256, with an index line recording what it was
+# (source, query, page, fetch time and the parse arguments). After a parser
+# fix, reparse_archive() replays the archive through the current parsers in
+# a process pool instead of fetching everything again.
+#
+#   <archive>/index.jsonl
+#   <archive>/objects/ab/abcdef....gz
+# ================================
+_response_archive = None
+_archive_lock = threading.Lock()
+
+def set_response_archive(path: str | None):
+    # None (the default) turns archiving off
+    global _response_archive
+    _response_archive = path
+
+def _archive_object_path(archive_dir: str, digest: str):
+    import os
+    return os.path.join(archive_dir, 'objects', digest[:2], digest + '.gz')
+
+def archive_response(archive_dir: str, source: str, content: bytes | str, target_author: str | None = None,
+                     target_school: str | None = None, level: str = 'full', meta: dict | None = None,
+                     fetched_at: float | None = None):
+    # fetched_at defaults to now; submit_parse passes the time the response
+    # was handed over, before it is compressed and written
+    import gzip
+    import hashlib
+    import json
+    import os
+    import time
+
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    digest = hashlib.sha256(content).hexdigest()
+    path = _archive_object_path(archive_dir, digest)
+    # identical responses (same page from two strategies) are stored once
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=6))
+        os.replace(tmp_path, path)
+
+    entry = {
+        'digest': digest,
+        'source': source,
+        'target_author': target_author,
+        'target_school': target_school,
+        'level': level,
+        'fetched_at': fetched_at,
+        'size': len(content),
+    }
+    entry.update(meta or {})
+    with _archive_lock:
+        with open(os.path.join(archive_dir, 'index.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+    return digest
+
+def iter_archive_index(archive_dir: str):
+    import json
+    import os
+
+    index_path = os.path.join(archive_dir, 'index.jsonl')
+    if not os.path.exists(index_path):
+        return
+    with open(index_path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # a line cut short by a crash mid-write
+                continue
+
+def load_archived_response(archive_dir: str, digest: str):
+    import gzip
+    with open(_archive_object_path(archive_dir, digest), 'rb') as f:
+        return gzip.decompress(f.read())
+
+def _reparse_archived(archive_dir: str, entry: dict):
+    content = load_archived_response(archive_dir, entry['digest'])
+    return parse_raw_response(entry['source'], content, entry.get('target_author'), entry.get('target_school'),
+                              level=entry.get('level', 'full'))
+
+def reparse_archive(archive_dir: str, workers: int | None = None, sources=None):
+    # returns {(name, school): papers} rebuilt from the archive with the
+    # current parsers. Entries are parsed in a process pool, then merged in
+    # archive order so deduplication keeps the same paper the harvest would.
+    # At most a few entries per worker are in flight, so a large archive is
+    # streamed rather than queued up front
+    import os
+
+    entries = (entry for entry in iter_archive_index(archive_dir) if sources is None or entry['source'] in sources)
+    workers = workers or os.cpu_count() or 1
+    lookups = {}
+    in_flight = collections.deque()
+
+    def merge(entry, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error re-parsing archived {entry['source']} response {entry['digest']}: {e}")
+            return
+        key = (entry.get('target_author'), entry.get('target_school'))
+        if key not in lookups:
+            lookups[key] = (PaperDeduplicator(), [])
+        dedup, papers = lookups[key]
+        papers.extend(paper for paper in result['papers'] if dedup.add_paper(paper, entry['source']))
+
+    with process_pool(workers) as executor:
+        for entry in entries:
+            in_flight.append((entry, executor.submit(_reparse_archived, archive_dir, entry)))
+            if len(in_flight) >= 4 * workers:
+                merge(*in_flight.popleft())
+        while in_flight:
+            merge(*in_flight.popleft())
+    return {key: papers for key, (dedup, papers) in lookups.items()}
+
+def _collect_page(page, dedup, top_n, collected: list, year_only: bool = False):
+    # in top-N mode pages are collected as they arrive so a source can stop
+    # paging early; returns True once the stream cannot reach the top N.
+    # These pages are parsed without the deduplicator (see parse_dedup in the
+    # sources) so duplicates still show where the stream is; pages are at
+    # most N papers, so that stays small
+    papers = collect_parsed([page])
+    collected.extend(paper for paper in papers if dedup.add_paper(paper, getattr(page, 'source', None)))
+    try:
+        stream_dates = page.result().get('stream_dates')
+    except Exception:
+        stream_dates = None
+    return top_n.offer(papers, year_only, stream_dates)
+
+def get_papers(query: dict, disambiguate: bool = False, limit: int | None = None, level: str = 'full',
+               budget: float | None = None, status: dict | None = None, scheduler=None):
+    import copy
+
     # ================================
     # Parse Query
     # ================================
@@ -64,23 +950,261 @@ def get_papers(query: dict):
     # Papers
     # title, authors, links, publication date, and categories
     # ================================
-    papers = []
+    # concurrent identical queries join the harvest that is already running.
+    # duplicates are dropped while parsing, across all sources. With
+    # level='metadata' abstracts are left out; see hydrate_abstracts().
+    # With a budget (seconds) the harvest stops when it runs out; status
+    # then says which sources finished
+    # a scheduler (SourceScheduler) picks the sources, learning per query['domain'];
+    # such a harvest runs on its own so the scheduler records every run it plans
+    domain = query.get('domain')
+    harvest = lambda: _harvest_papers(name, school, limit, level, budget, scheduler, domain)
+    if scheduler is None:
+        key = ('papers', (name or '').strip().lower(), (school or '').strip().lower(), limit, level, budget, domain)
+        papers, completeness = single_flight(key, harvest)
+        # joined callers get the same result; each gets its own papers
+        papers = copy.deepcopy(papers)
+    else:
+        papers, completeness = harvest()
+    if status is not None:
+        status.update(completeness)
+    incomplete = [source for source, complete in completeness.items() if not complete]
+    if incomplete:
+        print(f"Lookup budget ran out, partial results from: {', '.join(incomplete)}")
 
-    papers.extend(get_papers_from_arxiv(name, school) or [])
-    papers.extend(get_papers_from_pubmed(name, school) or [])
-    papers.extend(get_papers_from_doaj(name, school) or [])
-    papers.extend(get_papers_from_zenodo(name, school) or [])
-    papers.extend(get_papers_from_crossref(name, school) or [])
+    # drop papers by other people with the same name
+    if disambiguate and name:
+        papers = disambiguate_papers(papers, name, school)
     test_print_papers(papers)
-    # get rid of duplicates
-    pass
 
     # ================================
     # Get Keywords/Topics
     # ================================
     pass
 
-def parse_arxiv_response(response: str, target_author: str | None = None):
+    return papers
+
+PAPER_SOURCES = ('arxiv', 'pubmed', 'doaj', 'zenodo', 'crossref')
+
+def _harvest_papers(name: str | None, school: str | None, limit: int | None = None, level: str = 'full',
+                    budget: float | None = None, scheduler=None, domain: str | None = None):
+    papers = []
+    status = {}
+    for source, source_papers in iter_papers(name, school, limit=limit, level=level, budget=budget, status=status,
+                                             scheduler=scheduler, domain=domain):
+        papers.extend(source_papers)
+    if limit is not None:
+        # merge the per-source streams into the overall top N
+        papers = sort_papers_by_date(papers)[:limit]
+    return papers, status
+
+def iter_papers(name: str | None, school: str | None, max_workers: int = 1, dedup=None, limit: int | None = None,
+                level: str = 'full', budget: float | None = None, status: dict | None = None,
+                scheduler=None, domain: str | None = None):
+    # yields (source, papers) as each source finishes, so callers can show
+    # results before the whole harvest is done.
+    # with max_workers > 1 the sources are queried concurrently and yielded
+    # in the order they complete. One deduplicator is shared by all sources,
+    # so a paper found by several sources is only yielded once.
+    # with a limit, sources only fetch what can still make the `limit` most
+    # recent papers (callers still need to merge and cut the streams).
+    # level='metadata' fetches only titles, dates, venues, authors and IDs.
+    # with a budget (seconds for the whole lookup) sources stop fetching when
+    # it runs out and yield what they have. status, if given, is filled with
+    # source -> True when the source finished, False when it was cut short.
+    # with a SourceScheduler, only the sources it plans for the professor and
+    # domain are queried, in its order, and each source's yield goes back to it
+    import time
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    deadline = time.monotonic() + budget if budget is not None else None
+    incomplete = set()
+    if status is None:
+        status = {}
+    if dedup is None:
+        dedup = PaperDeduplicator()
+    top_n = TopNCollector(limit) if limit is not None else None
+
+    fetchers = {
+        'arxiv': get_papers_from_arxiv,
+        'pubmed': get_papers_from_pubmed,
+        'doaj': get_papers_from_doaj,
+        'zenodo': get_papers_from_zenodo,
+        'crossref': get_papers_from_crossref,
+    }
+
+    sources = scheduler.plan(domain, name) if scheduler is not None else PAPER_SOURCES
+
+    def finish(source, papers, seconds, duplicates):
+        status[source] = source not in incomplete
+        record_timing(f"source.{source}", seconds)
+        if scheduler is not None:
+            scheduler.record(source, len(papers), duplicates, seconds, domain, name)
+
+    if max_workers <= 1:
+        for source in sources:
+            papers, seconds, duplicates = _run_source(deadline, source, incomplete, fetchers[source],
+                                                      name, school, dedup, top_n, level)
+            finish(source, papers, seconds, duplicates)
+            yield source, papers
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(sources) or 1)) as executor:
+        futures = {executor.submit(_run_source, deadline, source, incomplete, fetchers[source],
+                                   name, school, dedup, top_n, level): source
+                   for source in sources}
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                papers, seconds, duplicates = future.result()
+            except Exception as e:
+                print(f"Error harvesting {source}: {e}")
+                incomplete.add(source)
+                papers, seconds, duplicates = [], 0.0, 0
+            finish(source, papers, seconds, duplicates)
+            yield source, papers
+
+def _run_source(deadline, source: str, incomplete: set, fetch, name, school, dedup, top_n, level):
+    # (papers, seconds, duplicates this source returned). Duplicates are
+    # counted per source by the deduplicator, so this holds with sources
+    # running concurrently too
+    import time
+
+    start = time.monotonic()
+    duplicates = dedup.duplicates_by_source[source]
+    papers = run_with_deadline(deadline, source, incomplete, fetch, name, school, dedup, top_n, level) or []
+    return papers, time.monotonic() - start, dedup.duplicates_by_source[source] - duplicates
+
+# ================================
+# Source scheduling
+# ================================
+# A SourceScheduler learns how many new papers each source returns per
+# second, and how often what it returns was already found elsewhere, for
+# each professor and research domain. plan() orders sources by expected new
+# papers per second and skips the ones that have stopped paying off (after
+# min_runs tries), except on every explore_every-th plan for a domain, when
+# everything is queried again so a skipped source can earn its place back.
+# A professor with too few runs falls back to their domain, and a domain to
+# the totals over all lookups. Decisions go to metrics (scheduler.*).
+# ================================
+class SourceScheduler:
+    def __init__(self, sources=PAPER_SOURCES, min_runs: int = 3, min_rate: float = 0.05,
+                 explore_every: int = 10, path: str | None = None):
+        self.sources = tuple(sources)
+        self.min_runs = min_runs
+        self.min_rate = min_rate
+        self.explore_every = explore_every
+        self.path = path
+        # (scope, source) -> {'runs', 'papers', 'duplicates', 'seconds'}, where
+        # scope is 'author:<name>', 'domain:<domain>' or '*'
+        self.stats = {}
+        self.plans = collections.Counter()
+        self.lock = threading.Lock()
+        if path:
+            self.load(path)
+
+    @staticmethod
+    def _scopes(domain: str | None, professor: str | None):
+        scopes = []
+        if professor:
+            scopes.append(f"author:{' '.join(professor.lower().split())}")
+        if domain:
+            scopes.append(f"domain:{domain.lower()}")
+        scopes.append('*')
+        return scopes
+
+    def _stats(self, scope: str, source: str):
+        key = (scope, source)
+        if key not in self.stats:
+            self.stats[key] = {'runs': 0, 'papers': 0, 'duplicates': 0, 'seconds': 0.0}
+        return self.stats[key]
+
+    def record(self, source: str, papers: int, duplicates: int, seconds: float,
+               domain: str | None = None, professor: str | None = None):
+        with self.lock:
+            for scope in self._scopes(domain, professor):
+                stats = self._stats(scope, source)
+                stats['runs'] += 1
+                stats['papers'] += papers
+                stats['duplicates'] += duplicates
+                stats['seconds'] += seconds
+        increment_metric(f"scheduler.papers.{source}", papers)
+        increment_metric(f"scheduler.duplicates.{source}", duplicates)
+
+    def expected_rate(self, source: str, domain: str | None = None, professor: str | None = None):
+        # (new papers per second, runs behind it) from the narrowest scope
+        # with min_runs; the extra second keeps a few lucky fast runs from
+        # dominating. (None, 0) when never tried
+        with self.lock:
+            stats = None
+            for scope in self._scopes(domain, professor):
+                stats = self.stats.get((scope, source))
+                if stats is not None and stats['runs'] >= self.min_runs:
+                    break
+            if stats is None:
+                return None, 0
+            return stats['papers'] / (stats['seconds'] + 1), stats['runs']
+
+    def plan(self, domain: str | None = None, professor: str | None = None):
+        # sources to query, best first
+        with self.lock:
+            self.plans[domain or '*'] += 1
+            explore = self.explore_every > 0 and self.plans[domain or '*'] % self.explore_every == 0
+        rates = {source: self.expected_rate(source, domain, professor) for source in self.sources}
+        # untried sources go first so every source gets measured
+        order = sorted(self.sources, key=lambda source: (rates[source][0] is not None,
+                                                         -(rates[source][0] or 0)))
+        planned = []
+        for source in order:
+            rate, runs = rates[source]
+            if not explore and rate is not None and runs >= self.min_runs and rate < self.min_rate:
+                increment_metric(f"scheduler.skipped.{source}")
+                continue
+            planned.append(source)
+        if explore:
+            increment_metric('scheduler.explore_plans')
+        increment_metric('scheduler.plans')
+        return planned
+
+    def snapshot(self):
+        # '<scope>/<source>' -> stats plus rate and duplicate_rate
+        with self.lock:
+            snapshot = {}
+            for (scope, source), stats in self.stats.items():
+                found = stats['papers'] + stats['duplicates']
+                snapshot[f"{scope}/{source}"] = {
+                    **stats,
+                    'rate': stats['papers'] / stats['seconds'] if stats['seconds'] else None,
+                    'duplicate_rate': stats['duplicates'] / found if found else 0.0,
+                }
+            return snapshot
+
+    def save(self, path: str | None = None):
+        import json
+        import os
+
+        path = path or self.path
+        with self.lock:
+            data = [{'scope': scope, 'source': source, **stats} for (scope, source), stats in self.stats.items()]
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        import json
+        import os
+
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        with self.lock:
+            for entry in data:
+                self._stats(entry['scope'], entry['source']).update(
+                    {key: entry[key] for key in ('runs', 'papers', 'duplicates', 'seconds')})
+
+def parse_arxiv_response(response: str, target_author: str | None = None, dedup=None):
     # ================================
     # Example of papers
     # {
@@ -107,7 +1231,18 @@ def parse_arxiv_response(response: str, target_author: str | None = None):
             'arxiv': 'http://arxiv.org/schemas/atom',
             'opensearch': 'http://a9.com/-/spec/opensearch/1.1/'
         }
+        # id_list lookups can return several versions of a paper; keep the
+        # newest one in the position of the first
+        latest = {}
         for entry in root.findall('.//atom:entry', namespaces):
+            id_elem = entry.find('atom:id', namespaces)
+            arxiv_id = id_elem.text.strip().split('/abs/')[-1] if id_elem is not None and id_elem.text else ''
+            base_id, version = split_arxiv_version(arxiv_id)
+            if base_id not in latest or version > latest[base_id][0]:
+                latest[base_id] = (version, entry, latest.get(base_id, (0, None, len(latest)))[2])
+        entries = [entry for _, entry, _ in sorted(latest.values(), key=lambda item: item[2])]
+
+        for entry in entries:
             authors = []
             author_found = False
             for author_elem in entry.findall('atom:author', namespaces):
@@ -123,20 +1258,29 @@ def parse_arxiv_response(response: str, target_author: str | None = None):
             if target_author and not author_found:
                 continue
 
+            id_elem = entry.find('atom:id', namespaces)
+            doi_elem = entry.find('arxiv:doi', namespaces)
+            arxiv_id, version = None, 0
+            if id_elem is not None and id_elem.text:
+                # old-style IDs keep their archive: hep-th/9901001v1
+                arxiv_id, version = split_arxiv_version(id_elem.text.strip().split('/abs/')[-1])
+            if dedup is not None and not dedup.check_and_add(paper_identifiers(
+                    doi=doi_elem.text if doi_elem is not None else None, arxiv_id=arxiv_id), 'arxiv'):
+                continue
+
             paper = {}
             paper['authors'] = authors
             title_elem = entry.find('atom:title', namespaces)
             if title_elem is not None and title_elem.text is not None:
                 paper['title'] = title_elem.text.strip()
-            id_elem = entry.find('atom:id', namespaces)
-            if id_elem is not None and id_elem.text is not None:
-                arxiv_id = id_elem.text.split('/')[-1]
+            if arxiv_id:
+                # versionless links always point at the newest version
                 paper['links'] = {
                     'pdf': f"https://arxiv.org/pdf/{arxiv_id}",
                     'abstract': f"https://arxiv.org/abs/{arxiv_id}",
-                    'arxiv_id': arxiv_id
+                    'arxiv_id': arxiv_id,
+                    'arxiv_version': version,
                 }
-            doi_elem = entry.find('arxiv:doi', namespaces)
             if doi_elem is not None and doi_elem.text is not None:
                 paper['links']['doi'] = doi_elem.text.strip()
             published_elem = entry.find('atom:published', namespaces)
@@ -153,7 +1297,7 @@ def parse_arxiv_response(response: str, target_author: str | None = None):
             # Get abstract
             summary_elem = entry.find('atom:summary', namespaces)
             if summary_elem is not None and summary_elem.text:
-                paper['abstract'] = summary_elem.text.strip()
+                paper['abstract'] = normalize_abstract(summary_elem.text)
             papers.append(paper)
         return papers
     except ET.ParseError as e:
@@ -163,82 +1307,125 @@ def parse_arxiv_response(response: str, target_author: str | None = None):
         print(f"Error processing arXiv response: {e}")
         return []
       
-def get_papers_from_arxiv(name: str | None = None, school: str | None = None):
-    import urllib.parse
+ARXIV_API = "http://export.arxiv.org/api/query"
+ARXIV_PAGE_SIZE = 200
+ARXIV_MAX_RESULTS = 2000        # per author
+ARXIV_REQUEST_INTERVAL = 3.0    # seconds between requests, as arXiv asks
+ARXIV_ID_LIST_BATCH = 100
+
+_arxiv_last_request = 0.0
+_arxiv_lock = threading.Lock()
+
+def split_arxiv_version(arxiv_id: str):
+    # "2301.00001v2" -> ("2301.00001", 2); no version -> version 0
+    match = re.match(r'^(.*?)v([0-9]+)$', arxiv_id or '')
+    if match:
+        return match.group(1), int(match.group(2))
+    return arxiv_id or '', 0
+
+def arxiv_total_results(content: bytes | str):
+    # opensearch:totalResults from a feed, without parsing the whole page
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    match = re.search(rb'<opensearch:totalResults[^>]*>\s*([0-9]+)', content)
+    return int(match.group(1)) if match else None
+
+def arxiv_throttle():
+    # waits until ARXIV_REQUEST_INTERVAL has passed since the last arXiv
+    # request from any thread. When the lookup deadline comes first the
+    # request is not sent: the source is flagged incomplete and Timeout raised
+    import requests
+    import time
+    global _arxiv_last_request
+
+    with _arxiv_lock:
+        wait = _arxiv_last_request + ARXIV_REQUEST_INTERVAL - time.monotonic()
+        remaining = lookup_time_remaining()
+        if wait > 0 and remaining is not None and wait >= remaining:
+            _mark_source_incomplete()
+            raise requests.exceptions.Timeout("Lookup deadline comes before the next arXiv request slot")
+        if wait > 0:
+            time.sleep(wait)
+        _arxiv_last_request = time.monotonic()
+
+def arxiv_get(params: dict):
+    arxiv_throttle()
+    # no hedging: a duplicate GET would break the request interval
+    response = http_get(ARXIV_API, params=params, hedge=False)
+    response.raise_for_status()
+    return response
+
+def get_papers_from_arxiv(name: str | None = None, school: str | None = None, dedup=None, top_n=None,
+                          level: str = 'full'):
     import requests
 
     if not name:
         print("No author name provided")
         return []
 
-    # Use more specific search terms
-    search_strategies = [
-        f'au:"{name}"',  # Exact match with quotes
-        f'au:{name}',    # Standard author search
-    ]
-    
-    if school:
-        # Add school affiliation search
-        search_strategies.append(f'au:"{name}" AND aff:"{school}"')
-        search_strategies.append(f'au:{name} OR aff:{school}')
+    if dedup is None:
+        dedup = PaperDeduplicator()
+    # top-N pages are deduplicated after parsing, see _collect_page
+    parse_dedup = dedup if top_n is None else None
 
-    all_papers = []
-    
-    for search_query in search_strategies:
-        print(f"Trying search: {search_query}")
-        
-        encoded_search_terms = urllib.parse.quote(search_query)
-        url = f"http://export.arxiv.org/api/query?search_query={encoded_search_terms}&max_results=100"
+    # one exact-name query, paged with start= in submission order so pages
+    # don't shift while paging. arXiv has no affiliation field to search, so
+    # the school is not part of the query
+    search_query = f'au:"{name}"'
+    page_size = ARXIV_PAGE_SIZE if top_n is None else min(ARXIV_PAGE_SIZE, top_n.limit)
+    print(f"Trying search: {search_query}")
 
+    pending = []
+    collected = []
+    start = 0
+    while start < ARXIV_MAX_RESULTS:
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            # Parse the XML response
-            papers = parse_arxiv_response(response.text, name)
-            
-            # print(f"Found {len(papers)} papers for search '{search_query}'")
-            all_papers.extend(papers)
-            
+            response = arxiv_get({
+                'search_query': search_query,
+                'start': start,
+                'max_results': page_size,
+                'sortBy': 'submittedDate',
+                'sortOrder': 'descending',
+            })
         except requests.exceptions.RequestException as e:
             print(f"HTTP Error for search '{search_query}': {e}")
+            break
+
+        # Parse the XML response (in the parse pool when enabled)
+        page = submit_parse('arxiv', response.content, name, school, parse_dedup, level,
+                            {'query': search_query, 'page': start // page_size + 1})
+        if top_n is None:
+            pending.append(page)
+        elif _collect_page(page, dedup, top_n, collected):
+            break
+
+        total = arxiv_total_results(response.content) or 0
+        start += page_size
+        # an empty page before the end is an arXiv hiccup, not more results
+        if start >= total or b'<entry>' not in response.content:
+            break
+
+    # duplicates were already dropped while parsing
+    return collected + collect_parsed(pending, dedup)
+
+def refresh_arxiv_papers(arxiv_ids: list, dedup=None, level: str = 'full'):
+    # re-fetches known papers by ID (newest version, DOI, journal ref) with
+    # id_list batches instead of re-running author searches
+    import requests
+
+    ids = list(dict.fromkeys(split_arxiv_version(arxiv_id)[0] for arxiv_id in arxiv_ids if arxiv_id))
+    pending = []
+    for i in range(0, len(ids), ARXIV_ID_LIST_BATCH):
+        batch = ids[i:i + ARXIV_ID_LIST_BATCH]
+        try:
+            response = arxiv_get({'id_list': ','.join(batch), 'max_results': len(batch)})
+        except requests.exceptions.RequestException as e:
+            print(f"HTTP Error refreshing arXiv IDs: {e}")
             continue
-    
-    # Remove duplicates based on arXiv ID and DOI
-    unique_papers = []
-    seen_ids = set()
-    seen_dois = set()
-    
-    for paper in all_papers:
-        is_duplicate = False
-        
-        # Check for arXiv ID duplicates
-        if 'links' in paper and 'arxiv_id' in paper['links']:
-            arxiv_id = paper['links']['arxiv_id']
-            if arxiv_id in seen_ids:
-                is_duplicate = True
-            else:
-                seen_ids.add(arxiv_id)
-        
-        # Check for DOI duplicates (if not already marked as duplicate)
-        if not is_duplicate and 'links' in paper and 'doi' in paper['links']:
-            doi = paper['links']['doi']
-            if doi in seen_dois:
-                is_duplicate = True
-            else:
-                seen_dois.add(doi)
-        
-        # Add paper if it's not a duplicate
-        if not is_duplicate:
-            unique_papers.append(paper)
-    
-    # print(f"Total papers found: {len(all_papers)}")
-    # print(f"Total unique papers found: {len(unique_papers)}")
-    # print(f"Deduplication stats: {len(seen_ids)} unique arXiv IDs, {len(seen_dois)} unique DOIs")
-    
-    return unique_papers
+        pending.append(submit_parse('arxiv', response.content, dedup=dedup, level=level))
+    return collect_parsed(pending, dedup)
 
-def parse_pubmed_response(response: str, target_author: str):
+def parse_pubmed_response(response: str, target_author: str | None = None, dedup=None):
     # ================================
     # Example of papers
     # {
@@ -273,13 +1460,18 @@ def parse_pubmed_response(response: str, target_author: str):
                 affiliation = aff_elem.text.strip() if aff_elem is not None and aff_elem.text else ''
                 if full_name:
                     authors.append({"name": full_name, "affiliation": affiliation})
-                    if target_author.lower() in full_name.lower():
+                    if target_author and target_author.lower() in full_name.lower():
                         author_found = True
-            if not author_found:
+            if target_author and not author_found:
+                continue
+            pmid_elem = article.find('.//PMID')
+            doi_elem = article.find('.//ELocationID[@EIdType="doi"]')
+            if dedup is not None and not dedup.check_and_add(paper_identifiers(
+                    doi=doi_elem.text if doi_elem is not None else None,
+                    pmid=pmid_elem.text if pmid_elem is not None else None), 'pubmed'):
                 continue
             paper = {}
             paper['authors'] = authors
-            pmid_elem = article.find('.//PMID')
             if pmid_elem is not None and pmid_elem.text:
                 pmid = pmid_elem.text
                 paper['links'] = {
@@ -287,7 +1479,6 @@ def parse_pubmed_response(response: str, target_author: str):
                     'abstract': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
                     'pdf': None
                 }
-            doi_elem = article.find('.//ELocationID[@EIdType="doi"]')
             if doi_elem is not None and doi_elem.text:
                 paper['links']['doi'] = doi_elem.text.strip()
             title_elem = article.find('.//ArticleTitle')
@@ -310,9 +1501,15 @@ def parse_pubmed_response(response: str, target_author: str):
             journal_elem = article.find('.//Journal/Title')
             if journal_elem is not None and journal_elem.text:
                 paper['journal'] = journal_elem.text.strip()
-            abstract_elem = article.find('.//Abstract/AbstractText')
-            if abstract_elem is not None and abstract_elem.text:
-                paper['abstract'] = abstract_elem.text.strip()
+            # structured abstracts have one AbstractText per section
+            sections = []
+            for abstract_elem in article.findall('.//Abstract/AbstractText'):
+                text = ''.join(abstract_elem.itertext()).strip()
+                if text:
+                    label = abstract_elem.get('Label')
+                    sections.append(f"{label}: {text}" if label else text)
+            if sections:
+                paper['abstract'] = normalize_abstract(' '.join(sections))
             categories = []
             for mesh_elem in article.findall('.//MeshHeadingList/MeshHeading/DescriptorName'):
                 if mesh_elem.text:
@@ -327,7 +1524,64 @@ def parse_pubmed_response(response: str, target_author: str):
         print(f"Error processing PubMed response: {e}")
         return []
 
-def get_papers_from_pubmed(name: str | None = None, school: str | None = None):
+def parse_pubmed_summary_response(data: dict, target_author: str | None = None, dedup=None):
+    # esummary records for metadata-only harvests: same paper shape as
+    # parse_pubmed_response, without the abstract and MeSH categories.
+    # Authors are listed as "Yan P", so match on last name and first initial
+    papers = []
+    try:
+        target_parts = (target_author or '').lower().split()
+        result = data.get('result', {})
+        for uid in result.get('uids', []):
+            doc = result.get(uid)
+            if not isinstance(doc, dict):
+                continue
+            authors = []
+            author_found = False
+            for author in doc.get('authors', []):
+                author_name = (author.get('name') or '').strip()
+                if not author_name:
+                    continue
+                authors.append({"name": author_name, "affiliation": ''})
+                name_parts = author_name.lower().split()
+                if target_author and target_author.lower() in author_name.lower():
+                    author_found = True
+                elif len(target_parts) >= 2 and len(name_parts) >= 2:
+                    if ' '.join(name_parts[:-1]) == target_parts[-1] and name_parts[-1][0] == target_parts[0][0]:
+                        author_found = True
+            if target_author and not author_found:
+                continue
+            doi = next((i.get('value') for i in doc.get('articleids', []) if i.get('idtype') == 'doi'), None)
+            if dedup is not None and not dedup.check_and_add(paper_identifiers(doi=doi, pmid=uid), 'pubmed'):
+                continue
+            paper = {}
+            paper['authors'] = authors
+            paper['links'] = {
+                'pmid': uid,
+                'abstract': f"https://pubmed.ncbi.nlm.nih.gov/{uid}/",
+                'pdf': None
+            }
+            if doi:
+                paper['links']['doi'] = doi.strip()
+            if doc.get('title'):
+                paper['title'] = doc['title'].strip()
+            # sortpubdate is "2023/05/01 00:00", pubdate is free text like "2023 May"
+            sort_date = (doc.get('sortpubdate') or '').split(' ')[0]
+            if sort_date:
+                paper['publication_date'] = sort_date.replace('/', '-')
+            elif doc.get('pubdate'):
+                paper['publication_date'] = doc['pubdate']
+            if doc.get('fulljournalname'):
+                paper['journal'] = doc['fulljournalname'].strip()
+            paper['categories'] = []
+            papers.append(paper)
+        return papers
+    except Exception as e:
+        print(f"Error processing PubMed summary response: {e}")
+        return []
+
+def get_papers_from_pubmed(name: str | None = None, school: str | None = None, dedup=None, top_n=None,
+                          level: str = 'full'):
     import requests
     import time
     import xml.etree.ElementTree as ET
@@ -335,6 +1589,11 @@ def get_papers_from_pubmed(name: str | None = None, school: str | None = None):
     if not name:
         print("No author name provided for PubMed search")
         return []
+
+    if dedup is None:
+        dedup = PaperDeduplicator()
+    # top-N pages are deduplicated after parsing, see _collect_page
+    parse_dedup = dedup if top_n is None else None
     
     # NCBI API base URL
     base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
@@ -350,7 +1609,8 @@ def get_papers_from_pubmed(name: str | None = None, school: str | None = None):
         search_strategies.append(f'"{name}"[Author] AND "{school}"[Affiliation]')
         search_strategies.append(f'{name}[Author] AND {school}[Affiliation]')
     
-    all_papers = []
+    pending = []
+    collected = []
     
     for search_query in search_strategies:
         print(f"PubMed search: {search_query}")
@@ -364,9 +1624,13 @@ def get_papers_from_pubmed(name: str | None = None, school: str | None = None):
                 'retmode': 'xml',
                 'usehistory': 'y'
             }
+            if top_n is not None:
+                # newest first, and no more than the top N can use
+                search_params['sort'] = 'pub_date'
+                search_params['retmax'] = min(100, top_n.limit)
             
             search_url = base_url + "esearch.fcgi"  # esearch.fcgi is endpoint for searching PubMed
-            search_response = requests.get(search_url, params=search_params)
+            search_response = http_get(search_url, params=search_params)
             search_response.raise_for_status()
             
             # Parse search results to get PMIDs
@@ -386,6 +1650,9 @@ def get_papers_from_pubmed(name: str | None = None, school: str | None = None):
             
             # Fetch detailed information for each paper
             batch_size = 20
+            if level == 'metadata':
+                # esummary records are small, so fewer, larger batches
+                batch_size = 100
             for i in range(0, len(pmids), batch_size):
                 batch_pmids = pmids[i:i + batch_size]
                 
@@ -397,12 +1664,20 @@ def get_papers_from_pubmed(name: str | None = None, school: str | None = None):
                 }
                 
                 fetch_url = base_url + "efetch.fcgi"
-                fetch_response = requests.get(fetch_url, params=fetch_params)
+                if level == 'metadata':
+                    # summaries only: no abstracts or MeSH lists
+                    fetch_params = {'db': 'pubmed', 'id': ','.join(batch_pmids), 'retmode': 'json'}
+                    fetch_url = base_url + "esummary.fcgi"
+                fetch_response = http_get(fetch_url, params=fetch_params)
                 fetch_response.raise_for_status()
                 
-                # Parse paper details
-                papers = parse_pubmed_response(fetch_response.text, name)
-                all_papers.extend(papers)
+                # Parse paper details (in the parse pool when enabled)
+                page = submit_parse('pubmed', fetch_response.content, name, school, parse_dedup, level,
+                                    {'query': search_query, 'page': i // batch_size + 1})
+                if top_n is None:
+                    pending.append(page)
+                elif _collect_page(page, dedup, top_n, collected):
+                    break
                 
                 # NCBI's rate limiting (3 requests per second)
                 time.sleep(0.35)
@@ -414,41 +1689,10 @@ def get_papers_from_pubmed(name: str | None = None, school: str | None = None):
             print(f"XML Parse Error for PubMed search '{search_query}': {e}")
             continue
     
-    # Remove duplicates based on PMID and DOI
-    unique_papers = []
-    seen_pmids = set()
-    seen_dois = set()
-    
-    for paper in all_papers:
-        is_duplicate = False
-        
-        # Check for PMID duplicates
-        if 'links' in paper and 'pmid' in paper['links']:
-            pmid = paper['links']['pmid']
-            if pmid in seen_pmids:
-                is_duplicate = True
-            else:
-                seen_pmids.add(pmid)
-        
-        # Check for DOI duplicates (if not already marked as duplicate)
-        if not is_duplicate and 'links' in paper and 'doi' in paper['links']:
-            doi = paper['links']['doi']
-            if doi in seen_dois:
-                is_duplicate = True
-            else:
-                seen_dois.add(doi)
-        
-        # Add paper if it's not a duplicate
-        if not is_duplicate:
-            unique_papers.append(paper)
-    
-    # print(f"Total papers found: {len(all_papers)}")
-    # print(f"Total unique PubMed papers found: {len(unique_papers)}")
-    # print(f"PubMed deduplication stats: {len(seen_pmids)} unique PMIDs, {len(seen_dois)} unique DOIs")
-    
-    return unique_papers
+    # duplicates were already dropped while parsing
+    return collected + collect_parsed(pending, dedup)
 
-def parse_doaj_response(data: dict, target_author: str | None = None, target_school: str | None = None):
+def parse_doaj_response(data: dict, target_author: str | None = None, target_school: str | None = None, dedup=None):
     # ================================
     # Example of papers
     # {
@@ -467,6 +1711,8 @@ def parse_doaj_response(data: dict, target_author: str | None = None, target_sch
     # }
     # ================================
     papers = []
+    # "RPI" also matches "Rensselaer Polytechnic Institute", see AffiliationMatcher
+    school_match = school_matcher(target_school)
     
     try:
         for article in data.get('results', []):
@@ -489,7 +1735,7 @@ def parse_doaj_response(data: dict, target_author: str | None = None, target_sch
                         author_found = True
                     
                     # Check if school/affiliation matches
-                    if target_school and target_school.lower() in author_affiliation.lower():
+                    if school_match is not None and school_match.mentions(author_affiliation):
                         school_found = True
             
             # Only process this paper if the target author is found (or if no target specified)
@@ -500,6 +1746,12 @@ def parse_doaj_response(data: dict, target_author: str | None = None, target_sch
             if target_school and not school_found:
                 continue
             
+            # Skip papers already seen from another strategy or source
+            if dedup is not None:
+                doi = next((i.get('id') for i in bibjson.get('identifier', []) if i.get('type') == 'doi'), None)
+                if not dedup.check_and_add(paper_identifiers(doi=doi, doaj_id=article.get('id')), 'doaj'):
+                    continue
+            
             # Extract paper details
             paper = {}
             paper['authors'] = authors
@@ -522,7 +1774,7 @@ def parse_doaj_response(data: dict, target_author: str | None = None, target_sch
             paper['journal'] = journal.get('title', 'No journal')
             
             # Get abstract
-            paper['abstract'] = bibjson.get('abstract', '')
+            paper['abstract'] = normalize_abstract(bibjson.get('abstract', ''))
             
             # Get keywords
             paper['categories'] = bibjson.get('keywords', [])
@@ -557,116 +1809,8 @@ def parse_doaj_response(data: dict, target_author: str | None = None, target_sch
         print(f"Error parsing DOAJ response: {e}")
         return []
 
-def parse_doaj_response(data: dict, target_author: str | None = None, target_school: str | None = None):
-    # ================================
-    # Example of papers
-    # {
-    #     "paper": {
-    #         "title": "Paper Title",
-    #         "authors": [
-    #             {"name": "Author 1", "affiliation": "Affiliation 1"},
-    #             {"name": "Author 2", "affiliation": "Affiliation 2"}
-    #         ],
-    #         "links": { ... },
-    #         "publication_date": "2023-01-01",
-    #         "categories": ["Keyword1", "Keyword2"],
-    #         "journal": "Journal Name",
-    #         "abstract": "Paper abstract text"
-    #     }
-    # }
-    # ================================
-    papers = []
-    
-    try:
-        for article in data.get('results', []):
-            bibjson = article.get('bibjson', {})
-            
-            # Check if the target author is in the authors list
-            authors = []
-            author_found = False
-            school_found = False
-            
-            for author in bibjson.get('author', []):
-                author_name = author.get('name', '').strip()
-                author_affiliation = author.get('affiliation', '').strip()
-                
-                if author_name:
-                    authors.append({"name": author_name, "affiliation": author_affiliation})
-                    
-                    # Check if this author matches our target
-                    if target_author and target_author.lower() in author_name.lower():
-                        author_found = True
-                    
-                    # Check if school/affiliation matches
-                    if target_school and target_school.lower() in author_affiliation.lower():
-                        school_found = True
-            
-            # Only process this paper if the target author is found (or if no target specified)
-            if target_author and not author_found:
-                continue
-            
-            # If school is specified, check if any author has that affiliation
-            if target_school and not school_found:
-                continue
-            
-            # Extract paper details
-            paper = {}
-            paper['authors'] = authors
-            paper['id'] = article.get('id', '')
-            
-            # Get title
-            paper['title'] = bibjson.get('title', 'No title')
-            
-            # Get publication date
-            year = bibjson.get('year', '')
-            month = bibjson.get('month', '')
-            if year:
-                if month:
-                    paper['publication_date'] = f"{year}-{month.zfill(2)}"
-                else:
-                    paper['publication_date'] = year
-            
-            # Get journal information
-            journal = bibjson.get('journal', {})
-            paper['journal'] = journal.get('title', 'No journal')
-            
-            # Get abstract
-            paper['abstract'] = bibjson.get('abstract', '')
-            
-            # Get keywords
-            paper['categories'] = bibjson.get('keywords', [])
-            
-            # Get links
-            links = {}
-            
-            # Get DOI from identifiers
-            for identifier in bibjson.get('identifier', []):
-                if identifier.get('type') == 'doi':
-                    links['doi'] = identifier.get('id', '')
-                elif identifier.get('type') == 'eissn':
-                    links['eissn'] = identifier.get('id', '')
-                elif identifier.get('type') == 'pissn':
-                    links['pissn'] = identifier.get('id', '')
-            
-            # Get fulltext links
-            for link in bibjson.get('link', []):
-                if link.get('type') == 'fulltext':
-                    if link.get('content_type') == 'pdf':
-                        links['pdf'] = link.get('url', '')
-                    else:
-                        links['abstract'] = link.get('url', '')
-            
-            paper['links'] = links
-            
-            papers.append(paper)
-        
-        return papers
-        
-    except Exception as e:
-        print(f"Error parsing DOAJ response: {e}")
-        return []
-
-def get_papers_from_doaj(name: str | None = None, school: str | None = None):
+def get_papers_from_doaj(name: str | None = None, school: str | None = None, dedup=None, top_n=None,
+                        level: str = 'full'):
     import requests
     import urllib.parse
     import time
@@ -674,6 +1818,11 @@ def get_papers_from_doaj(name: str | None = None, school: str | None = None):
     if not name:
         print("No author name provided for DOAJ search")
         return []
+
+    if dedup is None:
+        dedup = PaperDeduplicator()
+    # top-N pages are deduplicated after parsing, see _collect_page
+    parse_dedup = dedup if top_n is None else None
     
     # DOAJ API base URL
     base_url = "https://doaj.org/api/search/articles"
@@ -689,7 +1838,8 @@ def get_papers_from_doaj(name: str | None = None, school: str | None = None):
         search_strategies.append(f'{name} {school}')
         search_strategies.append(f'"{name}" "{school}"')
     
-    all_papers = []
+    pending = []
+    collected = []
     
     for search_query in search_strategies:
         print(f"DOAJ search: {search_query}")
@@ -701,32 +1851,44 @@ def get_papers_from_doaj(name: str | None = None, school: str | None = None):
                 'page': 1,
                 'pageSize': 100  # Maximum page size
             }
+            if top_n is not None:
+                # newest first (by year only), and no more than the top N can use
+                params['sort'] = 'bibjson.year:desc'
+                params['pageSize'] = min(100, top_n.limit)
             
-            response = requests.get(url, params=params)
+            response = http_get(url, params=params)
             response.raise_for_status()
             
-            data = response.json()
+            # the first page tells us how many pages there are
+            first_page = submit_parse('doaj', response.content, name, school, parse_dedup, level,
+                                      {'query': search_query, 'page': 1})
+            total = json_total_results(response.content, 'doaj')
+            if total is None:
+                total = first_page.result()['total'] or 0
             
-            if data.get('total', 0) == 0:
+            if total == 0:
                 print(f"No papers found for search: {search_query}")
                 continue
             
-            print(f"Found {data.get('total', 0)} papers for search: {search_query}")
-            
-            # Parse the results
-            papers = parse_doaj_response(data, name, school)
-            all_papers.extend(papers)
+            print(f"Found {total} papers for search: {search_query}")
+            if top_n is None:
+                pending.append(first_page)
+            elif _collect_page(first_page, dedup, top_n, collected, year_only=True):
+                continue
             
             # Handle pagination if there are more results
-            total_pages = (data.get('total', 0) + 99) // 100  # Ceiling division
+            total_pages = (total + params['pageSize'] - 1) // params['pageSize']  # Ceiling division
             for page in range(2, min(total_pages + 1, 6)):  # Limit to 5 pages max
                 params['page'] = page
-                response = requests.get(base_url, params=params)
+                response = http_get(url, params=params)
                 response.raise_for_status()
                 
-                data = response.json()
-                papers = parse_doaj_response(data, name, school)
-                all_papers.extend(papers)
+                next_page = submit_parse('doaj', response.content, name, school, parse_dedup, level,
+                                         {'query': search_query, 'page': page})
+                if top_n is None:
+                    pending.append(next_page)
+                elif _collect_page(next_page, dedup, top_n, collected, year_only=True):
+                    break
                 
                 # Rate limiting
                 time.sleep(0.1)
@@ -738,40 +1900,14 @@ def get_papers_from_doaj(name: str | None = None, school: str | None = None):
             print(f"Error processing DOAJ search '{search_query}': {e}")
             continue
     
-    # Remove duplicates based on DOI and article ID
-    unique_papers = []
-    seen_dois = set()
-    seen_ids = set()
+    # duplicates were already dropped while parsing
+    papers = collected + collect_parsed(pending, dedup)
     
-    for paper in all_papers:
-        is_duplicate = False
-        
-        # Check for DOI duplicates
-        if 'links' in paper and 'doi' in paper['links']:
-            doi = paper['links']['doi']
-            if doi in seen_dois:
-                is_duplicate = True
-            else:
-                seen_dois.add(doi)
-        
-        # Check for article ID duplicates (if not already marked as duplicate)
-        if not is_duplicate and paper.get('id'):
-            article_id = paper['id']
-            if article_id in seen_ids:
-                is_duplicate = True
-            else:
-                seen_ids.add(article_id)
-        
-        # Add paper if it's not a duplicate
-        if not is_duplicate:
-            unique_papers.append(paper)
+    print(f"Total unique DOAJ papers found: {len(papers)}")
     
-    print(f"Total DOAJ papers found: {len(all_papers)}")
-    print(f"Total unique DOAJ papers found: {len(unique_papers)}")
-    
-    return unique_papers
+    return papers
 
-def parse_zenodo_response(data: dict, target_author: str | None = None, target_school: str | None = None):
+def parse_zenodo_response(data: dict, target_author: str | None = None, target_school: str | None = None, dedup=None):
     # ================================
     # Example of papers
     # {
@@ -790,6 +1926,8 @@ def parse_zenodo_response(data: dict, target_author: str | None = None, target_s
     # }
     # ================================
     papers = []
+    # "RPI" also matches "Rensselaer Polytechnic Institute", see AffiliationMatcher
+    school_match = school_matcher(target_school)
     
     try:
         hits = data.get('hits', {}).get('hits', [])
@@ -855,7 +1993,7 @@ def parse_zenodo_response(data: dict, target_author: str | None = None, target_s
                             if target_author.lower() in author_name.lower():
                                 author_found = True
                 
-                if target_school and target_school.lower() in author_affiliation.lower():
+                if school_match is not None and school_match.mentions(author_affiliation):
                     school_found = True
             
             # only process this paper if the target author is found (or if no target specified)
@@ -866,6 +2004,11 @@ def parse_zenodo_response(data: dict, target_author: str | None = None, target_s
             if target_school and not school_found:
                 continue
             
+            # skip papers already seen from another strategy or source
+            if dedup is not None and not dedup.check_and_add(
+                    paper_identifiers(doi=meta.get('doi'), zenodo_id=record.get('id')), 'zenodo'):
+                continue
+            
             # extract paper details
             paper = {}
             paper['authors'] = authors
@@ -890,9 +2033,7 @@ def parse_zenodo_response(data: dict, target_author: str | None = None, target_s
                 paper['journal'] = 'Zenodo'
             
             # get abstract/description
-            paper['abstract'] = meta.get('description', '')
-            if paper['abstract'] is None:
-                paper['abstract'] = ''
+            paper['abstract'] = normalize_abstract(meta.get('description', ''), markup=True)
             
             # Get keywords/categories
             paper['categories'] = meta.get('keywords', [])
@@ -928,13 +2069,19 @@ def parse_zenodo_response(data: dict, target_author: str | None = None, target_s
         print(f"Error parsing Zenodo response: {e}")
         return []
 
-def get_papers_from_zenodo(name: str | None = None, school: str | None = None):
+def get_papers_from_zenodo(name: str | None = None, school: str | None = None, dedup=None, top_n=None,
+                          level: str = 'full'):
     import requests
     import time
     
     if not name:
         print("No author name provided for Zenodo search")
         return []
+
+    if dedup is None:
+        dedup = PaperDeduplicator()
+    # top-N pages are deduplicated after parsing, see _collect_page
+    parse_dedup = dedup if top_n is None else None
     
     # Zenodo API base URL
     base_url = "https://zenodo.org/api/records"
@@ -951,7 +2098,8 @@ def get_papers_from_zenodo(name: str | None = None, school: str | None = None):
         search_strategies.append(f'metadata.creators.person_or_org.name:"{name}" AND metadata.creators.person_or_org.affiliation:"{school}"')
         search_strategies.append(f'"{name}" "{school}"')
     
-    all_papers = []
+    pending = []
+    collected = []
     
     for search_query in search_strategies:
         print(f"Zenodo search: {search_query}")
@@ -964,38 +2112,44 @@ def get_papers_from_zenodo(name: str | None = None, school: str | None = None):
                 'page': 1,
                 'sort': 'mostrecent',
             }
+            if top_n is not None:
+                # already newest first, just don't fetch more than the top N can use
+                params['size'] = min(100, top_n.limit)
+            
+            response = http_get(base_url, params=params)
+            response.raise_for_status()
             
-            for page in range(1, 6):  # get top 5 pages
+            # the first page tells us how many pages there are
+            first_page = submit_parse('zenodo', response.content, name, school, parse_dedup, level,
+                                      {'query': search_query, 'page': 1})
+            total = json_total_results(response.content, 'zenodo')
+            if total is None:
+                total = first_page.result()['total'] or 0
+            print(f"Total hits: {total}")
+            
+            if total == 0:
+                print(f"No papers found for search: {search_query}")
+                continue
+            if top_n is None:
+                pending.append(first_page)
+            elif _collect_page(first_page, dedup, top_n, collected):
+                continue
+            
+            total_pages = (total + params['size'] - 1) // params['size']  # ceiling division
+            for page in range(2, min(total_pages + 1, 6)):  # get top 5 pages
+                # rate limiting
+                time.sleep(0.1)
+                
                 params['page'] = page
-                response = requests.get(base_url, params=params)
+                response = http_get(base_url, params=params)
                 response.raise_for_status()
                 
-                data = response.json()
-                
-                # debug: print response structure
-                if page == 1:
-                    print(f"Zenodo API response keys: {list(data.keys())}")
-                    if 'hits' in data:
-                        print(f"Hits keys: {list(data['hits'].keys())}")
-                        print(f"Total hits: {data['hits'].get('total', 0)}")
-                
-                # parse the results
-                papers = parse_zenodo_response(data, name, school)
-                all_papers.extend(papers)
-                
-                # check if we need to continue to next page
-                hits = data.get('hits', {}).get('hits', [])
-                if not hits:
-                    if page == 1:
-                        print(f"No papers found for search: {search_query}")
+                next_page = submit_parse('zenodo', response.content, name, school, parse_dedup, level,
+                                         {'query': search_query, 'page': page})
+                if top_n is None:
+                    pending.append(next_page)
+                elif _collect_page(next_page, dedup, top_n, collected):
                     break
-                
-                # if less than 100 results, no more pages
-                if len(hits) < 100:
-                    break
-                
-                # rate limiting
-                time.sleep(0.1)
             
         except requests.exceptions.RequestException as e:
             print(f"HTTP Error for Zenodo search '{search_query}': {e}")
@@ -1004,40 +2158,14 @@ def get_papers_from_zenodo(name: str | None = None, school: str | None = None):
             print(f"Error processing Zenodo search '{search_query}': {e}")
             continue
     
-    # remove duplicates based on DOI and record ID
-    unique_papers = []
-    seen_dois = set()
-    seen_ids = set()
-    
-    for paper in all_papers:
-        is_duplicate = False
-        
-        # check for DOI duplicates
-        if 'links' in paper and 'doi' in paper['links']:
-            doi = paper['links']['doi']
-            if doi in seen_dois:
-                is_duplicate = True
-            else:
-                seen_dois.add(doi)
-        
-        # check for record ID duplicates (if not already marked as duplicate)
-        if not is_duplicate and paper.get('id'):
-            recid = paper['id']
-            if recid in seen_ids:
-                is_duplicate = True
-            else:
-                seen_ids.add(recid)
-        
-        # add paper if it's not a duplicate
-        if not is_duplicate:
-            unique_papers.append(paper)
+    # duplicates were already dropped while parsing
+    papers = collected + collect_parsed(pending, dedup)
     
-    print(f"Total Zenodo papers found: {len(all_papers)}")
-    print(f"Total unique Zenodo papers found: {len(unique_papers)}")
+    print(f"Total unique Zenodo papers found: {len(papers)}")
     
-    return unique_papers
+    return papers
 
-def parse_crossref_response(data: dict, target_author: str | None = None, target_school: str | None = None):
+def parse_crossref_response(data: dict, target_author: str | None = None, target_school: str | None = None, dedup=None):
     # ================================
     # Example of papers
     # {
@@ -1056,6 +2184,8 @@ def parse_crossref_response(data: dict, target_author: str | None = None, target
     # }
     # ================================
     papers = []
+    # "RPI" also matches "Rensselaer Polytechnic Institute", see AffiliationMatcher
+    school_match = school_matcher(target_school)
     
     try:
         items = data.get('message', {}).get('items', [])
@@ -1142,7 +2272,7 @@ def parse_crossref_response(data: dict, target_author: str | None = None, target
                                     author_found = True
                     
                     # check if school/affiliation matches
-                    if target_school and target_school.lower() in author_affiliation.lower():
+                    if school_match is not None and school_match.mentions(author_affiliation):
                         school_found = True
             
             # only process this paper if the target author is found (or if no target specified)
@@ -1153,6 +2283,10 @@ def parse_crossref_response(data: dict, target_author: str | None = None, target
             if target_school and not school_found:
                 continue
             
+            # skip papers already seen from another source
+            if dedup is not None and not dedup.check_and_add(paper_identifiers(doi=item.get('DOI')), 'crossref'):
+                continue
+            
             # extract paper details
             paper = {}
             paper['authors'] = authors
@@ -1164,8 +2298,11 @@ def parse_crossref_response(data: dict, target_author: str | None = None, target
                     title_parts.append(title.strip())
             paper['title'] = ' '.join(title_parts) if title_parts else 'No title'
             
-            # get publication date
-            pub_date = item.get('published-print', {}).get('date-parts', [[]])[0]
+            # get publication date: 'published' (earliest of print and
+            # online) is what sort=published orders by
+            pub_date = next((item[field].get('date-parts', [[]])[0]
+                             for field in ('published', 'published-online', 'published-print')
+                             if item.get(field, {}).get('date-parts', [[]])[0]), [])
             if pub_date:
                 if len(pub_date) >= 3:
                     paper['publication_date'] = f"{pub_date[0]}-{str(pub_date[1]).zfill(2)}-{str(pub_date[2]).zfill(2)}"
@@ -1181,7 +2318,7 @@ def parse_crossref_response(data: dict, target_author: str | None = None, target
             # get abstract
             abstract = item.get('abstract', '')
             if abstract:
-                paper['abstract'] = abstract.strip()
+                paper['abstract'] = normalize_abstract(abstract, markup=True)
             else:
                 paper['abstract'] = ''
             
@@ -1215,13 +2352,21 @@ def parse_crossref_response(data: dict, target_author: str | None = None, target
         print(f"Error parsing Crossref response: {e}")
         return []
 
-def get_papers_from_crossref(name: str | None = None, school: str | None = None):
+CROSSREF_METADATA_FIELDS = "DOI,title,author,published,published-online,published-print,container-title,subject,link"
+
+def get_papers_from_crossref(name: str | None = None, school: str | None = None, dedup=None, top_n=None,
+                            level: str = 'full'):
     import requests
     import urllib.parse
     
     if not name:
         print("No author name provided for Crossref search")
         return []
+
+    if dedup is None:
+        dedup = PaperDeduplicator()
+    # top-N pages are deduplicated after parsing, see _collect_page
+    parse_dedup = dedup if top_n is None else None
     
     # crossref API base URL
     base_url = "https://api.crossref.org/works"
@@ -1234,13 +2379,23 @@ def get_papers_from_crossref(name: str | None = None, school: str | None = None)
     try:
         # make the API request
         url = f"{base_url}?query.author={search_query}"
-        response = requests.get(url)
+        if top_n is not None:
+            # newest first, and no more than the top N can use
+            url += f"&sort=published&order=desc&rows={min(1000, top_n.limit)}"
+        if level == 'metadata':
+            # only the fields parse_crossref_response reads, minus the abstract
+            url += f"&select={CROSSREF_METADATA_FIELDS}"
+        response = http_get(url)
         response.raise_for_status()
         
-        data = response.json()
-        
-        # parse the results
-        papers = parse_crossref_response(data, name, school)
+        # parse the results (in the parse pool when enabled)
+        page = submit_parse('crossref', response.content, name, school, parse_dedup, level,
+                            {'query': f"query.author={search_query}", 'page': 1})
+        if top_n is None:
+            papers = collect_parsed([page], dedup)
+        else:
+            papers = []
+            _collect_page(page, dedup, top_n, papers)
         
         print(f"Found {len(papers)} papers from Crossref")
         return papers
@@ -1250,4 +2405,2516 @@ def get_papers_from_crossref(name: str | None = None, school: str | None = None)
         return []
     except Exception as e:
         print(f"Error processing Crossref search: {e}")
-        return []
\ No newline at end of file
+        return []
+
+# ================================
+# Department sweep
+# ================================
+# Harvesting a roster one person at a time makes sources x strategies
+# requests per person. sweep_department() packs several authors into each
+# query instead ("A"[Author] OR "B"[Author] ... plus an affiliation clause),
+# parses the pages without an author filter and routes every paper back to
+# each roster member named on it.
+#
+# Crossref has no boolean author search, so its packed query is a relevance
+# query over all the names, with the routing step doing the filtering.
+# ================================
+SWEEP_MAX_QUERY_LENGTH = 1500  # characters of packed author terms per query
+SWEEP_MAX_AUTHORS = 10
+SWEEP_RESULTS_PER_AUTHOR = 100
+# sources whose per-person harvest keeps only papers naming the school
+SWEEP_SCHOOL_FILTERED_SOURCES = ('doaj', 'zenodo', 'crossref')
+
+def pack_author_terms(names: list, format_term, joiner: str = ' OR ', max_length: int = SWEEP_MAX_QUERY_LENGTH,
+                      max_authors: int = SWEEP_MAX_AUTHORS):
+    # returns [(names, query)] with each query under max_length characters
+    batches = []
+    batch, terms = [], []
+    for name in names:
+        term = format_term(name)
+        if terms and (len(terms) >= max_authors or len(joiner.join(terms + [term])) > max_length):
+            batches.append((batch, joiner.join(terms)))
+            batch, terms = [], []
+        batch.append(name)
+        terms.append(term)
+    if terms:
+        batches.append((batch, joiner.join(terms)))
+    return batches
+
+def _author_route_keys(name: str, roster: bool = False):
+    # ('name', first, last) for full names, ('initial', last, first initial)
+    # for "Yan P" / "P. Yan". Roster members get both so abbreviated author
+    # lists still route to them; full author names only match full names
+    parts = normalize_author_name(name).split()
+    if len(parts) < 2:
+        return []
+    if roster:
+        return [('name', parts[0], parts[-1]), ('initial', parts[-1], parts[0][0])]
+    if len(parts[-1]) == 1:
+        return [('initial', ' '.join(parts[:-1]), parts[-1])]
+    if len(parts[0]) == 1:
+        return [('initial', parts[-1], parts[0])]
+    # "Yan Pingkun" without a comma could be either order
+    return [('name', parts[0], parts[-1]), ('name', parts[-1], parts[0])]
+
+def build_roster_index(names: list):
+    index = collections.defaultdict(list)
+    for name in names:
+        for key in _author_route_keys(name, roster=True):
+            if name not in index[key]:
+                index[key].append(name)
+    return index
+
+def route_paper(paper: dict, index: dict):
+    # roster members named on the paper, in author order
+    members = []
+    for author in paper.get('authors', []):
+        author_name = author.get('name', '') if isinstance(author, dict) else author
+        for key in _author_route_keys(author_name):
+            for name in index.get(key, ()):
+                if name not in members:
+                    members.append(name)
+    return members
+
+def sweep_department(names: list, school: str | None = None, level: str = 'full'):
+    # returns {name: papers} for the whole roster. Roster entries are a name
+    # or a (name, school) pair; members without one are at `school`. Members
+    # are queried together per school, and each paper's affiliations are
+    # scanned once for every roster institution, so a paper found through one
+    # school's query still reaches a coauthor listed under another. Papers
+    # found by several sources are kept once per member, as in get_papers
+    members = {}
+    for entry in names:
+        name, member_school = (entry, school) if isinstance(entry, str) else entry
+        if name and name.strip():
+            members.setdefault(name.strip(), member_school)
+    names = list(members)
+    index = build_roster_index(names)
+    results = {name: [] for name in names}
+    dedups = {name: PaperDeduplicator() for name in names}
+    groups = collections.defaultdict(list)
+    for name, member_school in members.items():
+        groups[member_school].append(name)
+    roster_match = affiliation_matcher(tuple(sorted({s for s in members.values() if s})))
+    institutions = {name: resolve_institution(s) if s else None for name, s in members.items()}
+    requests_made = [0]
+
+    def get(url, params=None):
+        requests_made[0] += 1
+        response = http_get(url, params=params)
+        response.raise_for_status()
+        return response
+
+    sweeps = {
+        'arxiv': _sweep_arxiv,
+        'pubmed': _sweep_pubmed,
+        'doaj': _sweep_doaj,
+        'zenodo': _sweep_zenodo,
+        'crossref': _sweep_crossref,
+    }
+    for source in PAPER_SOURCES:
+        pages = []
+        for group_school, group in groups.items():
+            try:
+                pages.extend(sweeps[source](group, group_school, level, get))
+            except Exception as e:
+                print(f"Error sweeping {source}: {e}")
+        for paper in collect_parsed(pages):
+            mentioned = None
+            for name in route_paper(paper, index):
+                # the sources whose per-person parsers filter by school
+                if institutions[name] and source in SWEEP_SCHOOL_FILTERED_SOURCES:
+                    if mentioned is None:
+                        mentioned = paper_institutions(paper, roster_match)
+                    if institutions[name] not in mentioned:
+                        continue
+                if dedups[name].add_paper(paper, source):
+                    results[name].append(paper)
+
+    print(f"Department sweep: {requests_made[0]} requests for {len(names)} people")
+    return results
+
+def _sweep_arxiv(names: list, school: str | None, level: str, get):
+    # arXiv rarely has affiliations, so no affiliation clause here
+    pages = []
+    for batch, query in pack_author_terms(names, lambda name: f'au:"{name}"'):
+        print(f"Sweep search: {query}")
+        arxiv_throttle()
+        response = get(ARXIV_API, params={
+            'search_query': query,
+            'max_results': min(2000, SWEEP_RESULTS_PER_AUTHOR * len(batch)),
+        })
+        pages.append(submit_parse('arxiv', response.content, level=level, archive_meta={'query': query, 'page': 1}))
+    return pages
+
+def _sweep_pubmed(names: list, school: str | None, level: str, get):
+    import time
+    import xml.etree.ElementTree as ET
+
+    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+    pages = []
+    for batch, query in pack_author_terms(names, lambda name: f'"{name}"[Author]'):
+        term = f'({query}) AND "{school}"[Affiliation]' if school else query
+        print(f"Sweep PubMed search: {term}")
+        search_response = get(base_url + "esearch.fcgi", params={
+            'db': 'pubmed',
+            'term': term,
+            'retmax': min(10000, SWEEP_RESULTS_PER_AUTHOR * len(batch)),
+            'retmode': 'xml',
+        })
+        pmids = [id_elem.text for id_elem in ET.fromstring(search_response.text).findall('.//Id') if id_elem.text]
+
+        # efetch/esummary take a couple of hundred IDs per GET
+        batch_size = 200
+        for i in range(0, len(pmids), batch_size):
+            fetch_params = {'db': 'pubmed', 'id': ','.join(pmids[i:i + batch_size]), 'retmode': 'xml',
+                            'rettype': 'abstract'}
+            fetch_url = base_url + "efetch.fcgi"
+            if level == 'metadata':
+                fetch_params = {'db': 'pubmed', 'id': fetch_params['id'], 'retmode': 'json'}
+                fetch_url = base_url + "esummary.fcgi"
+            fetch_response = get(fetch_url, params=fetch_params)
+            pages.append(submit_parse('pubmed', fetch_response.content, level=level,
+                                      archive_meta={'query': term, 'page': i // batch_size + 1}))
+            # NCBI's rate limiting (3 requests per second)
+            time.sleep(0.35)
+    return pages
+
+def _sweep_paged(source: str, url: str, params: dict, size_param: str, query: str, level: str, get,
+                 max_pages: int):
+    # DOAJ and Zenodo: the first page gives the total, then page through it
+    import time
+
+    pages = []
+    page_number = 1
+    while True:
+        params['page'] = page_number
+        response = get(url, params=params)
+        # schools are checked when papers are routed, see sweep_department
+        page = submit_parse(source, response.content, None, None, None, level, {'query': query, 'page': page_number})
+        pages.append(page)
+        total = page.result()['total'] or 0
+        if page_number * params[size_param] >= total or page_number >= max_pages:
+            return pages
+        page_number += 1
+        # rate limiting
+        time.sleep(0.1)
+
+def _sweep_doaj(names: list, school: str | None, level: str, get):
+    import urllib.parse
+
+    pages = []
+    for batch, query in pack_author_terms(names, lambda name: f'bibjson.author.name:"{name}"'):
+        print(f"Sweep DOAJ search: {query}")
+        url = f"https://doaj.org/api/search/articles/{urllib.parse.quote(f'({query})')}"
+        # same page cap per person as get_papers_from_doaj
+        pages.extend(_sweep_paged('doaj', url, {'pageSize': 100}, 'pageSize', query, level, get,
+                                  max_pages=5 * len(batch)))
+    return pages
+
+def _sweep_zenodo(names: list, school: str | None, level: str, get):
+    pages = []
+    for batch, query in pack_author_terms(names, lambda name: f'metadata.creators.person_or_org.name:"{name}"'):
+        print(f"Sweep Zenodo search: {query}")
+        params = {'q': query, 'size': 100, 'sort': 'mostrecent'}
+        pages.extend(_sweep_paged('zenodo', "https://zenodo.org/api/records", params, 'size', query, level, get,
+                                  max_pages=5 * len(batch)))
+    return pages
+
+def _sweep_crossref(names: list, school: str | None, level: str, get):
+    pages = []
+    for batch, query in pack_author_terms(names, lambda name: name, joiner=' '):
+        print(f"Sweep Crossref search: query.author={query}")
+        params = {'query.author': query, 'rows': min(1000, SWEEP_RESULTS_PER_AUTHOR * len(batch))}
+        if school:
+            params['query.affiliation'] = school
+        if level == 'metadata':
+            params['select'] = CROSSREF_METADATA_FIELDS
+        response = get("https://api.crossref.org/works", params=params)
+        pages.append(submit_parse('crossref', response.content, None, None, None, level,
+                                  {'query': f"query.author={query}", 'page': 1}))
+    return pages
+
+# ================================
+# Abstract hydration
+# ================================
+# metadata-only harvests leave abstracts out. hydrate_abstracts() fetches
+# them later for just the papers that need one: batched by PMID, arXiv ID
+# and DOI where the API allows it, one record at a time for DOAJ and Zenodo.
+# ================================
+def hydrate_abstracts(papers: list, batch_size: int = 100):
+    # fills in paper['abstract'] in place and returns the papers
+    pending = [paper for paper in papers if not paper.get('hydrated', True)]
+    if not pending:
+        return papers
+
+    by_source = collections.defaultdict(list)
+    for paper in pending:
+        by_source[paper.get('source')].append(paper)
+
+    fetchers = {
+        'pubmed': (lambda paper: paper.get('links', {}).get('pmid'), _fetch_pubmed_abstracts),
+        'arxiv': (lambda paper: paper.get('links', {}).get('arxiv_id'), _fetch_arxiv_abstracts),
+        'crossref': (lambda paper: canonical_doi(paper.get('links', {}).get('doi')), _fetch_crossref_abstracts),
+        'doaj': (lambda paper: paper.get('id'), _fetch_doaj_abstracts),
+        'zenodo': (lambda paper: paper.get('id'), _fetch_zenodo_abstracts),
+    }
+    for source, source_papers in by_source.items():
+        if source not in fetchers:
+            continue
+        paper_key, fetch = fetchers[source]
+        keys = list(dict.fromkeys(k for k in map(paper_key, source_papers) if k is not None and k != ''))
+        abstracts = {}
+        for i in range(0, len(keys), batch_size):
+            try:
+                abstracts.update(fetch(keys[i:i + batch_size]))
+            except Exception as e:
+                print(f"Error hydrating {source} abstracts: {e}")
+        for paper in source_papers:
+            key = paper_key(paper)
+            if key in abstracts:
+                paper['abstract'] = abstracts[key]
+                paper['hydrated'] = True
+    return papers
+
+def _fetch_pubmed_abstracts(pmids: list):
+    response = http_get("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi",
+                        params={'db': 'pubmed', 'id': ','.join(pmids), 'retmode': 'xml', 'rettype': 'abstract'})
+    response.raise_for_status()
+    return {paper['links']['pmid']: paper.get('abstract', '')
+            for paper in parse_pubmed_response(response.content) if 'links' in paper}
+
+def _fetch_arxiv_abstracts(arxiv_ids: list):
+    return {paper['links']['arxiv_id']: paper.get('abstract', '')
+            for paper in refresh_arxiv_papers(arxiv_ids) if 'links' in paper}
+
+def _fetch_crossref_abstracts(dois: list):
+    # one filtered query per batch, selecting only the abstract
+    abstracts = {doi: '' for doi in dois}
+    response = http_get("https://api.crossref.org/works", params={
+        'filter': ','.join(f"doi:{doi}" for doi in dois),
+        'select': 'DOI,abstract',
+        'rows': len(dois),
+    })
+    response.raise_for_status()
+    data = decode_json_response(response.content, 'crossref')
+    for item in data.get('message', {}).get('items', []):
+        doi = canonical_doi(item.get('DOI'))
+        if doi in abstracts:
+            abstracts[doi] = normalize_abstract(item.get('abstract', ''), markup=True)
+    return abstracts
+
+def _fetch_doaj_abstracts(article_ids: list):
+    # one request per record; a failed record is skipped, not the batch
+    import requests
+
+    abstracts = {}
+    for article_id in article_ids:
+        try:
+            response = http_get(f"https://doaj.org/api/articles/{article_id}")
+            response.raise_for_status()
+            data = response.json()
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"HTTP Error for DOAJ article {article_id}: {e}")
+            continue
+        abstracts[article_id] = normalize_abstract((data.get('bibjson') or {}).get('abstract', ''))
+    return abstracts
+
+def _fetch_zenodo_abstracts(record_ids: list):
+    import requests
+
+    abstracts = {}
+    for record_id in record_ids:
+        try:
+            response = http_get(f"https://zenodo.org/api/records/{record_id}")
+            response.raise_for_status()
+            data = response.json()
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"HTTP Error for Zenodo record {record_id}: {e}")
+            continue
+        abstracts[record_id] = normalize_abstract((data.get('metadata') or {}).get('description', ''), markup=True)
+    return abstracts
+
+# ================================
+# Abstract normalization
+# ================================
+# Crossref abstracts are JATS XML, Zenodo descriptions are HTML, DOAJ and
+# arXiv are plain text with stray line breaks. For markup sources
+# normalize_abstract(text, markup=True) strips the tags, decodes entities and
+# folds whitespace in a single regex pass, and memoizes results by content
+# hash since the same abstract shows up from several sources and strategies.
+# Plain text only has its whitespace folded: a "<" there is a less-than sign
+# (or LaTeX), not a tag.
+# ================================
+# block-level tags become a space, inline ones (<i>, <sup>, ...) disappear so
+# "CO<sub>2</sub>" stays "CO2"; a closing section title becomes ": "
+_BLOCK_TAGS = frozenset(
+    'p div br li ul ol sec title abstract table tr td th h1 h2 h3 h4 h5 h6 blockquote list list-item label'.split()
+)
+_ABSTRACT_TOKEN_RE = re.compile(
+    r'(?P<gap>(?:\s|<!--(?s:.*?)-->|<[/!?]?[A-Za-z][^<>]*>)+)|(?P<entity>&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);)'
+)
+_TAG_RE = re.compile(r'<(/?)\s*(?:[\w.-]+:)?([\w.-]+)')
+_ABSTRACT_CACHE_SIZE = 50000
+
+_abstract_cache = collections.OrderedDict()
+_abstract_cache_lock = threading.Lock()
+
+def _abstract_token(match):
+    import html
+
+    gap = match.group('gap')
+    if gap is None:
+        text = html.unescape(match.group('entity'))
+        return ' ' if text.isspace() else text
+    if '<' not in gap:
+        return ' '
+    replacement = ' ' if gap[0].isspace() or gap[-1].isspace() else ''
+    for closing, tag in _TAG_RE.findall(gap):
+        tag = tag.lower()
+        if tag == 'title' and closing:
+            return ': '
+        if tag in _BLOCK_TAGS:
+            replacement = ' '
+    return replacement
+
+def normalize_abstract(text: str | None, markup: bool = False):
+    import hashlib
+
+    if not text:
+        return ''
+    if not markup:
+        return ' '.join(text.split())
+    key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    with _abstract_cache_lock:
+        cached = _abstract_cache.get(key)
+        if cached is not None:
+            _abstract_cache.move_to_end(key)
+            return cached
+
+    normalized = _ABSTRACT_TOKEN_RE.sub(_abstract_token, text).strip()
+    # Crossref abstracts usually open with a redundant "Abstract" title
+    if normalized[:10].lower() == 'abstract: ':
+        normalized = normalized[10:]
+
+    with _abstract_cache_lock:
+        _abstract_cache[key] = normalized
+        if len(_abstract_cache) > _ABSTRACT_CACHE_SIZE:
+            _abstract_cache.popitem(last=False)
+    return normalized
+
+# ================================
+# Citation counts
+# ================================
+# Fills in paper['citation_count'] for a whole harvest with as few requests as
+# possible: one Semantic Scholar batch lookup per 500 IDs (DOI, arXiv ID or
+# PMID), then one Crossref filter=doi:... query per batch of DOIs that are
+# still missing. Counts are cached with a TTL so re-runs only ask for new or
+# expired papers. Base URLs can point at a local stand-in server for tests.
+# ================================
+SEMANTIC_SCHOLAR_API = "https://api.semanticscholar.org/graph/v1"
+CROSSREF_API = "https://api.crossref.org"
+CITATION_CACHE_TTL = 7 * 24 * 3600
+
+_citation_cache = {}
+_citation_cache_lock = threading.Lock()
+
+def paper_citation_ids(paper: dict):
+    # Semantic Scholar style IDs, most reliable first
+    links = paper.get('links') or {}
+    ids = []
+    if canonical_doi(links.get('doi')):
+        ids.append(f"DOI:{canonical_doi(links['doi'])}")
+    if canonical_arxiv_id(links.get('arxiv_id')):
+        ids.append(f"ARXIV:{canonical_arxiv_id(links['arxiv_id'])}")
+    if links.get('pmid'):
+        ids.append(f"PMID:{links['pmid']}")
+    return ids
+
+def enrich_citation_counts(papers: list, s2_base_url: str = SEMANTIC_SCHOLAR_API,
+                           crossref_base_url: str = CROSSREF_API, ttl: float = CITATION_CACHE_TTL,
+                           s2_batch_size: int = 500, crossref_batch_size: int = 50):
+    import time
+
+    now = time.time()
+    # dict as an ordered set
+    wanted = {}
+    for paper in papers:
+        wanted.update(dict.fromkeys(paper_citation_ids(paper)))
+    with _citation_cache_lock:
+        missing = [i for i in wanted if i not in _citation_cache or now - _citation_cache[i][2] > ttl]
+
+    requests_made = 0
+    found = {}
+    for start in range(0, len(missing), s2_batch_size):
+        batch = missing[start:start + s2_batch_size]
+        requests_made += 1
+        found.update(_fetch_s2_citation_counts(batch, s2_base_url))
+
+    dois = [i[len('DOI:'):] for i in missing if i.startswith('DOI:') and i not in found]
+    for start in range(0, len(dois), crossref_batch_size):
+        batch = dois[start:start + crossref_batch_size]
+        requests_made += 1
+        found.update(_fetch_crossref_citation_counts(batch, crossref_base_url))
+
+    with _citation_cache_lock:
+        for paper_id in missing:
+            # remember misses too, so unknown papers are not asked for again until the TTL runs out
+            count, source = found.get(paper_id, (None, None))
+            _citation_cache[paper_id] = (count, source, now)
+        cached = {i: _citation_cache[i] for i in wanted}
+
+    enriched = 0
+    for paper in papers:
+        for paper_id in paper_citation_ids(paper):
+            count, source, _ = cached[paper_id]
+            if count is not None:
+                paper['citation_count'] = count
+                paper['citation_source'] = source
+                enriched += 1
+                break
+    return {'requests': requests_made, 'enriched': enriched, 'papers': len(papers)}
+
+def _fetch_s2_citation_counts(paper_ids: list, base_url: str):
+    import requests
+
+    # a POST, so not through http_get, but under the same lookup deadline
+    url = f"{base_url}/paper/batch"
+    try:
+        response = requests.post(url, params={'fields': 'citationCount'}, json={'ids': paper_ids},
+                                 timeout=lookup_request_timeout(f"POST {url}"))
+        response.raise_for_status()
+        results = response.json()
+    except requests.exceptions.Timeout as e:
+        _mark_source_incomplete()
+        print(f"HTTP Error for Semantic Scholar batch lookup: {e}")
+        return {}
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"HTTP Error for Semantic Scholar batch lookup: {e}")
+        return {}
+    if not isinstance(results, list):
+        # an error object such as {"error": ...}
+        print(f"Unexpected Semantic Scholar batch response: {str(results)[:200]}")
+        return {}
+
+    # results line up with the requested IDs, null for unknown papers
+    counts = {}
+    for paper_id, result in zip(paper_ids, results):
+        if isinstance(result, dict) and result.get('citationCount') is not None:
+            counts[paper_id] = (result['citationCount'], 'semantic_scholar')
+    return counts
+
+def _fetch_crossref_citation_counts(dois: list, base_url: str):
+    import requests
+
+    params = {
+        'filter': ','.join(f"doi:{doi}" for doi in dois),
+        'select': 'DOI,is-referenced-by-count',
+        'rows': len(dois),
+    }
+    try:
+        response = http_get(f"{base_url}/works", params=params)
+        response.raise_for_status()
+        items = response.json().get('message', {}).get('items', [])
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"HTTP Error for Crossref citation lookup: {e}")
+        return {}
+
+    counts = {}
+    for item in items:
+        if item.get('DOI') and item.get('is-referenced-by-count') is not None:
+            counts[f"DOI:{item['DOI'].lower()}"] = (item['is-referenced-by-count'], 'crossref')
+    return counts
+
+# ================================
+# Affiliation matching
+# ================================
+# Affiliations name the same school many ways ("RPI", "Rensselaer Polytech.
+# Inst.", "Rensselaer Polytechnic Institute, Troy NY"). An
+# AffiliationMatcher compiles every alias of the schools it is given into one
+# Aho-Corasick automaton over normalized words, scans each affiliation string
+# once and reports every school it mentions. Results are memoized per string
+# in one bounded cache shared by all matchers, since a batch run sees the same
+# affiliations thousands of times.
+#
+# Acronyms that several schools go by (USC is also South Carolina, CMU also
+# Central Michigan and China Medical University, RIT also KTH) are only
+# listed with a qualifier; a bare one would match the other schools too.
+# ================================
+AFFILIATION_CACHE_SIZE = 100000
+
+INSTITUTION_ALIASES = {
+    'Rensselaer Polytechnic Institute': ('RPI', 'Rensselaer', 'Rensselaer Polytech Inst'),
+    'Massachusetts Institute of Technology': ('MIT', 'Mass Inst Technol'),
+    'California Institute of Technology': ('Caltech', 'Calif Inst Technol'),
+    'Carnegie Mellon University': ('Carnegie Mellon', 'CMU Pittsburgh'),
+    'Georgia Institute of Technology': ('Georgia Tech', 'Georgia Inst Technol'),
+    'University of California, Berkeley': ('UC Berkeley', 'Univ Calif Berkeley'),
+    'University of California, Los Angeles': ('UCLA', 'Univ Calif Los Angeles'),
+    'University of Michigan': ('UMich', 'Univ Michigan'),
+    'University of Pennsylvania': ('UPenn', 'Univ Penn', 'Univ Pennsylvania'),
+    'University of Southern California': ('Univ So Calif', 'USC Los Angeles', 'USC Viterbi', 'USC Keck'),
+    'New York University': ('NYU',),
+    'Stanford University': ('Stanford', 'Stanford Univ'),
+    'Harvard University': ('Harvard', 'Harvard Univ', 'Harvard Medical School'),
+    'Johns Hopkins University': ('JHU', 'Johns Hopkins'),
+    'Rochester Institute of Technology': ('Rochester Inst Technol', 'RIT Rochester'),
+    'State University of New York at Albany': ('SUNY Albany', 'University at Albany', 'UAlbany'),
+}
+
+def normalize_affiliation(text: str):
+    # lowercase words without accents or punctuation, padded with spaces so
+    # patterns only match whole words
+    import unicodedata
+
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return f" {' '.join(re.findall(r'[a-z0-9]+', text.lower()))} "
+
+def resolve_institution(school: str):
+    # canonical name for a school given by name or alias
+    key = normalize_affiliation(school)
+    for institution, aliases in INSTITUTION_ALIASES.items():
+        if key == normalize_affiliation(institution) or any(key == normalize_affiliation(a) for a in aliases):
+            return institution
+    return ' '.join((school or '').split())
+
+class AffiliationMatcher:
+    def __init__(self, schools):
+        # goto[state] maps a character to the next state; out[state] holds the
+        # institutions whose pattern ends there
+        self.institutions = list(dict.fromkeys(resolve_institution(school) for school in schools if school))
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [set()]
+        for institution in self.institutions:
+            for pattern in (institution, *INSTITUTION_ALIASES.get(institution, ())):
+                pattern = normalize_affiliation(pattern)
+                if pattern.strip():
+                    self._add_pattern(pattern, institution)
+        self._link()
+
+    def _add_pattern(self, pattern: str, institution: str):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = self.goto[state][char] = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(set())
+            state = next_state
+        self.out[state].add(institution)
+
+    def _link(self):
+        # breadth-first fail links; each state also reports what its fail
+        # state reports, so a scan never has to walk the fail chain for output
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.out[next_state] |= self.out[self.fail[next_state]]
+
+    def _scan(self, affiliation: str):
+        # every institution mentioned in the affiliation, in table order
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        state = 0
+        for char in normalize_affiliation(affiliation):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+        return tuple(institution for institution in self.institutions if institution in found)
+
+    def match(self, affiliation: str):
+        return _scan_affiliation(self, affiliation)
+
+    def mentions(self, affiliation: str):
+        return bool(affiliation) and bool(self.match(affiliation))
+
+@functools.lru_cache(maxsize=AFFILIATION_CACHE_SIZE)
+def _scan_affiliation(matcher: AffiliationMatcher, affiliation: str):
+    return matcher._scan(affiliation)
+
+def paper_institutions(paper: dict, matcher: AffiliationMatcher):
+    # every institution of the matcher named in any author's affiliation
+    found = set()
+    for author in paper.get('authors') or []:
+        if isinstance(author, dict) and author.get('affiliation'):
+            found.update(matcher.match(author['affiliation']))
+    return found
+
+@functools.lru_cache(maxsize=256)
+def affiliation_matcher(schools: tuple):
+    # shared matcher (and its memo) for a set of schools
+    return AffiliationMatcher(schools)
+
+def school_matcher(school: str | None):
+    return affiliation_matcher((school,)) if school else None
+
+# ================================
+# Author disambiguation
+# ================================
+# Name matching in the parsers accepts any author with the requested name, so
+# homonyms end up in the results. Papers are linked into clusters when they
+# share enough evidence about the requested author (coauthors, their
+# affiliation, venue, categories), and only the clusters anchored by the
+# requested school are kept.
+#
+# Each paper is scored only against the clusters that own one of its features
+# (every cluster that has the feature, kept as union-find roots), so adding
+# papers is near-linear and can be done incrementally.
+# ================================
+DISAMBIGUATION_WEIGHTS = {
+    'coauthor': 1.0,
+    'affiliation': 1.0,
+    'venue': 0.5,
+    'category': 0.25,
+}
+MAX_CATEGORY_SCORE = 0.5
+
+def normalize_author_name(name: str):
+    # "Yan, Pingkun", "Pingkun Yan" and "PINGKUN  YAN" all become "pingkun yan"
+    import re
+    import unicodedata
+
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    if ',' in name:
+        last, _, first = name.partition(',')
+        name = f"{first} {last}"
+    return ' '.join(re.sub(r"[^\w\s-]", ' ', name.lower()).split())
+
+def author_name_matches(target: str, author: str):
+    # every part of the target name appears in the author name, in any order
+    target_parts = normalize_author_name(target).split()
+    author_parts = set(normalize_author_name(author).split())
+    return bool(target_parts) and all(part in author_parts for part in target_parts)
+
+class AuthorDisambiguator:
+    def __init__(self, name: str, school: str | None = None, threshold: float = 1.0):
+        self.name = name
+        self.school = school
+        self.school_match = school_matcher(school)
+        self.threshold = threshold
+        self.papers = []
+        self.parent = []
+        self.anchored = []
+        self.feature_owners = {}  # feature -> roots of the clusters that have it
+
+    def find(self, i: int):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            # attach the newer root under the older one
+            if a < b:
+                a, b = b, a
+            self.parent[a] = b
+        return b
+
+    def _features(self, paper: dict):
+        features = set()
+        target_affiliation = ''
+        for author in paper.get('authors', []):
+            author_name = author.get('name', '') if isinstance(author, dict) else str(author)
+            if author_name_matches(self.name, author_name):
+                target_affiliation = author.get('affiliation', '') if isinstance(author, dict) else ''
+            elif author_name:
+                features.add(('coauthor', normalize_author_name(author_name)))
+        if target_affiliation:
+            features.add(('affiliation', ' '.join(target_affiliation.lower().split())))
+        journal = paper.get('journal')
+        if journal and journal not in ('arXiv', 'Zenodo', 'No journal'):
+            features.add(('venue', journal.lower().strip()))
+        for category in paper.get('categories') or []:
+            features.add(('category', str(category).lower()))
+        return features, target_affiliation
+
+    def add_papers(self, papers: list):
+        for paper in papers:
+            self.add_paper(paper)
+
+    def add_paper(self, paper: dict):
+        index = len(self.papers)
+        self.papers.append(paper)
+        self.parent.append(index)
+
+        features, target_affiliation = self._features(paper)
+        self.anchored.append(bool(self.school_match is not None and self.school_match.mentions(target_affiliation)))
+
+        # score the new paper against every cluster that shares a feature.
+        # Categories are shared by whole fields, so together they can never
+        # link two papers on their own
+        scores = {}
+        category_scores = {}
+        for feature in features:
+            for root in {self.find(owner) for owner in self.feature_owners.get(feature, ())}:
+                if feature[0] == 'category':
+                    category_scores[root] = category_scores.get(root, 0.0) + DISAMBIGUATION_WEIGHTS['category']
+                else:
+                    scores[root] = scores.get(root, 0.0) + DISAMBIGUATION_WEIGHTS[feature[0]]
+        for root, score in category_scores.items():
+            scores[root] = scores.get(root, 0.0) + min(score, MAX_CATEGORY_SCORE)
+        for root, score in scores.items():
+            if score >= self.threshold:
+                self.union(index, root)
+
+        # clusters merged above collapse to one root in each owner list
+        for feature in features:
+            owners = self.feature_owners.get(feature, ())
+            self.feature_owners[feature] = list({self.find(owner) for owner in owners} | {self.find(index)})
+
+    def clusters(self):
+        groups = {}
+        for i in range(len(self.papers)):
+            groups.setdefault(self.find(i), []).append(i)
+        return sorted(groups.values(), key=len, reverse=True)
+
+    def anchored_papers(self):
+        # papers from every cluster that contains at least one paper where the
+        # requested author lists the requested school
+        clusters = self.clusters()
+        if not clusters:
+            return []
+        keep = [cluster for cluster in clusters if any(self.anchored[i] for i in cluster)]
+        if not keep:
+            # nothing mentions the school (or no school given): the largest
+            # cluster is the best guess
+            keep = clusters[:1] if self.school else clusters
+        return [self.papers[i] for cluster in keep for i in sorted(cluster)]
+
+def disambiguate_papers(papers: list, name: str, school: str | None = None):
+    disambiguator = AuthorDisambiguator(name, school)
+    disambiguator.add_papers(papers)
+    return disambiguator.anchored_papers()
+
+# ================================
+# Collaboration network
+# ================================
+# Authors are interned to integer IDs and coauthorship is stored as a CSR
+# adjacency matrix (indptr/indices/weights NumPy arrays, weight = number of
+# shared papers), so collaborator queries are array operations instead of
+# loops over author dicts. New papers go to a per-author buffer of coauthor
+# ID arrays. Single-author queries read their CSR row plus that buffer; the
+# buffer is folded into the CSR arrays once it holds NETWORK_FOLD_RATIO of
+# the stored edges, or when a whole-graph query needs the full matrix.
+# ================================
+NETWORK_FOLD_RATIO = 0.25
+NETWORK_FOLD_MIN_EDGES = 10000
+
+class CollaborationNetwork:
+    def __init__(self):
+        import numpy as np
+
+        self.author_ids = {}
+        self.names = []
+        self.paper_keys = set()
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+        # author ID -> arrays of the author IDs on their new papers (themselves included)
+        self._pending = collections.defaultdict(list)
+        self._pending_edges = 0
+
+    def intern(self, name: str):
+        key = normalize_author_name(name)
+        author_id = self.author_ids.get(key)
+        if author_id is None:
+            author_id = self.author_ids[key] = len(self.names)
+            self.names.append(name)
+        return author_id
+
+    def author_id(self, name: str):
+        return self.author_ids.get(normalize_author_name(name))
+
+    def add_papers(self, papers: list):
+        import numpy as np
+
+        for paper in papers:
+            key = _network_paper_key(paper)
+            if key is not None and key in self.paper_keys:
+                continue
+            if key is not None:
+                self.paper_keys.add(key)
+            ids = {self.intern(a.get('name', '') if isinstance(a, dict) else str(a))
+                   for a in paper.get('authors', []) if (a.get('name') if isinstance(a, dict) else a)}
+            if len(ids) < 2:
+                continue
+            ids = np.fromiter(ids, dtype=np.int32, count=len(ids))
+            # one shared array per paper; every author's row points at it
+            for author_id in ids:
+                self._pending[int(author_id)].append(ids)
+            self._pending_edges += len(ids) * (len(ids) - 1)
+        if self._pending_edges >= max(NETWORK_FOLD_MIN_EDGES, NETWORK_FOLD_RATIO * len(self.indices)):
+            self._build()
+
+    def _build(self):
+        # folds the buffered edges into the CSR arrays
+        import numpy as np
+
+        if not self._pending and len(self.indptr) == len(self.names) + 1:
+            return
+        n = len(self.names)
+        old_rows = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+        new_rows, new_cols = [old_rows], [self.indices.astype(np.int64)]
+        for author_id, coauthors in self._pending.items():
+            cols = np.concatenate(coauthors).astype(np.int64)
+            cols = cols[cols != author_id]
+            new_rows.append(np.full(len(cols), author_id, dtype=np.int64))
+            new_cols.append(cols)
+        rows, cols = np.concatenate(new_rows), np.concatenate(new_cols)
+        weights = np.concatenate([self.weights, np.ones(len(rows) - len(self.weights), dtype=np.float32)])
+        self._pending.clear()
+        self._pending_edges = 0
+
+        # merge repeated (row, col) pairs by summing their weights; np.unique
+        # also leaves the edges sorted by row then column
+        edge_keys, inverse = np.unique(rows * n + cols, return_inverse=True)
+        self.weights = np.bincount(inverse, weights=weights).astype(np.float32)
+        rows = edge_keys // n
+        self.indices = (edge_keys % n).astype(np.int32)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self.indptr[1:])
+
+    def _row(self, author_id: int):
+        # (coauthor IDs, weights), sorted by ID, including buffered papers
+        import numpy as np
+
+        if author_id + 1 < len(self.indptr):
+            start, end = self.indptr[author_id], self.indptr[author_id + 1]
+            indices, weights = self.indices[start:end], self.weights[start:end]
+        else:
+            indices, weights = self.indices[:0], self.weights[:0]
+        pending = self._pending.get(author_id)
+        if not pending:
+            return indices, weights
+        cols = np.concatenate(pending)
+        cols = cols[cols != author_id]
+        merged, inverse = np.unique(np.concatenate([indices, cols]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([weights, np.ones(len(cols), dtype=np.float32)]))
+        return merged.astype(np.int32), counts.astype(np.float32)
+
+    def degree(self, name: str | None = None):
+        # number of distinct coauthors, for one author or for everyone
+        import numpy as np
+
+        if name is None:
+            self._build()
+            return np.diff(self.indptr)
+        author_id = self.author_id(name)
+        return 0 if author_id is None else len(self._row(author_id)[0])
+
+    def top_coauthors(self, name: str, k: int = 10):
+        import numpy as np
+
+        author_id = self.author_id(name)
+        if author_id is None:
+            return []
+        neighbours, weights = self._row(author_id)
+        if len(neighbours) > k:
+            top = np.argpartition(-weights, k - 1)[:k]
+        else:
+            top = np.arange(len(neighbours))
+        top = top[np.lexsort((neighbours[top], -weights[top]))]
+        return [(self.names[neighbours[i]], int(weights[i])) for i in top]
+
+    def neighbourhood(self, name: str, hops: int = 2):
+        # everyone within `hops` coauthorship steps, not including the author
+        import numpy as np
+
+        self._build()
+        author_id = self.author_id(name)
+        if author_id is None:
+            return []
+        n = len(self.names)
+        edge_rows = np.repeat(np.arange(n), np.diff(self.indptr))
+        visited = np.zeros(n, dtype=bool)
+        frontier = np.zeros(n, dtype=bool)
+        visited[author_id] = frontier[author_id] = True
+        for _ in range(hops):
+            reached = np.zeros(n, dtype=bool)
+            reached[self.indices[frontier[edge_rows]]] = True
+            frontier = reached & ~visited
+            if not frontier.any():
+                break
+            visited |= frontier
+        visited[author_id] = False
+        return [self.names[i] for i in np.flatnonzero(visited)]
+
+    def shared_coauthors(self, name_a: str, name_b: str):
+        import numpy as np
+
+        a, b = self.author_id(name_a), self.author_id(name_b)
+        if a is None or b is None:
+            return []
+        shared = np.intersect1d(self._row(a)[0], self._row(b)[0], assume_unique=True)
+        return [self.names[i] for i in shared]
+
+    def shared_coauthor_counts(self, names: list):
+        # len(names) x len(names) matrix of shared-coauthor counts, e.g. for
+        # every pair of professors in a department. Only the queried rows are
+        # read, so the cost follows their degrees rather than the graph size
+        import numpy as np
+
+        rows = []
+        for name in names:
+            author_id = self.author_id(name)
+            rows.append(self._row(author_id)[0] if author_id is not None else np.empty(0, dtype=np.int32))
+        counts = np.zeros((len(names), len(names)), dtype=np.int64)
+        for i in range(len(rows)):
+            for j in range(i + 1, len(rows)):
+                counts[i, j] = counts[j, i] = len(np.intersect1d(rows[i], rows[j], assume_unique=True))
+        return counts
+
+def _network_paper_key(paper: dict):
+    # an identifier, else the title, else the record ID, else the author list
+    # and date. None when there is nothing to go by: such papers are never
+    # treated as repeats of each other
+    ids = canonical_paper_ids(paper)
+    if ids:
+        return ids[0]
+    title = ' '.join((paper.get('title') or '').lower().split())
+    if title and title != 'no title':
+        return f"title:{title}"
+    if paper.get('id'):
+        return f"id:{paper.get('source') or ''}:{paper['id']}"
+    names = sorted(normalize_author_name(a.get('name', '') if isinstance(a, dict) else str(a))
+                   for a in paper.get('authors') or [])
+    if any(names):
+        return f"authors:{paper.get('publication_date') or ''}:{'|'.join(names)}"
+    return None
+
+# ================================
+# Get Keywords/Topics
+# ================================
+KEYWORD_STOPWORDS = frozenset("""
+a about above after again against all also an and any approach are as at based be been before being between both
+but by can could did do does during each few for from further had has have having here how however i if in
+into is it its itself last more most new not of on one only or other our out over paper present propose proposed
+results same show shows so such than that the their them then there these they this those through to two
+under up us use used using very via was we well were what when where which while who will with within
+without would
+""".split())
+
+_KEYWORD_WORD_RE = re.compile(r"[a-z][a-z0-9\-]+")
+
+def keyword_terms(text: str):
+    # unigrams and adjacent bigrams that are not stopwords
+    words = _KEYWORD_WORD_RE.findall(text.lower())
+    keep = [len(w) > 2 and w not in KEYWORD_STOPWORDS for w in words]
+    for i, word in enumerate(words):
+        if keep[i]:
+            yield word
+            if i + 1 < len(words) and keep[i + 1]:
+                yield f"{word} {words[i + 1]}"
+
+def extract_keywords(papers: list, top_k: int = 20):
+    # frequency-based keywords from titles and abstracts, titles counted
+    # twice as heavily as abstracts
+    from collections import Counter
+
+    counts = Counter()
+    for paper in papers:
+        for text, weight in ((paper.get('title') or '', 2), (paper.get('abstract') or '', 1)):
+            for term in keyword_terms(text):
+                counts[term] += weight
+    return [keyword for keyword, _ in counts.most_common(top_k)]
+
+# ================================
+# Keyword and category trends
+# ================================
+# Terms (title/abstract keywords and categories, lowercased) are interned to
+# integer IDs and counted per publication year in a years x terms NumPy
+# matrix, each term counted once per paper. New papers are buffered and
+# folded in with one np.add.at on the next query, so rising/fading queries are
+# array operations even when a whole department's papers are added. The
+# matrix keeps spare rows and columns, so a fold only touches the new counts
+# and the buffer is regrown (doubled) only when the year range or vocabulary
+# outgrows it; counts and papers_per_year are views of the used part.
+# ================================
+class TermTrends:
+    def __init__(self):
+        import numpy as np
+
+        self.term_ids = {}
+        self.terms = []
+        self.paper_keys = set()
+        self.first_year = None
+        self.counts = np.zeros((0, 0), dtype=np.int32)   # years x terms
+        self.papers_per_year = np.zeros(0, dtype=np.int32)
+        # the buffers behind them; row 0 is year _origin
+        self._origin = None
+        self._count_buffer = self.counts
+        self._paper_buffer = self.papers_per_year
+        self._pending = []
+
+    def intern(self, term: str):
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = self.term_ids[term] = len(self.terms)
+            self.terms.append(term)
+        return term_id
+
+    def add_papers(self, papers: list):
+        for paper in papers:
+            key = _network_paper_key(paper)
+            year = normalize_publication_date(paper.get('publication_date'))[:4]
+            if (key is not None and key in self.paper_keys) or not year:
+                continue
+            if key is not None:
+                self.paper_keys.add(key)
+            terms = dict.fromkeys(keyword_terms(f"{paper.get('title') or ''}\n{paper.get('abstract') or ''}"))
+            terms.update(dict.fromkeys(str(c).strip().lower() for c in paper.get('categories') or [] if c))
+            self._pending.append((int(year), [self.intern(term) for term in terms]))
+
+    def _build(self):
+        import numpy as np
+
+        if not self._pending:
+            return
+        years = [year for year, _ in self._pending]
+        first = min(years) if self.first_year is None else min(min(years), self.first_year)
+        last = max(years) if self.first_year is None else max(max(years), self.first_year + len(self.papers_per_year) - 1)
+        self._reserve(first, last, len(self.terms))
+
+        rows = np.concatenate([np.full(len(ids), year - self._origin, dtype=np.intp) for year, ids in self._pending])
+        cols = np.concatenate([np.asarray(ids, dtype=np.intp) for _, ids in self._pending])
+        np.add.at(self._count_buffer, (rows, cols), 1)
+        np.add.at(self._paper_buffer, np.asarray(years, dtype=np.intp) - self._origin, 1)
+        self._pending = []
+
+        self.first_year = first
+        self.counts = self._count_buffer[first - self._origin:last - self._origin + 1, :len(self.terms)]
+        self.papers_per_year = self._paper_buffer[first - self._origin:last - self._origin + 1]
+
+    def _reserve(self, first: int, last: int, n_terms: int):
+        # grows the buffers to hold years first..last and n_terms terms,
+        # with room to spare on the side that grew
+        import numpy as np
+
+        year_capacity, term_capacity = self._count_buffer.shape
+        origin = first if self._origin is None else self._origin
+        if first >= origin and last < origin + year_capacity and n_terms <= term_capacity:
+            return
+        span = last - min(first, origin) + 1
+        pad = max(4, span // 2)
+        new_origin = first - pad if first < origin else origin
+        new_end = last + pad + 1 if last >= origin + year_capacity else origin + year_capacity
+        new_terms = term_capacity if n_terms <= term_capacity else max(n_terms, 2 * term_capacity, 256)
+
+        counts = np.zeros((new_end - new_origin, new_terms), dtype=np.int32)
+        papers = np.zeros(new_end - new_origin, dtype=np.int32)
+        offset = origin - new_origin
+        counts[offset:offset + year_capacity, :term_capacity] = self._count_buffer
+        papers[offset:offset + year_capacity] = self._paper_buffer
+        self._count_buffer, self._paper_buffer, self._origin = counts, papers, new_origin
+
+    def years(self):
+        import numpy as np
+
+        self._build()
+        return np.arange(self.first_year or 0, (self.first_year or 0) + len(self.papers_per_year))
+
+    def matrix(self):
+        # (years, terms, counts) with counts[year index, term index], a copy
+        # since later folds update the buffer in place
+        self._build()
+        return self.years(), list(self.terms), self.counts.copy()
+
+    def series(self, term: str):
+        import numpy as np
+
+        self._build()
+        term_id = self.term_ids.get(term.lower())
+        if term_id is None:
+            return np.zeros(len(self.papers_per_year), dtype=np.int32)
+        return self.counts[:, term_id]
+
+    def top_terms(self, k: int = 10, since: int | None = None, until: int | None = None):
+        import numpy as np
+
+        self._build()
+        totals = self._window(since, until).sum(axis=0)
+        top = np.argsort(-totals, kind='stable')[:k]
+        return [(self.terms[i], int(totals[i])) for i in top if totals[i] > 0]
+
+    def _window(self, since: int | None, until: int | None):
+        import numpy as np
+
+        years = self.years()
+        mask = np.ones(len(years), dtype=bool)
+        if since is not None:
+            mask &= years >= since
+        if until is not None:
+            mask &= years <= until
+        return self.counts[mask]
+
+    def trending(self, recent_years: int = 3, min_count: int = 2):
+        # change in each term's share of papers between the last recent_years
+        # and everything before; positive is rising, negative is fading
+        import numpy as np
+
+        self._build()
+        if len(self.papers_per_year) == 0:
+            return np.zeros(0, dtype=np.float64)
+        split = max(1, len(self.papers_per_year) - recent_years)
+        before, recent = self.counts[:split].sum(axis=0), self.counts[split:].sum(axis=0)
+        before_papers = max(1, int(self.papers_per_year[:split].sum()))
+        recent_papers = max(1, int(self.papers_per_year[split:].sum()))
+        change = recent / recent_papers - before / before_papers
+        change[(before + recent) < min_count] = 0
+        return change
+
+    def rising(self, k: int = 10, recent_years: int = 3, min_count: int = 2):
+        return self._ranked(self.trending(recent_years, min_count), k)
+
+    def fading(self, k: int = 10, recent_years: int = 3, min_count: int = 2):
+        return self._ranked(-self.trending(recent_years, min_count), k)
+
+    def _ranked(self, scores, k: int):
+        import numpy as np
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        # ties go to the term seen first
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(self.terms[i], round(float(scores[i]), 4)) for i in top if scores[i] > 0]
+
+# ================================
+# Profile cache
+# ================================
+# get_profile() caches the final merged paper list and keywords per
+# {name, school}. Fresh profiles are returned as is; once past the soft TTL
+# the cached profile is still returned immediately and a background refresh
+# replaces it. Only a miss (or a profile past the hard TTL, or from an older
+# PROFILE_CACHE_VERSION) waits on a full harvest. The most recently used
+# PROFILE_MEMORY_CACHE_SIZE profiles are kept in memory, the rest on disk;
+# an unreadable cache file counts as a miss. Callers get copy-on-read paper
+# lists (see _SharedPapers), so editing a returned profile leaves the cache
+# alone without copying every paper on every serve.
+# ================================
+PROFILE_CACHE_VERSION = 1
+PROFILE_SOFT_TTL = 3600
+PROFILE_HARD_TTL = 7 * 24 * 3600
+PROFILE_MEMORY_CACHE_SIZE = 1000
+
+_profile_cache = collections.OrderedDict()
+_profile_cache_lock = threading.Lock()
+_profile_refreshes = {}  # key -> background refresh thread
+
+def profile_cache_key(name: str | None, school: str | None):
+    import hashlib
+    text = f"{(name or '').strip().lower()}|{(school or '').strip().lower()}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+def get_profile(query: dict, soft_ttl: float = PROFILE_SOFT_TTL, hard_ttl: float = PROFILE_HARD_TTL,
+                cache_dir: str | None = None, top_k: int = 20):
+    # returns {'version', 'name', 'school', 'papers', 'keywords', 'fetched_at', 'stale'}
+    import time
+
+    start = time.monotonic()
+    name, school = query.get('name'), query.get('school')
+    key = profile_cache_key(name, school)
+    profile = _load_profile(key, cache_dir)
+    age = time.time() - profile['fetched_at'] if profile else None
+
+    if profile is not None and profile.get('version') == PROFILE_CACHE_VERSION and age < hard_ttl:
+        stale = age >= soft_ttl
+        if stale:
+            _start_profile_refresh(key, query, cache_dir, top_k)
+        increment_metric('profile_cache.stale' if stale else 'profile_cache.fresh')
+        record_timing('profile_cache.serve_stale' if stale else 'profile_cache.serve_fresh', time.monotonic() - start)
+        return _copy_profile(profile, stale)
+
+    increment_metric('profile_cache.miss')
+    profile = single_flight(('profile', key), lambda: _refresh_profile(key, query, cache_dir, top_k))
+    record_timing('profile_cache.serve_miss', time.monotonic() - start)
+    return _copy_profile(profile, False)
+
+def _copy_profile(profile: dict, stale: bool):
+    return dict(profile, papers=_SharedPapers(profile['papers']), keywords=list(profile['keywords']), stale=stale)
+
+class _SharedPapers(list):
+    # one caller's view of the cached papers. The paper dicts stay shared
+    # until read: each is deep-copied the first time it is taken from this
+    # list and the copy replaces it, so a serve copies references rather than
+    # papers. json.dumps reads the list directly and copies nothing
+    def __init__(self, papers):
+        super().__init__(papers)
+        self._shared = {id(paper) for paper in papers}
+
+    def _own(self, index):
+        import copy
+
+        paper = list.__getitem__(self, index)
+        if id(paper) in self._shared:
+            self._shared.discard(id(paper))
+            paper = copy.deepcopy(paper)
+            list.__setitem__(self, index, paper)
+        return paper
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._own(i) for i in range(*index.indices(len(self)))]
+        return self._own(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._own(i)
+
+    def __reversed__(self):
+        for i in reversed(range(len(self))):
+            yield self._own(i)
+
+    def pop(self, index=-1):
+        self._own(index)
+        return list.pop(self, index)
+
+    def copy(self):
+        return list(self)
+
+def _refresh_profile(key: str, query: dict, cache_dir: str | None, top_k: int):
+    import time
+
+    start = time.monotonic()
+    # not get_papers(), which prints the query and every paper
+    papers, _ = _harvest_papers(query.get('name'), query.get('school'))
+    profile = {
+        'version': PROFILE_CACHE_VERSION,
+        'name': query.get('name'),
+        'school': query.get('school'),
+        'papers': papers,
+        'keywords': extract_keywords(papers, top_k),
+        'fetched_at': time.time(),
+    }
+    _store_profile(key, profile, cache_dir)
+    record_timing('profile_cache.refresh', time.monotonic() - start)
+    return profile
+
+def _start_profile_refresh(key: str, query: dict, cache_dir: str | None, top_k: int):
+    # at most one background refresh per profile
+    def run():
+        try:
+            _refresh_profile(key, query, cache_dir, top_k)
+        except Exception as e:
+            increment_metric('profile_cache.refresh_failed')
+            print(f"Error refreshing profile for {query.get('name')}: {e}")
+        finally:
+            with _profile_cache_lock:
+                _profile_refreshes.pop(key, None)
+
+    with _profile_cache_lock:
+        if key in _profile_refreshes:
+            return _profile_refreshes[key]
+        thread = _profile_refreshes[key] = threading.Thread(target=run, name=f"rp-profile-{key[:8]}", daemon=True)
+    increment_metric('profile_cache.refresh_started')
+    thread.start()
+    return thread
+
+def _load_profile(key: str, cache_dir: str | None):
+    import json
+    import os
+
+    with _profile_cache_lock:
+        if key in _profile_cache:
+            _profile_cache.move_to_end(key)
+            return _profile_cache[key]
+    if cache_dir:
+        path = os.path.join(cache_dir, f"{key}.json")
+        if os.path.exists(path):
+            # a corrupt or partly written file is a miss, the harvest rewrites it
+            try:
+                with open(path, encoding='utf-8') as f:
+                    profile = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading cached profile {path}: {e}")
+                return None
+            if not isinstance(profile, dict) or not {'fetched_at', 'papers', 'keywords'} <= profile.keys():
+                print(f"Ignoring incomplete cached profile {path}")
+                return None
+            _remember_profile(key, profile)
+            return profile
+    return None
+
+def _remember_profile(key: str, profile: dict):
+    with _profile_cache_lock:
+        _profile_cache[key] = profile
+        _profile_cache.move_to_end(key)
+        if len(_profile_cache) > PROFILE_MEMORY_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+
+def _store_profile(key: str, profile: dict, cache_dir: str | None):
+    import json
+    import os
+
+    _remember_profile(key, profile)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = os.path.join(cache_dir, f"{key}.json.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{key}.json"))
+
+# ================================
+# Research domains
+# ================================
+# Maps paper categories (arXiv codes such as cs.CV, MeSH descriptors from
+# PubMed, Crossref/DOAJ subjects) onto one two-level domain hierarchy using
+# lookup tables, so a professor's domains come from metadata alone. Each
+# paper splits one vote between the domains its categories map to; votes
+# roll up to parent domains.
+#
+# PubMed efetch gives MeSH descriptor names, not tree numbers, so MeSH is
+# matched by descriptor name, with a word table for descriptors not listed.
+# ================================
+DOMAIN_PARENTS = {
+    'Computer Science': None,
+    'Artificial Intelligence': 'Computer Science',
+    'Machine Learning': 'Computer Science',
+    'Computer Vision': 'Computer Science',
+    'Natural Language Processing': 'Computer Science',
+    'Robotics': 'Computer Science',
+    'Human-Computer Interaction': 'Computer Science',
+    'Security and Cryptography': 'Computer Science',
+    'Databases and Information Retrieval': 'Computer Science',
+    'Systems and Networking': 'Computer Science',
+    'Theory and Algorithms': 'Computer Science',
+    'Software Engineering': 'Computer Science',
+    'Engineering': None,
+    'Signal and Image Processing': 'Engineering',
+    'Electrical Engineering': 'Engineering',
+    'Mechanical Engineering': 'Engineering',
+    'Chemical Engineering': 'Engineering',
+    'Medicine': None,
+    'Medical Imaging': 'Medicine',
+    'Oncology': 'Medicine',
+    'Cardiology': 'Medicine',
+    'Neurology': 'Medicine',
+    'Surgery': 'Medicine',
+    'Public Health': 'Medicine',
+    'Life Sciences': None,
+    'Genomics and Bioinformatics': 'Life Sciences',
+    'Neuroscience': 'Life Sciences',
+    'Molecular and Cell Biology': 'Life Sciences',
+    'Physical Sciences': None,
+    'Physics': 'Physical Sciences',
+    'Astrophysics': 'Physical Sciences',
+    'Chemistry': 'Physical Sciences',
+    'Materials Science': 'Physical Sciences',
+    'Mathematics': None,
+    'Statistics': 'Mathematics',
+    'Social Sciences': None,
+    'Economics': 'Social Sciences',
+    'Finance': 'Social Sciences',
+}
+
+ARXIV_DOMAINS = {
+    'cs.ai': 'Artificial Intelligence', 'cs.lg': 'Machine Learning', 'stat.ml': 'Machine Learning',
+    'cs.ne': 'Machine Learning', 'cs.cv': 'Computer Vision', 'cs.gr': 'Computer Vision',
+    'cs.cl': 'Natural Language Processing', 'cs.ro': 'Robotics', 'cs.hc': 'Human-Computer Interaction',
+    'cs.cr': 'Security and Cryptography', 'cs.db': 'Databases and Information Retrieval',
+    'cs.ir': 'Databases and Information Retrieval', 'cs.dc': 'Systems and Networking',
+    'cs.ni': 'Systems and Networking', 'cs.os': 'Systems and Networking', 'cs.ar': 'Systems and Networking',
+    'cs.ds': 'Theory and Algorithms', 'cs.cc': 'Theory and Algorithms', 'cs.lo': 'Theory and Algorithms',
+    'cs.se': 'Software Engineering', 'cs.pl': 'Software Engineering',
+    'eess.iv': 'Signal and Image Processing', 'eess.sp': 'Signal and Image Processing',
+    'eess.as': 'Signal and Image Processing', 'eess.sy': 'Electrical Engineering',
+    'physics.med-ph': 'Medical Imaging', 'q-bio.gn': 'Genomics and Bioinformatics',
+    'q-bio.qm': 'Genomics and Bioinformatics', 'q-bio.nc': 'Neuroscience', 'q-bio.bm': 'Molecular and Cell Biology',
+    'q-bio.cb': 'Molecular and Cell Biology', 'cond-mat.mtrl-sci': 'Materials Science',
+    'stat.me': 'Statistics', 'stat.ap': 'Statistics', 'stat.th': 'Statistics',
+}
+# archive-level fallback for codes not listed above
+ARXIV_ARCHIVE_DOMAINS = {
+    'cs': 'Computer Science', 'eess': 'Engineering', 'stat': 'Statistics', 'math': 'Mathematics',
+    'physics': 'Physics', 'quant-ph': 'Physics', 'hep-th': 'Physics', 'hep-ph': 'Physics', 'hep-ex': 'Physics',
+    'gr-qc': 'Physics', 'nucl-th': 'Physics', 'cond-mat': 'Physics', 'astro-ph': 'Astrophysics',
+    'q-bio': 'Life Sciences', 'econ': 'Economics', 'q-fin': 'Finance', 'nlin': 'Mathematics',
+}
+
+# MeSH descriptors and Crossref/DOAJ subjects, lowercased
+SUBJECT_DOMAINS = {
+    'artificial intelligence': 'Artificial Intelligence', 'machine learning': 'Machine Learning',
+    'deep learning': 'Machine Learning', 'neural networks, computer': 'Machine Learning',
+    'computer vision and pattern recognition': 'Computer Vision', 'pattern recognition, automated': 'Computer Vision',
+    'natural language processing': 'Natural Language Processing', 'robotics': 'Robotics',
+    'computer science applications': 'Computer Science', 'software': 'Software Engineering',
+    'image processing, computer-assisted': 'Signal and Image Processing',
+    'signal processing, computer-assisted': 'Signal and Image Processing',
+    'radiology, nuclear medicine and imaging': 'Medical Imaging', 'diagnostic imaging': 'Medical Imaging',
+    'radiographic image interpretation, computer-assisted': 'Medical Imaging',
+    'tomography, x-ray computed': 'Medical Imaging', 'magnetic resonance imaging': 'Medical Imaging',
+    'ultrasonography': 'Medical Imaging', 'oncology': 'Oncology', 'neoplasms': 'Oncology',
+    'cancer research': 'Oncology', 'cardiology and cardiovascular medicine': 'Cardiology',
+    'heart diseases': 'Cardiology', 'neurology (clinical)': 'Neurology', 'brain': 'Neuroscience',
+    'surgery': 'Surgery', 'public health, environmental and occupational health': 'Public Health',
+    'genomics': 'Genomics and Bioinformatics', 'computational biology': 'Genomics and Bioinformatics',
+    'molecular biology': 'Molecular and Cell Biology', 'materials science': 'Materials Science',
+    'general chemistry': 'Chemistry', 'statistics and probability': 'Statistics',
+    'electrical and electronic engineering': 'Electrical Engineering',
+    'mechanical engineering': 'Mechanical Engineering', 'economics and econometrics': 'Economics',
+}
+# single words, for descriptors and subjects not listed above
+SUBJECT_WORD_DOMAINS = {
+    'imaging': 'Medical Imaging', 'radiology': 'Medical Imaging', 'tomography': 'Medical Imaging',
+    'radiography': 'Medical Imaging', 'neoplasms': 'Oncology', 'cancer': 'Oncology', 'tumor': 'Oncology',
+    'cardiac': 'Cardiology', 'heart': 'Cardiology', 'cardiovascular': 'Cardiology', 'neurology': 'Neurology',
+    'neuroscience': 'Neuroscience', 'neurons': 'Neuroscience', 'surgical': 'Surgery', 'surgery': 'Surgery',
+    'genomics': 'Genomics and Bioinformatics', 'genetics': 'Genomics and Bioinformatics',
+    'bioinformatics': 'Genomics and Bioinformatics', 'proteins': 'Molecular and Cell Biology',
+    'learning': 'Machine Learning', 'algorithms': 'Theory and Algorithms', 'computer': 'Computer Science',
+    'computing': 'Computer Science', 'engineering': 'Engineering', 'physics': 'Physics',
+    'chemistry': 'Chemistry', 'materials': 'Materials Science', 'mathematics': 'Mathematics',
+    'statistics': 'Statistics', 'economics': 'Economics', 'medicine': 'Medicine', 'clinical': 'Medicine',
+}
+
+DOMAINS = tuple(DOMAIN_PARENTS)
+_DOMAIN_IDS = {domain: i for i, domain in enumerate(DOMAINS)}
+
+@functools.lru_cache(maxsize=1)
+def _domain_ancestors():
+    # ancestors[d, a] is 1 when a is d or one of its parents
+    import numpy as np
+
+    ancestors = np.zeros((len(DOMAINS), len(DOMAINS)), dtype=np.float32)
+    for domain, i in _DOMAIN_IDS.items():
+        while domain is not None:
+            ancestors[i, _DOMAIN_IDS[domain]] = 1
+            domain = DOMAIN_PARENTS[domain]
+    return ancestors
+
+@functools.lru_cache(maxsize=100000)
+def category_domains(category: str):
+    # domain IDs for one category string, most specific table first
+    term = ' '.join(str(category).lower().split())
+    if term in ARXIV_DOMAINS:
+        return (_DOMAIN_IDS[ARXIV_DOMAINS[term]],)
+    if term in SUBJECT_DOMAINS:
+        return (_DOMAIN_IDS[SUBJECT_DOMAINS[term]],)
+    archive = term.split('.')[0]
+    if archive != term and archive in ARXIV_ARCHIVE_DOMAINS:
+        return (_DOMAIN_IDS[ARXIV_ARCHIVE_DOMAINS[archive]],)
+    words = re.findall(r"[a-z]+", term)
+    return tuple(dict.fromkeys(_DOMAIN_IDS[SUBJECT_WORD_DOMAINS[w]] for w in words if w in SUBJECT_WORD_DOMAINS))
+
+def classify_domains(papers: list, top_k: int = 5):
+    # ranked [{'domain', 'parent', 'score', 'confidence', 'papers'}]. score is
+    # the share of classified papers' votes, confidence the share of
+    # classified papers that touch the domain at all
+    import numpy as np
+
+    rows, cols, weights = [], [], []
+    for i, paper in enumerate(papers):
+        ids = set()
+        for category in paper.get('categories') or []:
+            ids.update(category_domains(category))
+        for domain_id in ids:
+            rows.append(i)
+            cols.append(domain_id)
+            weights.append(1 / len(ids))
+    if not rows:
+        return []
+
+    votes = np.zeros((len(papers), len(DOMAINS)), dtype=np.float32)
+    votes[rows, cols] = weights
+    votes = votes[votes.any(axis=1)]
+    ancestors = _domain_ancestors()
+    scores = (votes @ ancestors).sum(axis=0) / len(votes)
+    paper_counts = ((votes > 0).astype(np.float32) @ ancestors > 0).sum(axis=0)
+
+    ranked = np.lexsort((np.arange(len(DOMAINS)), -scores))[:top_k]
+    return [
+        {
+            'domain': DOMAINS[i],
+            'parent': DOMAIN_PARENTS[DOMAINS[i]],
+            'score': round(float(scores[i]), 4),
+            'confidence': round(float(paper_counts[i]) / len(votes), 4),
+            'papers': int(paper_counts[i]),
+        }
+        for i in ranked if scores[i] > 0
+    ]
+
+# ================================
+# Similar professors
+# ================================
+# Each professor is a fixed-width profile vector: keywords from titles and
+# abstracts, categories and any extra keywords are feature-hashed (signed,
+# so collisions cancel out on average) into SIMILARITY_DIM slots, weighted
+# 1 + log(papers using the term) and L2-normalized. Vectors are rows of one
+# float32 matrix, so a query is one matrix-vector product and a top-k
+# argpartition. With a path, the matrix lives in vectors.npy and is
+# memory-mapped: adding or re-adding a professor writes one row in place,
+# and the file is regrown (doubled) only when it runs out of spare rows.
+# save() flushes the rows and writes the key list to index.json.
+# ================================
+SIMILARITY_INDEX_VERSION = 1
+SIMILARITY_DIM = 1024
+
+@functools.lru_cache(maxsize=200000)
+def _feature_slot(feature: str, dim: int):
+    # stable across processes, unlike hash()
+    import hashlib
+
+    h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+    return h % dim, 1.0 if h >> 63 else -1.0
+
+def profile_vector(papers: list, keywords=(), dim: int = SIMILARITY_DIM):
+    import math
+    import numpy as np
+
+    counts = collections.Counter()
+    for paper in papers:
+        features = dict.fromkeys(keyword_terms(f"{paper.get('title') or ''}\n{paper.get('abstract') or ''}"))
+        features.update(dict.fromkeys(f"category:{' '.join(str(c).lower().split())}"
+                                      for c in paper.get('categories') or [] if c))
+        counts.update(features.keys())
+    counts.update(dict.fromkeys(' '.join(str(k).lower().split()) for k in keywords if k).keys())
+
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, count in counts.items():
+        slot, sign = _feature_slot(feature, dim)
+        vector[slot] += sign * (1 + math.log(count))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SimilarityIndex:
+    def __init__(self, path: str | None = None, dim: int = SIMILARITY_DIM):
+        import json
+        import os
+        import numpy as np
+
+        self.path = path
+        self.dim = dim
+        self.keys = []
+        self.rows = {}
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.lock = threading.Lock()
+        if path and os.path.exists(os.path.join(path, 'index.json')):
+            with open(os.path.join(path, 'index.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') == SIMILARITY_INDEX_VERSION:
+                self.dim = meta['dim']
+                self.keys = meta['keys']
+                self.rows = {key: i for i, key in enumerate(self.keys)}
+                self.vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r+')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key: str):
+        return key in self.rows
+
+    def add(self, key: str, papers: list, keywords=()):
+        # (re)index one professor; key is whatever identifies them, e.g. profile_cache_key()
+        self.add_vector(key, profile_vector(papers, keywords, self.dim))
+
+    def add_vector(self, key: str, vector):
+        with self.lock:
+            row = self.rows.get(key)
+            if row is None:
+                row = len(self.keys)
+                self._reserve(row + 1)
+                self.keys.append(key)
+                self.rows[key] = row
+            self.vectors[row] = vector
+
+    def _reserve(self, rows: int):
+        import os
+        import numpy as np
+        from numpy.lib.format import open_memmap
+
+        if rows <= len(self.vectors):
+            return
+        capacity = max(rows, 2 * len(self.vectors), 64)
+        if not self.path:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            vectors[:len(self.keys)] = self.vectors[:len(self.keys)]
+            self.vectors = vectors
+            return
+        os.makedirs(self.path, exist_ok=True)
+        vectors_path = os.path.join(self.path, 'vectors.npy')
+        tmp_path = f"{vectors_path}.{threading.get_ident()}.tmp"
+        vectors = open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(capacity, self.dim))
+        vectors[:len(self.keys)] = self.vectors[:len(self.keys)]
+        vectors.flush()
+        del vectors
+        self.vectors = None
+        os.replace(tmp_path, vectors_path)
+        self.vectors = np.load(vectors_path, mmap_mode='r+')
+
+    def save(self):
+        import json
+        import os
+
+        with self.lock:
+            if not self.path:
+                return
+            self._reserve(1)
+            self.vectors.flush()
+            meta = {'version': SIMILARITY_INDEX_VERSION, 'dim': self.dim, 'keys': list(self.keys)}
+            tmp_path = os.path.join(self.path, f"index.json.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, os.path.join(self.path, 'index.json'))
+
+    def query(self, target, k: int = 10):
+        # [(key, cosine)] best first for an indexed key, or a profile_vector();
+        # a key is left out of its own results
+        import time
+        import numpy as np
+
+        start = time.monotonic()
+        with self.lock:
+            keys, vectors = list(self.keys), self.vectors[:len(self.keys)]
+            exclude = self.rows.get(target) if isinstance(target, str) else None
+        if isinstance(target, str):
+            if exclude is None:
+                raise KeyError(target)
+            target = vectors[exclude]
+        scores = vectors @ np.asarray(target, dtype=np.float32)
+        if exclude is not None:
+            scores[exclude] = -np.inf
+        k = min(k, len(scores) - (exclude is not None))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        record_timing('similarity.query', time.monotonic() - start)
+        return [(keys[i], round(float(scores[i]), 4)) for i in top]
+
+# ================================
+# LLM summaries
+# ================================
+# Turns each professor's keywords, categories and top abstracts into a JSON
+# profile. Inputs are packed under a token budget, several professors share one
+# call where they fit, and outputs are cached by a hash of the packed input so
+# re-running a roster only pays for professors whose inputs changed.
+#
+# A backend is any callable taking a prompt string and returning the model's
+# text. local_summary_backend is a deterministic stand-in for tests and
+# offline runs.
+# ================================
+SUMMARY_PROMPT_VERSION = 1
+SUMMARY_INSTRUCTIONS = (
+    "For each professor below, summarize their research into a JSON profile with the keys "
+    "\"name\", \"school\", \"research_domains\" (list of strings), \"keywords\" (list of strings) "
+    "and \"summary\" (2-3 sentences). Respond with a single JSON object mapping each professor ID "
+    "to its profile and nothing else.\n"
+)
+
+SUMMARY_MEMORY_CACHE_SIZE = 1000
+
+# most recently used summaries in memory; the on-disk cache keeps the rest
+_summary_cache = collections.OrderedDict()
+_summary_cache_lock = threading.Lock()
+
+def estimate_tokens(text: str):
+    # roughly 4 characters per token for English text
+    return len(text) // 4 + 1
+
+def pack_summary_input(professor: dict, token_budget: int = 1500, max_abstracts: int = 5):
+    # professor is {'name', 'school', 'papers', optional 'keywords'}
+    from collections import Counter
+
+    papers = professor.get('papers') or []
+    keywords = professor.get('keywords') or extract_keywords(papers)
+    categories = Counter(c for paper in papers for c in paper.get('categories') or [])
+    lines = [
+        f"Name: {professor.get('name', '')}",
+        f"School: {professor.get('school') or ''}",
+        f"Keywords: {', '.join(keywords[:30])}",
+        f"Categories: {', '.join(c for c, _ in categories.most_common(15))}",
+    ]
+    used = estimate_tokens('\n'.join(lines))
+
+    # most recent abstracts first, cut to whatever budget is left
+    with_abstracts = [paper for paper in papers if paper.get('abstract')]
+    with_abstracts.sort(key=lambda paper: str(paper.get('publication_date') or ''), reverse=True)
+    for paper in with_abstracts[:max_abstracts]:
+        entry = f"Abstract ({paper.get('title') or 'untitled'}): {' '.join(paper['abstract'].split())}"
+        remaining = (token_budget - used) * 4
+        if remaining < 200:
+            break
+        if len(entry) > remaining:
+            entry = entry[:remaining].rsplit(' ', 1)[0] + ' ...'
+        lines.append(entry)
+        used += estimate_tokens(entry)
+    return '\n'.join(lines)
+
+def summarize_professors(professors: list, backend=None, token_budget: int = 1500,
+                         batch_token_budget: int = 6000, cache_dir: str | None = None):
+    # returns one profile dict (or None on failure) per professor, in order
+    import hashlib
+    import json
+
+    backend = backend or local_summary_backend
+    backend_name = getattr(backend, '__name__', type(backend).__name__)
+    # a professor sent alone must still fit the batch budget with the
+    # instructions and section header around it
+    single_budget = batch_token_budget - estimate_tokens(SUMMARY_INSTRUCTIONS) - 10
+    token_budget = min(token_budget, single_budget)
+
+    results = [None] * len(professors)
+    misses = []
+    for i, professor in enumerate(professors):
+        packed = pack_summary_input(professor, token_budget)
+        if estimate_tokens(packed) > single_budget:
+            packed = packed[:max(single_budget - 1, 0) * 4]
+        key = hashlib.sha256(f"{SUMMARY_PROMPT_VERSION}|{backend_name}|{packed}".encode('utf-8')).hexdigest()
+        cached = _load_summary(key, cache_dir)
+        if cached is not None:
+            results[i] = cached
+        else:
+            misses.append((i, key, packed))
+
+    # pack as many professors per call as fit under the batch budget
+    batches = []
+    batch = []
+    batch_tokens = estimate_tokens(SUMMARY_INSTRUCTIONS)
+    for miss in misses:
+        tokens = estimate_tokens(miss[2]) + 10
+        if batch and batch_tokens + tokens > batch_token_budget:
+            batches.append(batch)
+            batch = []
+            batch_tokens = estimate_tokens(SUMMARY_INSTRUCTIONS)
+        batch.append(miss)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+
+    for batch in batches:
+        prompt = SUMMARY_INSTRUCTIONS + ''.join(
+            f"\n### Professor p{i}\n{packed}\n" for i, _, packed in batch
+        )
+        try:
+            output = json.loads(backend(prompt))
+        except Exception as e:
+            print(f"Error summarizing batch of {len(batch)} professors: {e}")
+            continue
+        for i, key, _ in batch:
+            profile = output.get(f"p{i}") if isinstance(output, dict) else None
+            if not isinstance(profile, dict):
+                print(f"No summary returned for {professors[i].get('name', '')}")
+                continue
+            _store_summary(key, profile, cache_dir)
+            results[i] = profile
+    return results
+
+def _load_summary(key: str, cache_dir: str | None):
+    import json
+    import os
+
+    with _summary_cache_lock:
+        if key in _summary_cache:
+            _summary_cache.move_to_end(key)
+            return _summary_cache[key]
+    if cache_dir:
+        path = os.path.join(cache_dir, f"{key}.json")
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                profile = json.load(f)
+            _remember_summary(key, profile)
+            return profile
+    return None
+
+def _remember_summary(key: str, profile: dict):
+    with _summary_cache_lock:
+        _summary_cache[key] = profile
+        _summary_cache.move_to_end(key)
+        while len(_summary_cache) > SUMMARY_MEMORY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+
+def _store_summary(key: str, profile: dict, cache_dir: str | None):
+    import json
+    import os
+
+    _remember_summary(key, profile)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = os.path.join(cache_dir, f"{key}.json.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{key}.json"))
+
+def local_summary_backend(prompt: str):
+    # deterministic stand-in for an LLM: reads the packed sections back out of
+    # the prompt and builds the profile from them
+    import json
+    import re
+
+    profiles = {}
+    for match in re.finditer(r"### Professor (\S+)\n(.*?)(?=\n### Professor |\Z)", prompt, re.S):
+        fields = {}
+        for line in match.group(2).splitlines():
+            key, _, value = line.partition(': ')
+            fields.setdefault(key, value)
+        keywords = [k for k in fields.get('Keywords', '').split(', ') if k]
+        domains = [c for c in fields.get('Categories', '').split(', ') if c]
+        name = fields.get('Name', '')
+        profiles[match.group(1)] = {
+            'name': name,
+            'school': fields.get('School', ''),
+            'research_domains': domains[:5],
+            'keywords': keywords[:10],
+            'summary': f"{name} works on {', '.join(keywords[:3]) or 'unknown topics'}.",
+        }
+    return json.dumps(profiles)
+
+# ================================
+# Export (JSONL, CSV, Parquet)
+# ================================
+# export_papers() writes a paper stream to disk as it arrives, a batch of
+# rows at a time, so memory does not grow with the run. A paper's fields all
+# come from the one source that harvested it (duplicates from other sources
+# are dropped, not merged), recorded in the source column; citation_count
+# comes from citation_source. Parquet needs pyarrow.
+# ================================
+EXPORT_FIELDS = ('title', 'authors', 'affiliations', 'publication_date', 'journal', 'abstract', 'categories',
+                 'doi', 'arxiv_id', 'pmid', 'pdf', 'citation_count')
+EXPORT_COLUMNS = EXPORT_FIELDS + ('source', 'citation_source')
+_EXPORT_LIST_FIELDS = frozenset({'authors', 'affiliations', 'categories'})
+
+def export_row(paper: dict, source: str | None = None):
+    source = paper.get('source') or source
+    links = paper.get('links') or {}
+    authors = [author if isinstance(author, dict) else {'name': author} for author in paper.get('authors') or []]
+    row = {
+        'title': paper.get('title'),
+        'authors': [author.get('name') or '' for author in authors],
+        'affiliations': [author.get('affiliation') or '' for author in authors],
+        'publication_date': normalize_publication_date(paper.get('publication_date')) or None,
+        'journal': paper.get('journal'),
+        'abstract': paper.get('abstract'),
+        'categories': list(paper.get('categories') or []),
+        'doi': links.get('doi'),
+        'arxiv_id': links.get('arxiv_id'),
+        'pmid': links.get('pmid'),
+        'pdf': links.get('pdf'),
+        'citation_count': paper.get('citation_count'),
+    }
+    row['source'] = source
+    row['citation_source'] = paper.get('citation_source') if row['citation_count'] is not None else None
+    return row
+
+def export_papers(stream, path: str, format: str | None = None, batch_size: int = 10000):
+    # stream yields (source, papers) pairs like iter_papers, or single papers.
+    # format is 'jsonl', 'csv' or 'parquet', by default from the file extension
+    import os
+
+    if format is None:
+        format = os.path.splitext(path)[1].lstrip('.').lower() or 'jsonl'
+    writers = {'jsonl': _JsonlExportWriter, 'json': _JsonlExportWriter, 'ndjson': _JsonlExportWriter,
+               'csv': _CsvExportWriter, 'parquet': _ParquetExportWriter}
+    if format not in writers:
+        raise ValueError(f"Unknown export format: {format}")
+
+    writer = writers[format](path)
+    rows = []
+    written = 0
+    try:
+        for item in stream:
+            source, papers = item if isinstance(item, tuple) else (None, (item,))
+            for paper in papers:
+                rows.append(export_row(paper, source))
+                if len(rows) >= batch_size:
+                    writer.write_rows(rows)
+                    written += len(rows)
+                    rows = []
+        if rows:
+            writer.write_rows(rows)
+            written += len(rows)
+    finally:
+        writer.close()
+    return written
+
+class _JsonlExportWriter:
+    def __init__(self, path: str):
+        try:
+            import orjson
+            self.dumps = lambda row: orjson.dumps(row).decode('utf-8')
+        except ImportError:
+            import json
+            self.dumps = lambda row: json.dumps(row, ensure_ascii=False)
+        self.file = open(path, 'w', encoding='utf-8', buffering=1 << 20)
+
+    def write_rows(self, rows: list):
+        self.file.write(''.join(self.dumps(row) + '\n' for row in rows))
+
+    def close(self):
+        self.file.close()
+
+class _CsvExportWriter:
+    def __init__(self, path: str):
+        import csv
+        self.file = open(path, 'w', encoding='utf-8', newline='', buffering=1 << 20)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(EXPORT_COLUMNS)
+
+    def write_rows(self, rows: list):
+        # list fields are joined with "; "
+        self.writer.writerows(
+            ['; '.join(row[column]) if column in _EXPORT_LIST_FIELDS else row[column] for column in EXPORT_COLUMNS]
+            for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+class _ParquetExportWriter:
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+        fields = []
+        for column in EXPORT_COLUMNS:
+            if column in _EXPORT_LIST_FIELDS:
+                fields.append(pa.field(column, pa.list_(pa.string())))
+            elif column == 'citation_count':
+                fields.append(pa.field(column, pa.int64()))
+            elif column in ('source', 'citation_source'):
+                # a handful of distinct values
+                fields.append(pa.field(column, pa.dictionary(pa.int8(), pa.string())))
+            else:
+                fields.append(pa.field(column, pa.string()))
+        self.pa = pa
+        self.schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write_rows(self, rows: list):
+        columns = {column: [row[column] for row in rows] for column in EXPORT_COLUMNS}
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+# ================================
+# Full text (PDF download and text extraction)
+# ================================
+# add_full_texts() downloads papers' links['pdf'] with a few downloads per
+# host at a time, streaming each one to disk in chunks (never whole in
+# memory) and stopping at max_bytes. An interrupted download resumes from
+# its partial file with a Range request. Finished files are stored by the
+# sha256 of their content, so the same PDF linked from two sources is kept
+# once. Text is extracted in a process pool, with pypdf when it is installed
+# and a small stdlib reader otherwise, and cached by file hash.
+#
+#   <store>/objects/ab/abcdef....pdf    downloaded PDFs
+#   <store>/text/abcdef....txt          extracted text
+#   <store>/urls/<sha256 of url>        digest of the PDF at that URL
+#   <store>/partial/<sha256 of url>     downloads in progress
+# ================================
+PDF_MAX_BYTES = 50 * 1024 * 1024
+PDF_CHUNK_SIZE = 64 * 1024
+
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+def _host_semaphore(url: str, per_host: int):
+    import urllib.parse
+
+    host = urllib.parse.urlsplit(url).netloc.lower()
+    with _host_limits_lock:
+        semaphore = _host_limits.get((host, per_host))
+        if semaphore is None:
+            semaphore = _host_limits[(host, per_host)] = threading.BoundedSemaphore(per_host)
+    return semaphore
+
+def _store_path(store_dir: str, *parts: str):
+    import os
+    path = os.path.join(store_dir, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def _file_sha256(path: str):
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(PDF_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def download_pdf(url: str, store_dir: str, max_bytes: int = PDF_MAX_BYTES, per_host: int = 2):
+    # returns the stored file's path, or None when the download failed, was
+    # too large or was not a PDF
+    import hashlib
+    import os
+    import requests
+
+    url_key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    url_path = _store_path(store_dir, 'urls', url_key)
+    if os.path.exists(url_path):
+        with open(url_path, encoding='ascii') as f:
+            digest = f.read().strip()
+        path = _store_path(store_dir, 'objects', digest[:2], f"{digest}.pdf")
+        if os.path.exists(path):
+            return path
+
+    partial_path = _store_path(store_dir, 'partial', url_key)
+    offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+    headers = {'Range': f"bytes={offset}-"} if offset else {}
+    try:
+        with _host_semaphore(url, per_host):
+            with requests.get(url, headers=headers, stream=True,
+                              timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)) as response:
+                # 416: the partial file already holds the whole PDF
+                if response.status_code != 416:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        offset = 0  # the server ignored the Range header, start over
+                    length = response.headers.get('Content-Length')
+                    written = offset + int(length) if length else offset
+                    if written <= max_bytes:
+                        with open(partial_path, 'ab' if offset else 'wb') as f:
+                            written = offset
+                            for chunk in response.iter_content(PDF_CHUNK_SIZE):
+                                written += len(chunk)
+                                if written > max_bytes:
+                                    break
+                                f.write(chunk)
+                    if written > max_bytes:
+                        print(f"Skipping PDF over {max_bytes} bytes: {url}")
+                        _remove_partial(partial_path)
+                        return None
+    except requests.exceptions.RequestException as e:
+        # the partial file is kept so the next attempt resumes
+        print(f"HTTP Error downloading PDF {url}: {e}")
+        return None
+
+    with open(partial_path, 'rb') as f:
+        is_pdf = f.read(5) == b'%PDF-'
+    if not is_pdf:
+        print(f"Not a PDF: {url}")
+        _remove_partial(partial_path)
+        return None
+
+    digest = _file_sha256(partial_path)
+    path = _store_path(store_dir, 'objects', digest[:2], f"{digest}.pdf")
+    os.replace(partial_path, path)
+    tmp_path = f"{url_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='ascii') as f:
+        f.write(digest)
+    os.replace(tmp_path, url_path)
+    return path
+
+def _remove_partial(path: str):
+    import os
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def extract_pdf_text(path: str, store_dir: str | None = None):
+    # text of a stored PDF, cached under <store>/text by the file's hash
+    import os
+
+    cache_path = None
+    if store_dir:
+        digest = os.path.splitext(os.path.basename(path))[0]
+        if len(digest) != 64:
+            digest = _file_sha256(path)
+        cache_path = _store_path(store_dir, 'text', f"{digest}.txt")
+        if os.path.exists(cache_path):
+            with open(cache_path, encoding='utf-8') as f:
+                return f.read()
+
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        text = _extract_pdf_text_stdlib(path)
+    else:
+        # given a path PdfReader reads the whole file into memory; given an
+        # open file it seeks to objects as pages ask for them
+        with open(path, 'rb') as f:
+            reader = PdfReader(f)
+            text = '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+    if cache_path:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, cache_path)
+    return text
+
+# the stream keyword, not the tail of endstream
+_PDF_STREAM_RE = re.compile(rb'(?<!end)stream\r?\n')
+_PDF_TEXT_OP_RE = re.compile(rb'\((?:\\.|[^\\)])*\)\s*(?:Tj|\'|")|\[(?:\\.|[^\]\\])*\]\s*TJ|T\*|\bT[dD]\b|\bET\b')
+_PDF_STRING_RE = re.compile(rb'\((?:\\.|[^\\)])*\)')
+_PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+
+def _extract_pdf_text_stdlib(path: str):
+    # text-showing operators from the Flate or unfiltered content streams.
+    # Enough for simple text PDFs (like render_pdf_report's); the file is
+    # memory-mapped rather than read in
+    import mmap
+    import zlib
+
+    lines, current = [], []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for match in _PDF_STREAM_RE.finditer(data):
+            end = data.find(b'endstream', match.end())
+            if end < 0:
+                break
+            try:
+                content = zlib.decompressobj().decompress(data[match.end():end])
+            except zlib.error:
+                content = data[match.end():end]
+            for op in _PDF_TEXT_OP_RE.finditer(content):
+                token = op.group()
+                if token in (b'T*', b'Td', b'TD', b'ET') or token.endswith((b"'", b'"')):
+                    if current:
+                        lines.append(''.join(current))
+                        current = []
+                if token.endswith((b'Tj', b"'", b'"', b'TJ')):
+                    current.extend(_pdf_unescape(s.group()[1:-1]) for s in _PDF_STRING_RE.finditer(token))
+    if current:
+        lines.append(''.join(current))
+    return '\n'.join(line for line in lines if line.strip())
+
+def _pdf_unescape(raw: bytes):
+    out = bytearray()
+    i = 0
+    while i < len(raw):
+        byte = raw[i:i + 1]
+        if byte == b'\\' and i + 1 < len(raw):
+            escaped = raw[i + 1:i + 2]
+            octal = re.match(rb'[0-7]{1,3}', raw[i + 1:i + 4])
+            if octal:
+                out.append(int(octal.group(), 8) & 0xFF)
+                i += 1 + len(octal.group())
+                continue
+            out += _PDF_ESCAPES.get(escaped, escaped)
+            i += 2
+            continue
+        out += byte
+        i += 1
+    return out.decode('latin-1')
+
+def add_full_texts(papers: list, store_dir: str, workers: int = 8, per_host: int = 2,
+                   max_bytes: int = PDF_MAX_BYTES, parse_workers: int | None = None):
+    # sets paper['full_text'] for every paper whose PDF could be fetched;
+    # returns {'downloaded', 'failed', 'extracted'}
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+
+    urls = list(dict.fromkeys(paper['links']['pdf'] for paper in papers
+                              if (paper.get('links') or {}).get('pdf')))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        paths = dict(zip(urls, executor.map(lambda url: download_pdf(url, store_dir, max_bytes, per_host), urls)))
+
+    files = list(dict.fromkeys(path for path in paths.values() if path))
+    texts = {}
+    with process_pool(parse_workers or os.cpu_count() or 1) as executor:
+        futures = {path: executor.submit(extract_pdf_text, path, store_dir) for path in files}
+        for path, future in futures.items():
+            try:
+                texts[path] = future.result()
+            except Exception as e:
+                print(f"Error extracting text from {path}: {e}")
+
+    for paper in papers:
+        path = paths.get((paper.get('links') or {}).get('pdf'))
+        if path in texts:
+            paper['full_text'] = texts[path]
+    return {
+        'downloaded': len(files),
+        'failed': sum(1 for path in paths.values() if not path),
+        'extracted': len(texts),
+    }
+
+# ================================
+# Display the Data (PDF reports)
+# ================================
+# Reports are written page by page straight from the paper stream: each page
+# is compressed and written as soon as it is full, so memory stays bounded no
+# matter how many papers a professor has. Only the byte offsets of the PDF
+# objects are kept until the end. Uses the built-in Helvetica fonts, so no
+# font files or PDF libraries are needed.
+#
+# Papers are rendered in the order they are given; sort them recent to oldest
+# before passing them in.
+# ================================
+PDF_PAGE_WIDTH = 612   # US Letter, in points
+PDF_PAGE_HEIGHT = 792
+PDF_MARGIN = 54
+ARXIV_ACKNOWLEDGEMENT = "Thank you to arXiv for use of its open access interoperability."
+
+# Character widths (1/1000 em) for printable ASCII, from the standard Adobe AFM files
+_HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_HELVETICA_BOLD_WIDTHS = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+
+@functools.lru_cache(maxsize=None)
+def _pdf_font_metrics(font: str):
+    # width table per font, built once per process and shared by every report
+    widths = _HELVETICA_BOLD_WIDTHS if font == 'F2' else _HELVETICA_WIDTHS
+    return {chr(32 + i): w for i, w in enumerate(widths)}
+
+@functools.lru_cache(maxsize=4096)
+def _pdf_text_width(text: str, font: str, size: float):
+    metrics = _pdf_font_metrics(font)
+    return sum(metrics.get(c, 556) for c in text) * size / 1000
+
+@functools.lru_cache(maxsize=None)
+def _pdf_page_template(width: int, height: int, margin: int):
+    # the parts of every page that never change: the header rule and the
+    # footer with the arXiv acknowledgement. Page number and running title are
+    # filled into the footer with % formatting
+    header = f"0.6 w {margin} {height - margin + 8} m {width - margin} {height - margin + 8} l S\n".encode('ascii')
+    footer = (
+        f"0.6 w {margin} {margin - 8} m {width - margin} {margin - 8} l S\n"
+        f"BT /F1 8 Tf {margin} {margin - 22} Td ({_pdf_escape(ARXIV_ACKNOWLEDGEMENT)}) Tj ET\n"
+        f"BT /F1 8 Tf {margin} {height - margin + 14} Td (%s) Tj ET\n"
+        f"BT /F1 8 Tf {width - margin - 40} {margin - 22} Td (Page %d) Tj ET\n"
+    )
+    return header, footer
+
+def _pdf_escape(text: str):
+    import unicodedata
+
+    # the standard fonts only cover Latin-1; characters outside it are
+    # decomposed and stripped of their accents (o-double-acute -> o), and
+    # whatever still does not fit becomes '?'
+    folded = []
+    for char in text:
+        if ord(char) > 0xFF:
+            char = ''.join(part for part in unicodedata.normalize('NFKD', char)
+                           if not unicodedata.combining(part))
+        folded.append(char)
+    text = ''.join(folded).encode('latin-1', errors='replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def _pdf_wrap(text: str, font: str, size: float, max_width: float):
+    lines = []
+    line = ''
+    for word in text.split():
+        candidate = f"{line} {word}" if line else word
+        if _pdf_text_width(candidate, font, size) <= max_width:
+            line = candidate
+            continue
+        if line:
+            lines.append(line)
+        # a single word wider than the line gets hard-split
+        while _pdf_text_width(word, font, size) > max_width and len(word) > 1:
+            cut = len(word)
+            while cut > 1 and _pdf_text_width(word[:cut], font, size) > max_width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        line = word
+    if line:
+        lines.append(line)
+    return lines
+
+def _pdf_paper_lines(paper: dict, max_width: float):
+    # yields (font, size, text, space_before) for one paper entry
+    title = paper.get('title') or 'No title'
+    for i, line in enumerate(_pdf_wrap(title, 'F2', 11, max_width)):
+        yield 'F2', 11, line, 10 if i == 0 else 0
+
+    author_names = [a.get('name', '') if isinstance(a, dict) else str(a) for a in paper.get('authors', [])]
+    if len(author_names) > 8:
+        author_names = author_names[:8] + ['et al.']
+    if author_names:
+        for line in _pdf_wrap(', '.join(author_names), 'F1', 9, max_width):
+            yield 'F1', 9, line, 0
+
+    details = [str(paper.get('publication_date') or ''), str(paper.get('journal') or '')]
+    links = paper.get('links') or {}
+    for key, label in (('doi', 'DOI'), ('arxiv_id', 'arXiv'), ('pmid', 'PMID')):
+        if links.get(key):
+            details.append(f"{label}: {links[key]}")
+    if paper.get('citation_count') is not None:
+        details.append(f"Citations: {paper['citation_count']}")
+    for line in _pdf_wrap('  |  '.join(d for d in details if d), 'F1', 9, max_width):
+        yield 'F1', 9, line, 0
+
+    abstract = paper.get('abstract') or ''
+    if len(abstract) > 1200:
+        abstract = abstract[:1200].rsplit(' ', 1)[0] + ' ...'
+    for line in _pdf_wrap(abstract, 'F1', 9, max_width):
+        yield 'F1', 9, line, 0
+
+def render_pdf_report(professor: dict, papers, path: str):
+    import zlib
+
+    width, height, margin = PDF_PAGE_WIDTH, PDF_PAGE_HEIGHT, PDF_MARGIN
+    header, footer = _pdf_page_template(width, height, margin)
+    running_title = _pdf_escape(f"{professor.get('name', '')} - {professor.get('school') or ''}".strip(' -'))
+    max_width = width - 2 * margin
+
+    # object 1 is the catalog, 2 the page tree (written last, once every page
+    # is known), 3 and 4 the fonts; pages start at 5
+    offsets = {}
+    page_ids = []
+    next_id = 5
+
+    with open(path, 'wb') as f:
+        def write_object(obj_id: int, body: bytes):
+            offsets[obj_id] = f.tell()
+            f.write(f"{obj_id} 0 obj\n".encode('ascii') + body + b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        write_object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+        page_ops = []
+        y = height - margin
+
+        def flush_page():
+            nonlocal next_id, page_ops, y
+            page_number = len(page_ids) + 1
+            content = header + b''.join(page_ops) + (footer % (running_title, page_number)).encode('latin-1')
+            content = zlib.compress(content)
+            content_id, page_id = next_id, next_id + 1
+            next_id += 2
+            write_object(content_id, f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode('ascii')
+                         + content + b"\nendstream")
+            write_object(page_id, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] "
+                f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>"
+            ).encode('ascii'))
+            page_ids.append(page_id)
+            page_ops = []
+            y = height - margin
+
+        def emit(font: str, size: float, text: str, space_before: float = 0):
+            nonlocal y
+            leading = size * 1.3
+            if y - space_before - leading < margin:
+                flush_page()
+            elif page_ops:
+                y -= space_before
+            y -= leading
+            page_ops.append(f"BT /{font} {size} Tf {margin} {y:.2f} Td ({_pdf_escape(text)}) Tj ET\n".encode('latin-1'))
+
+        emit('F2', 18, f"Research Profile: {professor.get('name', '')}")
+        if professor.get('school'):
+            emit('F1', 12, professor['school'])
+
+        count = 0
+        for paper in papers:
+            count += 1
+            for font, size, text, space_before in _pdf_paper_lines(paper, max_width):
+                emit(font, size, text, space_before)
+        if count == 0:
+            emit('F1', 11, "No papers found.", 10)
+        flush_page()
+
+        kids = ' '.join(f"{page_id} 0 R" for page_id in page_ids)
+        write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode('ascii'))
+
+        xref_offset = f.tell()
+        f.write(f"xref\n0 {next_id}\n0000000000 65535 f \n".encode('ascii'))
+        for obj_id in range(1, next_id):
+            f.write(f"{offsets[obj_id]:010d} 00000 n \n".encode('ascii'))
+        f.write(f"trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode('ascii'))
+
+    return {'path': path, 'pages': len(page_ids), 'papers': count}
+
+def _report_filename(professor: dict):
+    import re
+    slug = re.sub(r'[^a-z0-9]+', '-', f"{professor.get('name', '')} {professor.get('school') or ''}".lower())
+    return (slug.strip('-') or 'professor') + '.pdf'
+
+def _render_report_job(professor: dict, papers: list, out_dir: str):
+    import os
+    return render_pdf_report(professor, papers, os.path.join(out_dir, _report_filename(professor)))
+
+def render_pdf_reports(jobs, out_dir: str, workers: int | None = None):
+    # jobs is an iterable of (professor, papers) pairs. Reports are rendered in
+    # a process pool; only a few jobs are in flight at once so a roster-wide
+    # generator is never pulled into memory all at once
+    import os
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    results = []
+    with process_pool(workers) as executor:
+        in_flight = set()
+        for professor, papers in jobs:
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                results.extend(_collect_report(future) for future in done)
+            if not isinstance(papers, (list, tuple)):
+                # generators cannot be pickled to a worker
+                papers = list(papers)
+            in_flight.add(executor.submit(_render_report_job, professor, papers, out_dir))
+        for future in in_flight:
+            results.append(_collect_report(future))
+    return [result for result in results if result]
+
+def _collect_report(future):
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"Error rendering report: {e}")
+        return None
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Research Paper Helper")
+    commands = parser.add_subparsers(dest='command', required=True)
+    reparse = commands.add_parser('reparse', help="rebuild papers from an archive of raw responses")
+    reparse.add_argument('archive', help="directory given to set_response_archive")
+    reparse.add_argument('--out', default='papers.jsonl', help="one line per lookup: name, school and papers")
+    reparse.add_argument('--workers', type=int, default=None, help="parse processes (default: CPU count)")
+    reparse.add_argument('--source', action='append', choices=PAPER_SOURCES, help="only re-parse these sources")
+    export = commands.add_parser('export', help="harvest a professor's papers into a JSONL, CSV or Parquet file")
+    export.add_argument('name')
+    export.add_argument('--school', default=None)
+    export.add_argument('--out', default='papers.jsonl', help="format is taken from the extension")
+    export.add_argument('--level', choices=('full', 'metadata'), default='full')
+    args = parser.parse_args()
+
+    if args.command == 'reparse':
+        lookups = reparse_archive(args.archive, workers=args.workers, sources=args.source)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            for (name, school), papers in lookups.items():
+                f.write(json.dumps({'name': name, 'school': school, 'papers': papers}) + '\n')
+        print(f"Re-parsed {sum(len(papers) for papers in lookups.values())} papers "
+              f"for {len(lookups)} lookups into {args.out}")
+    elif args.command == 'export':
+        written = export_papers(iter_papers(args.name, args.school, level=args.level), args.out)
+        print(f"Exported {written} papers to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+# Local HTTP service around RPHelper
+#
+# Lookups are queued onto a bounded worker pool and answered with a job ID.
+# Clients poll the job for progress, or stream it to get papers as each
+# source finishes. Finished lookups are cached so repeats return at once.
+#
+# Endpoints:
+# - POST /lookups              body {"name": str, "school": str}
+#                              202 {"job_id": ...}, or 503 when the queue is full
+# - GET  /jobs/<id>            status, progress and the papers found so far
+#                              (progress lists sources cut short by --lookup-budget)
+# - GET  /jobs/<id>/stream     newline-delimited JSON, one line per paper
+# - GET  /metrics              RPHelper counters and timings (profile cache, ...)
+#
+# Run with:
+#   python RPService.py --port 8765 --workers 4 --queue-size 32
+
+import json
+import queue
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import RPHelper
+
+def create_service(workers: int = 4, queue_size: int = 32, source_workers: int = 1,
+                   cache_ttl: float = 3600, max_jobs: int = 1000, lookup_budget: float | None = None):
+    service = {
+        'jobs': {},
+        'active': {},  # lookup key -> job id of a queued/running job
+        'cache': {},   # lookup key -> (finished_at, papers)
+        'lock': threading.Lock(),
+        'queue': queue.Queue(maxsize=queue_size),
+        'source_workers': source_workers,
+        'cache_ttl': cache_ttl,
+        'max_jobs': max_jobs,
+        'lookup_budget': lookup_budget,
+        'workers': [],
+    }
+    for i in range(workers):
+        t = threading.Thread(target=_worker_loop, args=(service,), name=f"rp-worker-{i}", daemon=True)
+        t.start()
+        service['workers'].append(t)
+    return service
+
+def lookup_key(name: str, school: str | None):
+    return ((name or '').strip().lower(), (school or '').strip().lower())
+
+def _new_job(name: str, school: str | None, status: str):
+    return {
+        'id': uuid.uuid4().hex,
+        'name': name,
+        'school': school,
+        'status': status,
+        'cached': False,
+        'sources_done': [],
+        'completeness': {},  # source -> False when the lookup budget cut it short
+        'papers': [],
+        'error': None,
+        'created': time.time(),
+        'finished': None,
+        'cond': threading.Condition(),
+    }
+
+def submit_lookup(service: dict, name: str, school: str | None):
+    # returns (job, accepted); accepted is False when the queue is full
+    key = lookup_key(name, school)
+    with service['lock']:
+        # repeat lookup: serve from cache
+        cached = service['cache'].get(key)
+        if cached and time.time() - cached[0] < service['cache_ttl']:
+            job = _new_job(name, school, 'done')
+            job['cached'] = True
+            job['papers'] = list(cached[1])
+            job['sources_done'] = list(RPHelper.PAPER_SOURCES)
+            job['finished'] = time.time()
+            _store_job(service, job)
+            return job, True
+
+        # identical lookup already queued or running: hand out the same job
+        active_id = service['active'].get(key)
+        if active_id is not None:
+            return service['jobs'][active_id], True
+
+        job = _new_job(name, school, 'queued')
+        try:
+            service['queue'].put_nowait(job)
+        except queue.Full:
+            return None, False
+        service['active'][key] = job['id']
+        _store_job(service, job)
+        return job, True
+
+def _store_job(service: dict, job: dict):
+    # keep memory bounded by dropping the oldest finished jobs
+    service['jobs'][job['id']] = job
+    if len(service['jobs']) > service['max_jobs']:
+        finished = [j for j in service['jobs'].values() if j['status'] in ('done', 'failed')]
+        finished.sort(key=lambda j: j['finished'])
+        for old in finished[:len(service['jobs']) - service['max_jobs']]:
+            del service['jobs'][old['id']]
+
+def _worker_loop(service: dict):
+    while True:
+        job = service['queue'].get()
+        try:
+            _run_job(service, job)
+        finally:
+            service['queue'].task_done()
+
+def _run_job(service: dict, job: dict):
+    key = lookup_key(job['name'], job['school'])
+    with job['cond']:
+        job['status'] = 'running'
+        job['cond'].notify_all()
+    # the harvest fills its own status dict; the job gets a copy under the
+    # lock, so job_summary never sees it change mid-read
+    completeness = {}
+    error = None
+    try:
+        for source, papers in RPHelper.iter_papers(job['name'], job['school'],
+                                                   max_workers=service['source_workers'],
+                                                   budget=service['lookup_budget'],
+                                                   status=completeness):
+            with job['cond']:
+                job['papers'].extend(papers)
+                job['sources_done'].append(source)
+                job['completeness'] = dict(completeness)
+                job['cond'].notify_all()
+        status = 'done'
+    except Exception as e:
+        print(f"Error running lookup {job['id']}: {e}")
+        error = str(e)
+        status = 'failed'
+    completeness = dict(completeness)
+
+    with service['lock']:
+        # partial results are not cached, the next lookup gets another try
+        if status == 'done' and all(completeness.values()):
+            _store_cached(service, key, list(job['papers']))
+        service['active'].pop(key, None)
+    with job['cond']:
+        job['completeness'] = completeness
+        job['error'] = error
+        job['status'] = status
+        job['finished'] = time.time()
+        job['cond'].notify_all()
+
+def _store_cached(service: dict, key: tuple, papers: list):
+    # called with service['lock'] held. Expired entries are dropped here:
+    # reads only skip them, so without this the cache would only grow
+    now = time.time()
+    expired = [k for k, (finished_at, _) in service['cache'].items() if now - finished_at >= service['cache_ttl']]
+    for k in expired:
+        del service['cache'][k]
+    service['cache'][key] = (now, papers)
+
+def job_summary(job: dict, include_papers: bool = True):
+    with job['cond']:
+        summary = {
+            'job_id': job['id'],
+            'name': job['name'],
+            'school': job['school'],
+            'status': job['status'],
+            'cached': job['cached'],
+            'progress': {
+                'sources_done': list(job['sources_done']),
+                'sources_total': len(RPHelper.PAPER_SOURCES),
+                'incomplete_sources': [source for source, complete in job['completeness'].items() if not complete],
+            },
+            'paper_count': len(job['papers']),
+            'error': job['error'],
+        }
+        if include_papers:
+            summary['papers'] = list(job['papers'])
+    return summary
+
+def iter_job_papers(job: dict, timeout: float = 30.0):
+    # yields papers as they are added to the job until it finishes
+    sent = 0
+    while True:
+        with job['cond']:
+            while sent == len(job['papers']) and job['status'] in ('queued', 'running'):
+                if not job['cond'].wait(timeout):
+                    break
+            new_papers = job['papers'][sent:]
+            finished = job['status'] not in ('queued', 'running')
+        for paper in new_papers:
+            yield paper
+        sent += len(new_papers)
+        if finished and sent == len(job['papers']):
+            return
+
+class LookupHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/lookups':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {'error': 'invalid JSON body'})
+            return
+        if not isinstance(body, dict):
+            self._send_json(400, {'error': 'body must be a JSON object'})
+            return
+        name, school = body.get('name'), body.get('school')
+        if not isinstance(name, str) or not name.strip():
+            self._send_json(400, {'error': 'name is required'})
+            return
+        if school is not None and not isinstance(school, str):
+            self._send_json(400, {'error': 'school must be a string'})
+            return
+
+        job, accepted = submit_lookup(self.server.service, name, school)
+        if not accepted:
+            # backpressure: tell the client to come back later
+            self._send_json(503, {'error': 'lookup queue is full'}, {'Retry-After': '5'})
+            return
+        status = 200 if job['status'] == 'done' else 202
+        self._send_json(status, job_summary(job, include_papers=False))
+
+    def do_GET(self):
+        parts = [p for p in self.path.split('?')[0].split('/') if p]
+        if parts == ['metrics']:
+            self._send_json(200, RPHelper.metrics_snapshot())
+            return
+        if len(parts) < 2 or parts[0] != 'jobs':
+            self._send_json(404, {'error': 'not found'})
+            return
+        job = self.server.service['jobs'].get(parts[1])
+        if job is None:
+            self._send_json(404, {'error': 'unknown job'})
+            return
+
+        if len(parts) == 2:
+            self._send_json(200, job_summary(job))
+        elif len(parts) == 3 and parts[2] == 'stream':
+            self._stream_job(job)
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def _stream_job(self, job: dict):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write_chunk(data: bytes):
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+        for paper in iter_job_papers(job):
+            write_chunk(json.dumps({'paper': paper}).encode('utf-8') + b"\n")
+        write_chunk(json.dumps(job_summary(job, include_papers=False)).encode('utf-8') + b"\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+def create_server(host: str = '127.0.0.1', port: int = 8765, **service_options):
+    server = ThreadingHTTPServer((host, port), LookupHandler)
+    server.daemon_threads = True
+    server.service = create_service(**service_options)
+    return server
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Research Paper Helper lookup service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=4, help="lookups harvested at the same time")
+    parser.add_argument('--queue-size', type=int, default=32, help="lookups waiting before new ones are rejected")
+    parser.add_argument('--source-workers', type=int, default=1, help="sources queried at the same time per lookup")
+    parser.add_argument('--cache-ttl', type=float, default=3600, help="seconds a finished lookup is served from cache")
+    parser.add_argument('--lookup-budget', type=float, default=None,
+                        help="seconds a lookup may take before returning partial results")
+    parser.add_argument('--hedge', action='store_true', help="duplicate GETs that run past the host's p95 latency")
+    args = parser.parse_args()
+
+    RPHelper.set_request_hedging(args.hedge)
+    server = create_server(args.host, args.port, workers=args.workers, queue_size=args.queue_size,
+                           source_workers=args.source_workers, cache_ttl=args.cache_ttl,
+                           lookup_budget=args.lookup_budget)
+    print(f"Serving lookups on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
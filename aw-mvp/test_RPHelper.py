@@ -20,9 +20,1019 @@ def test_get_papers_from_crossref():
     papers = RPHelper.get_papers_from_crossref(name="Pingkun Yan")
     print(papers)
 
+def test_single_flight_coalesces_concurrent_calls():
+    import threading
+    import time
+
+    calls = []
+    results = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return "response"
+
+    def worker():
+        results.append(RPHelper.single_flight(("test", "same-key"), slow_fetch))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["response"] * 8
+
+def test_get_papers_coalesces_only_matching_unscheduled_lookups(monkeypatch):
+    import threading
+    import time
+
+    harvests = []
+
+    def fake_harvest_papers(name, school, limit, level, budget, scheduler, domain):
+        harvests.append((domain, scheduler))
+        time.sleep(0.2)
+        return [{"title": "Deep Learning for CT", "authors": [{"name": name}]}], {}
+
+    monkeypatch.setattr(RPHelper, "_harvest_papers", fake_harvest_papers)
+    query = {"name": "Pingkun Yan", "school": None}
+    calls = [(query, None), (query, None), (dict(query, domain="cs"), None), (query, "scheduler")]
+    results = [None] * len(calls)
+
+    def worker(i):
+        results[i] = RPHelper.get_papers(calls[i][0], scheduler=calls[i][1])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(calls))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # the two plain lookups share a harvest; other domains and scheduled lookups run their own
+    assert sorted(harvests, key=str) == sorted([(None, None), ("cs", None), (None, "scheduler")], key=str)
+    results[0][0]["title"] = "Edited"
+    assert results[1][0]["title"] == "Deep Learning for CT"
+
+def test_normalize_url():
+    a = RPHelper.normalize_url("HTTPS://API.Crossref.org/works?rows=20&query.author=Pingkun+Yan")
+    b = RPHelper.normalize_url("https://api.crossref.org/works", {"query.author": "Pingkun Yan", "rows": 20})
+    assert a == b
+
+CROSSREF_PAGE = b"""{
+    "status": "ok",
+    "message": {
+        "total-results": 1,
+        "items": [{
+            "DOI": "10.1000/example",
+            "title": ["Deep Learning for CT"],
+            "author": [{"given": "Pingkun", "family": "Yan", "affiliation": [{"name": "Rensselaer Polytechnic Institute"}]}],
+            "published-print": {"date-parts": [[2023, 5, 1]]},
+            "container-title": ["Medical Image Analysis"],
+            "reference": [{"key": "ref1", "unstructured": "A long reference"}],
+            "license": [{"URL": "http://creativecommons.org/licenses/by/4.0/"}],
+            "funder": [{"name": "NIH", "award": ["R01"]}]
+        }]
+    }
+}"""
+
+def check_crossref_decode(data):
+    item = data["message"]["items"][0]
+    assert "reference" not in item and "license" not in item and "funder" not in item
+    assert "status" not in data
+    papers = RPHelper.parse_crossref_response(data, "Pingkun Yan", "Rensselaer")
+    assert papers[0]["publication_date"] == "2023-05-01"
+    assert papers[0]["links"]["doi"] == "10.1000/example"
+
+def test_decode_json_response_skips_unused_fields():
+    check_crossref_decode(RPHelper.decode_json_response(CROSSREF_PAGE, "crossref"))
+
+def test_decode_json_response_stdlib_fallback(monkeypatch):
+    import sys
+    monkeypatch.setitem(sys.modules, "msgspec", None)
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    check_crossref_decode(RPHelper.decode_json_response(CROSSREF_PAGE, "crossref"))
+
+ARXIV_PAGE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <entry>
+    <id>http://arxiv.org/abs/2301.00001v2</id>
+    <published>2023-01-01T00:00:00Z</published>
+    <title>Foundation Models for Medical Imaging</title>
+    <summary>We study foundation models.</summary>
+    <author><name>Pingkun Yan</name><arxiv:affiliation>Rensselaer Polytechnic Institute</arxiv:affiliation></author>
+    <category term="cs.CV"/>
+  </entry>
+  <entry>
+    <id>http://arxiv.org/abs/2301.00002v1</id>
+    <published>2023-01-02T00:00:00Z</published>
+    <title>Unrelated Paper</title>
+    <author><name>Someone Else</name></author>
+  </entry>
+</feed>"""
+
+def test_process_pool_parsing():
+    RPHelper.set_parse_workers(2)
+    try:
+        futures = [
+            RPHelper.submit_parse("arxiv", ARXIV_PAGE, "Pingkun Yan"),
+            RPHelper.submit_parse("crossref", CROSSREF_PAGE, "Pingkun Yan", "Rensselaer"),
+        ]
+        papers = RPHelper.collect_parsed(futures)
+    finally:
+        RPHelper.set_parse_workers(0)
+
+    assert [paper["title"] for paper in papers] == ["Foundation Models for Medical Imaging", "Deep Learning for CT"]
+
+def test_render_pdf_report_streams_pages(tmp_path):
+    papers = ({"title": f"Paper {i}", "authors": [{"name": "Pingkun Yan", "affiliation": ""}],
+               "publication_date": "2023-01-01", "journal": "Medical Image Analysis",
+               "abstract": "segmentation " * 80} for i in range(200))
+    result = RPHelper.render_pdf_report({"name": "Pingkun Yan", "school": "RPI"}, papers, str(tmp_path / "report.pdf"))
+
+    data = (tmp_path / "report.pdf").read_bytes()
+    assert data.startswith(b"%PDF-1.4") and data.rstrip().endswith(b"%%EOF")
+    assert result["papers"] == 200
+    assert result["pages"] > 1
+    assert data.count(b"/Type /Page ") == result["pages"]
+
+def test_pdf_escape_folds_accents_outside_latin1():
+    assert RPHelper._pdf_escape("Café Erdős Dvořák (2023)") == "Café Erdos Dvorák \\(2023\\)"
+    assert RPHelper._pdf_escape("東京") == "??"
+
+def test_summarize_professors_batches_and_caches(monkeypatch):
+    prompts = []
+
+    def backend(prompt):
+        prompts.append(prompt)
+        return RPHelper.local_summary_backend(prompt)
+
+    professors = [{"name": f"Professor {i}", "school": "RPI",
+                   "papers": [{"title": "Deep learning segmentation", "abstract": "Segmentation of CT images. " * 200,
+                               "categories": ["cs.CV"], "publication_date": "2023-01-01"}]}
+                  for i in range(6)]
+
+    profiles = RPHelper.summarize_professors(professors, backend=backend, token_budget=500, batch_token_budget=1200)
+    assert all(profile["research_domains"] == ["cs.CV"] for profile in profiles)
+    assert all(RPHelper.estimate_tokens(prompt) <= 1200 for prompt in prompts)
+    assert 1 < len(prompts) < len(professors)
+
+    # only the professor whose input changed is summarized again
+    prompts.clear()
+    professors[3]["papers"][0]["title"] = "Foundation models"
+    RPHelper.summarize_professors(professors, backend=backend, token_budget=500, batch_token_budget=1200)
+    assert len(prompts) == 1 and "Professor 3" in prompts[0] and "Professor 2" not in prompts[0]
+
+    # the in-memory cache keeps only the most recently used summaries
+    monkeypatch.setattr(RPHelper, "SUMMARY_MEMORY_CACHE_SIZE", 2)
+    professors[0]["papers"][0]["title"] = "Registration"
+    RPHelper.summarize_professors(professors, backend=backend, token_budget=500, batch_token_budget=1200)
+    assert len(RPHelper._summary_cache) == 2
+
+def test_summarize_professors_truncates_a_professor_over_the_batch_budget():
+    prompts = []
+
+    def backend(prompt):
+        prompts.append(prompt)
+        return RPHelper.local_summary_backend(prompt)
+
+    professor = {"name": "Professor Verbose", "school": "RPI",
+                 "keywords": [f"keyword{i}" for i in range(30)],
+                 "papers": [{"title": f"Paper {i}", "abstract": "Segmentation of CT images. " * 200,
+                             "categories": ["cs.CV"], "publication_date": f"202{i}-01-01"} for i in range(5)]}
+
+    for batch_token_budget in (400, 250):
+        prompts.clear()
+        [profile] = RPHelper.summarize_professors([professor], backend=backend, batch_token_budget=batch_token_budget)
+        assert len(prompts) == 1 and RPHelper.estimate_tokens(prompts[0]) <= batch_token_budget
+        assert profile["name"] == "Professor Verbose"
+
+def make_paper(title, authors, journal="Medical Image Analysis", categories=()):
+    return {"title": title, "journal": journal, "categories": list(categories),
+            "authors": [{"name": name, "affiliation": affiliation} for name, affiliation in authors]}
+
+def test_disambiguation_keeps_cluster_anchored_by_school():
+    rpi = "Rensselaer Polytechnic Institute, Troy, NY"
+    papers = [
+        make_paper("A", [("Pingkun Yan", rpi), ("Ge Wang", rpi)]),
+        make_paper("B", [("Yan, Pingkun", ""), ("Ge Wang", ""), ("Hanqing Chao", "")], journal="arXiv"),
+        make_paper("C", [("Pingkun Yan", ""), ("Hanqing Chao", "")], journal="arXiv"),
+        make_paper("D", [("Pingkun Yan", "Other University"), ("Li Zhang", "Other University")],
+                   categories=["cs.CV", "cs.AI", "cs.LG"]),
+        make_paper("E", [("Pingkun Yan", "Other University"), ("Li Zhang", "Other University")],
+                   journal="IEEE TMI", categories=["cs.CV", "cs.AI", "cs.LG"]),
+    ]
+    kept = RPHelper.disambiguate_papers(papers, "Pingkun Yan", "Rensselaer")
+    assert [paper["title"] for paper in kept] == ["A", "B", "C"]
+
+def test_disambiguation_scores_every_cluster_sharing_a_feature():
+    # A and B share only the venue and stay apart; C shares the venue with
+    # both, and the venue plus two categories with B, the later cluster
+    disambiguator = RPHelper.AuthorDisambiguator("Pingkun Yan")
+    disambiguator.add_papers([
+        make_paper("A", [("Pingkun Yan", ""), ("Ann Other", "")], journal="Radiology"),
+        make_paper("B", [("Pingkun Yan", ""), ("Ge Wang", "")], journal="Radiology", categories=["cs.CV", "eess.IV"]),
+        make_paper("C", [("Pingkun Yan", "")], journal="Radiology", categories=["cs.CV", "eess.IV"]),
+    ])
+    assert sorted(sorted(cluster) for cluster in disambiguator.clusters()) == [[0], [1, 2]]
+
+def test_collaboration_network_queries_and_updates():
+    network = RPHelper.CollaborationNetwork()
+    network.add_papers([
+        make_paper("A", [("Pingkun Yan", ""), ("Ge Wang", ""), ("Hanqing Chao", "")]),
+        make_paper("B", [("Pingkun Yan", ""), ("Ge Wang", "")]),
+        make_paper("B", [("Pingkun Yan", ""), ("Ge Wang", "")]),  # same paper again
+        make_paper("C", [("Ge Wang", ""), ("Bruno De Man", "")]),
+    ])
+    assert network.degree("Yan, Pingkun") == 2
+    assert network.top_coauthors("Pingkun Yan", k=1) == [("Ge Wang", 2)]
+    assert network.neighbourhood("Pingkun Yan", hops=1) == ["Ge Wang", "Hanqing Chao"]
+    assert network.neighbourhood("Pingkun Yan", hops=2) == ["Ge Wang", "Hanqing Chao", "Bruno De Man"]
+
+    network.add_papers([make_paper("D", [("Bruno De Man", ""), ("Hanqing Chao", "")])])
+    assert sorted(network.shared_coauthors("Pingkun Yan", "Bruno De Man")) == ["Ge Wang", "Hanqing Chao"]
+    assert network.shared_coauthor_counts(["Pingkun Yan", "Bruno De Man"]).tolist() == [[0, 2], [2, 0]]
+
+    # single-author queries see buffered papers before they are folded in;
+    # untitled papers without IDs are told apart by their authors
+    network.add_papers([make_paper("E", [("Pingkun Yan", ""), ("Hanqing Chao", "")]),
+                        make_paper("", [("Ana Lee", ""), ("Bo Chen", "")]),
+                        make_paper("", [("Ana Lee", ""), ("Cy Diaz", "")])])
+    assert network._pending and network.top_coauthors("Pingkun Yan") == [("Ge Wang", 2), ("Hanqing Chao", 2)]
+    assert network.shared_coauthor_counts(["Pingkun Yan", "Bruno De Man", "Nobody"]).tolist() == \
+        [[0, 2, 0], [2, 0, 0], [0, 0, 0]]
+    assert network._pending
+    assert network.degree("Ana Lee") == 2 and network.degree()[network.author_id("Ana Lee")] == 2
+
+def start_stand_in_server(handler_class):
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_enrich_citation_counts_batches_and_caches():
+    import json
+    import urllib.parse
+    from http.server import BaseHTTPRequestHandler
+
+    requests_seen = []
+
+    class CitationHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def reply(self, body):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            ids = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["ids"]
+            requests_seen.append(("s2", ids))
+            known = {"ARXIV:2301.00001": 12, "PMID:123": 7}
+            self.reply([{"citationCount": known[i]} if i in known else None for i in ids])
+
+        def do_GET(self):
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+            requests_seen.append(("crossref", query["filter"][0]))
+            self.reply({"message": {"items": [{"DOI": "10.1000/ABC", "is-referenced-by-count": 40}]}})
+
+    server, base_url = start_stand_in_server(CitationHandler)
+    papers = [
+        {"title": "A", "links": {"arxiv_id": "2301.00001v2"}},
+        {"title": "B", "links": {"pmid": "123"}},
+        {"title": "C", "links": {"doi": "https://doi.org/10.1000/abc"}},
+        {"title": "D", "links": {"doi": "10.1000/unknown"}},
+    ]
+    try:
+        stats = RPHelper.enrich_citation_counts(papers, s2_base_url=base_url, crossref_base_url=base_url)
+        assert stats["requests"] == 2
+        assert [paper.get("citation_count") for paper in papers] == [12, 7, 40, None]
+        assert papers[2]["citation_source"] == "crossref"
+        assert ("crossref", "doi:10.1000/abc,doi:10.1000/unknown") in requests_seen
+
+        # everything is cached now, misses included
+        stats = RPHelper.enrich_citation_counts(papers, s2_base_url=base_url, crossref_base_url=base_url)
+        assert stats["requests"] == 0
+        assert len(requests_seen) == 2
+    finally:
+        server.shutdown()
+
+def test_s2_citation_lookup_checks_body_and_deadline(monkeypatch):
+    import requests
+    import time
+    posts = []
+
+    def fake_post(url, params=None, json=None, timeout=None):
+        posts.append(timeout)
+        return FakeResponse(b'{"error": "Too many requests"}')
+
+    monkeypatch.setattr(requests, "post", fake_post)
+    assert RPHelper._fetch_s2_citation_counts(["PMID:123"], "http://s2.example") == {}
+    assert posts == [(RPHelper.HTTP_CONNECT_TIMEOUT, RPHelper.HTTP_READ_TIMEOUT)]
+
+    incomplete = set()
+    counts = RPHelper.run_with_deadline(time.monotonic() - 1, "citations", incomplete,
+                                        RPHelper._fetch_s2_citation_counts, ["PMID:123"], "http://s2.example")
+    assert counts == {} and len(posts) == 1 and incomplete == {"citations"}
+
+def test_normalize_abstract():
+    jats = ("<jats:title>Abstract</jats:title><jats:sec><jats:title>Purpose</jats:title>"
+            "<jats:p>We measure CO<jats:sub>2</jats:sub> &amp; O<sub>3</sub>&#160;levels.</jats:p></jats:sec>\n"
+            "<jats:sec><jats:title>Methods</jats:title><jats:p>Deep   learning.</jats:p></jats:sec>")
+    assert RPHelper.normalize_abstract(jats, markup=True) == "Purpose: We measure CO2 & O3 levels. Methods: Deep learning."
+    assert RPHelper.normalize_abstract("<p>Zenodo <b>bold</b>&nbsp;text</p><p>Second</p>", markup=True) == "Zenodo bold text Second"
+    assert RPHelper.normalize_abstract("<p>Mixed 3 : 1</p>", markup=True) == "Mixed 3 : 1"
+    # plain text keeps anything that looks like a tag
+    assert RPHelper.normalize_abstract("Plain arXiv\n  abstract, where a < b and c > d.") == "Plain arXiv abstract, where a < b and c > d."
+    assert RPHelper.normalize_abstract("For $k<n$ and $n>m$, a<b>c") == "For $k<n$ and $n>m$, a<b>c"
+    assert RPHelper.normalize_abstract(None) == ""
+
+def test_parse_pubmed_joins_structured_abstract():
+    xml = b"""<PubmedArticleSet><PubmedArticle>
+        <PMID>123</PMID>
+        <ArticleTitle>CT Reconstruction</ArticleTitle>
+        <Abstract>
+            <AbstractText Label="BACKGROUND">Low-dose <i>CT</i> is noisy.</AbstractText>
+            <AbstractText Label="RESULTS">Noise drops.</AbstractText>
+        </Abstract>
+        <AuthorList><Author><LastName>Yan</LastName><ForeName>Pingkun</ForeName></Author></AuthorList>
+    </PubmedArticle></PubmedArticleSet>"""
+    papers = RPHelper.parse_pubmed_response(xml, "Pingkun Yan")
+    assert papers[0]["abstract"] == "BACKGROUND: Low-dose CT is noisy. RESULTS: Noise drops."
+
+def test_dedup_uses_canonical_identifiers():
+    dedup = RPHelper.PaperDeduplicator()
+    assert dedup.add_paper({"links": {"arxiv_id": "2301.00001v1"}})
+    assert not dedup.add_paper({"links": {"arxiv_id": "2301.00001v3"}})
+    assert dedup.add_paper({"links": {"doi": "https://doi.org/10.1000/ABC", "pmid": "123"}})
+    assert not dedup.add_paper({"links": {"doi": "10.1000/abc"}})
+    assert not dedup.add_paper({"links": {"pmid": "123"}})
+    assert dedup.add_paper({"id": "123"}, "zenodo")
+    assert dedup.duplicates == 3 and dedup.unique == 3
+
+def test_dedup_with_bloom_front():
+    dedup = RPHelper.PaperDeduplicator(bloom_capacity=10000, exact=False)
+    new = [dedup.check_and_add([f"doi:10.1000/{i}"]) for i in range(5000)]
+    repeats = [dedup.check_and_add([f"doi:10.1000/{i}"]) for i in range(5000)]
+    assert sum(new) > 4990 and not any(repeats)
+
+def test_parsers_drop_duplicates_across_sources():
+    dedup = RPHelper.PaperDeduplicator()
+    assert len(RPHelper.parse_arxiv_response(ARXIV_PAGE, "Pingkun Yan", dedup)) == 1
+    assert RPHelper.parse_arxiv_response(ARXIV_PAGE, "Pingkun Yan", dedup) == []
+    crossref = RPHelper.decode_json_response(CROSSREF_PAGE, "crossref")
+    assert len(RPHelper.parse_crossref_response(crossref, "Pingkun Yan", None, dedup)) == 1
+    assert RPHelper.parse_crossref_response(crossref, "Pingkun Yan", None, dedup) == []
+
+PUBMED_SEARCH = b"<eSearchResult><IdList><Id>123</Id></IdList></eSearchResult>"
+PUBMED_FETCH = b"""<PubmedArticleSet><PubmedArticle>
+    <PMID>123</PMID>
+    <ArticleTitle>Deep Learning for CT</ArticleTitle>
+    <ELocationID EIdType="doi">10.1000/EXAMPLE</ELocationID>
+    <AuthorList><Author><LastName>Yan</LastName><ForeName>Pingkun</ForeName></Author></AuthorList>
+</PubmedArticle></PubmedArticleSet>"""
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+        self.text = content.decode()
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        import json
+        return json.loads(self.content)
+
+def fake_http_get(url, params=None, **kwargs):
+    if "arxiv" in url:
+        return FakeResponse(ARXIV_PAGE)
+    if "esearch" in url:
+        return FakeResponse(PUBMED_SEARCH)
+    if "efetch" in url:
+        return FakeResponse(PUBMED_FETCH)
+    if "crossref" in url:
+        return FakeResponse(CROSSREF_PAGE)
+    if "zenodo" in url:
+        return FakeResponse(b'{"hits": {"total": 0, "hits": []}}')
+    return FakeResponse(b'{"total": 0, "results": []}')
+
+def test_get_papers_drops_duplicates_across_sources(monkeypatch):
+    monkeypatch.setattr(RPHelper, "http_get", fake_http_get)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    papers = RPHelper.get_papers({"name": "Pingkun Yan", "school": None})
+    # the Crossref paper has the same DOI as the PubMed one
+    assert [paper["title"] for paper in papers] == ["Foundation Models for Medical Imaging", "Deep Learning for CT"]
+
+def test_normalize_publication_date():
+    assert RPHelper.normalize_publication_date("2023-05-01T00:00:00Z") == "2023-05-01"
+    assert RPHelper.normalize_publication_date("2023-May-7") == "2023-05-07"
+    assert RPHelper.normalize_publication_date("2023-5") == "2023-05-01"
+    assert RPHelper.normalize_publication_date(2021) == "2021-01-01"
+    assert RPHelper.normalize_publication_date("n.d.") == ""
+
+def zenodo_page(page, size, total=500):
+    import json
+    hits = []
+    for i in range((page - 1) * size, min(page * size, total)):
+        year, day = 2024 - i // 28, 28 - i % 28
+        hits.append({"id": i, "created": f"{year}-01-{day:02d}T12:00:00+00:00",
+                     "metadata": {"title": f"Record {i}", "publication_date": f"{year}-01-{day:02d}",
+                                  "creators": [{"name": "Yan, Pingkun"}]}})
+    return json.dumps({"hits": {"total": total, "hits": hits}}).encode()
+
+def test_top_n_dates_for_crossref_and_year_sorted_sources():
+    import json
+    items = [{"DOI": "10.1/a", "title": ["Online first"], "author": [{"given": "Pingkun", "family": "Yan"}],
+              "published": {"date-parts": [[2024, 3, 2]]}, "published-print": {"date-parts": [[2024, 9]]}},
+             {"DOI": "10.1/b", "title": ["Online only"], "author": [{"given": "Pingkun", "family": "Yan"}],
+              "published-online": {"date-parts": [[2023, 7, 1]]}}]
+    page = json.dumps({"message": {"items": items}}).encode()
+    papers = RPHelper.parse_raw_response("crossref", page, "Pingkun Yan")["papers"]
+    assert [paper["publication_date"] for paper in papers] == ["2024-03-02", "2023-07-01"]
+
+    top_n = RPHelper.TopNCollector(1)
+    assert not top_n.offer([{"title": "A", "publication_date": "2023-03-01"}], year_only=True)
+    # a year-sorted stream can still hold later 2023 papers
+    assert not top_n.offer([{"title": "B", "publication_date": "2023-01-01"}], year_only=True)
+    assert top_n.offer([{"title": "C", "publication_date": "2022-12-01"}], year_only=True)
+
+def test_json_total_results_reads_page_totals_without_parsing():
+    assert RPHelper.json_total_results(zenodo_page(1, 3, total=500), "zenodo") == 500
+    assert RPHelper.json_total_results(b'{"hits": {"hits": [], "total": {"value": 42}}}', "zenodo") == 42
+    assert RPHelper.json_total_results(b'{"total": 7, "results": [{"bibjson": {}}]}', "doaj") == 7
+    assert RPHelper.json_total_results(b'{"results": []}', "doaj") is None
+
+def test_top_n_stops_paging_early(monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    requested_pages = []
+
+    def fake_get(url, params=None, **kwargs):
+        requested_pages.append(params["page"])
+        return FakeResponse(zenodo_page(params["page"], params["size"]))
+
+    monkeypatch.setattr(RPHelper, "http_get", fake_get)
+    top_n = RPHelper.TopNCollector(5)
+    papers = RPHelper.get_papers_from_zenodo("Pingkun Yan", top_n=top_n)
+    # one page per strategy: the first page already fills the top 5
+    assert requested_pages == [1, 1]
+    assert [paper["title"] for paper in RPHelper.sort_papers_by_date(papers)[:5]] == [f"Record {i}" for i in range(5)]
+
+    requested_pages.clear()
+    RPHelper.get_papers_from_zenodo("Pingkun Yan")
+    assert requested_pages == [1, 2, 3, 4, 5, 1, 2, 3, 4, 5]
+
+def test_top_n_pages_zenodo_by_upload_time(monkeypatch):
+    import json
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+
+    # sort=mostrecent is upload order: an old paper uploaded last comes first,
+    # and the newest publications sit on later pages
+    uploads = [("Old upload", "2001-01-01", "2024-06-01"), ("Older upload", "2002-01-01", "2024-05-01"),
+               ("New paper", "2024-04-01", "2024-04-02"), ("Newer paper", "2024-04-15", "2024-04-16"),
+               ("Stale", "2020-01-01", "2020-01-02"), ("Staler", "2019-01-01", "2019-01-02")]
+    requested_pages = []
+
+    def fake_get(url, params=None, **kwargs):
+        page, size = params["page"], params["size"]
+        requested_pages.append(page)
+        hits = [{"id": title, "created": f"{uploaded}T00:00:00+00:00",
+                 "metadata": {"title": title, "publication_date": published, "creators": [{"name": "Yan, Pingkun"}]}}
+                for title, published, uploaded in uploads[(page - 1) * size:page * size]]
+        return FakeResponse(json.dumps({"hits": {"total": len(uploads), "hits": hits}}).encode())
+
+    monkeypatch.setattr(RPHelper, "http_get", fake_get)
+    papers = RPHelper.get_papers_from_zenodo("Pingkun Yan", top_n=RPHelper.TopNCollector(2))
+    assert [paper["title"] for paper in RPHelper.sort_papers_by_date(papers)[:2]] == ["Newer paper", "New paper"]
+    # paging stops once uploads are older than the second newest publication
+    assert requested_pages == [1, 2, 3, 1, 2, 3]
+
+PUBMED_SUMMARY = b"""{"result": {"uids": ["123"], "123": {"uid": "123", "title": "Deep Learning for CT",
+    "sortpubdate": "2023/05/01 00:00", "fulljournalname": "Medical Image Analysis",
+    "authors": [{"name": "Yan P", "authtype": "Author"}],
+    "articleids": [{"idtype": "pubmed", "value": "123"}, {"idtype": "doi", "value": "10.1000/EXAMPLE"}]}}}"""
+
+def test_metadata_harvest_hydrates_lazily(monkeypatch):
+    requested = []
+
+    def fake_get(url, params=None, **kwargs):
+        requested.append((url, params))
+        if "esummary" in url:
+            return FakeResponse(PUBMED_SUMMARY)
+        return fake_http_get(url, params)
+
+    monkeypatch.setattr(RPHelper, "http_get", fake_get)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    papers = RPHelper.get_papers_from_pubmed("Pingkun Yan", level="metadata")
+    assert [(p["title"], p["publication_date"], p["links"]["doi"]) for p in papers] == \
+        [("Deep Learning for CT", "2023-05-01", "10.1000/EXAMPLE")]
+    assert "abstract" not in papers[0] and not papers[0]["hydrated"]
+    assert not any("efetch" in url for url, params in requested)
+
+    crossref = RPHelper.get_papers_from_crossref("Pingkun Yan", level="metadata")
+    assert "select=" in requested[-1][0] and "abstract" not in crossref[0]
+
+    requested.clear()
+    RPHelper.hydrate_abstracts(papers + crossref)
+    assert papers[0]["hydrated"] and crossref[0]["hydrated"]
+    assert [url.rsplit("/", 1)[-1] for url, params in requested] == ["efetch.fcgi", "works"]
+    assert requested[1][1]["filter"] == "doi:10.1000/example"
+
+def test_hydrate_abstracts_keeps_records_fetched_before_a_failure(monkeypatch):
+    import requests
+
+    def fake_get(url, params=None, **kwargs):
+        if url.endswith("/bad"):
+            raise requests.exceptions.ConnectionError("reset")
+        if url.endswith("/truncated"):
+            return FakeResponse(b'{"bibjson": {"abstr')
+        if url.endswith("/list"):
+            return FakeResponse(b'[]')
+        return FakeResponse(b'{"bibjson": {"abstract": "Fetched."}, "metadata": {"description": "<p>Fetched.</p>"}}')
+
+    monkeypatch.setattr(RPHelper, "http_get", fake_get)
+    for source in ("doaj", "zenodo"):
+        papers = [{"id": record_id, "source": source, "hydrated": False}
+                  for record_id in ("good", "bad", "truncated", "list", "later")]
+        RPHelper.hydrate_abstracts(papers)
+        assert [paper.get("abstract") for paper in papers] == ["Fetched.", None, None, None, "Fetched."]
+
+def test_reparse_archive_rebuilds_papers_offline(monkeypatch, tmp_path):
+    monkeypatch.setattr(RPHelper, "http_get", fake_http_get)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    RPHelper.set_response_archive(str(tmp_path))
+    try:
+        harvested = RPHelper.get_papers_from_crossref("Pingkun Yan") + RPHelper.get_papers_from_arxiv("Pingkun Yan")
+        RPHelper.get_papers_from_arxiv("Pingkun Yan")
+    finally:
+        RPHelper.set_response_archive(None)
+
+    entries = list(RPHelper.iter_archive_index(str(tmp_path)))
+    assert [entry["source"] for entry in entries] == ["crossref", "arxiv", "arxiv"]
+    # both arXiv harvests got the same page, which is stored once
+    assert len(list(tmp_path.glob("objects/*/*.gz"))) == 2
+    assert RPHelper.load_archived_response(str(tmp_path), entries[0]["digest"]) == CROSSREF_PAGE
+
+    lookups = RPHelper.reparse_archive(str(tmp_path), workers=2)
+    assert [paper["title"] for paper in lookups[("Pingkun Yan", None)]] == [paper["title"] for paper in harvested]
+
+def test_reparse_archive_groups_a_lookup_across_sources(monkeypatch, tmp_path):
+    def fake_get(url, params=None, **kwargs):
+        if "arxiv" in url:
+            # the arXiv preprint of the Crossref paper
+            return FakeResponse(arxiv_feed([("2301.00003v1", "Deep Learning for CT")], 1).replace(
+                b"</title>", b"</title><arxiv:doi>10.1000/example</arxiv:doi>").replace(
+                b"<feed ", b'<feed xmlns:arxiv="http://arxiv.org/schemas/atom" '))
+        return fake_http_get(url, params)
+
+    monkeypatch.setattr(RPHelper, "http_get", fake_get)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    school = "Rensselaer Polytechnic Institute"
+    RPHelper.set_response_archive(str(tmp_path))
+    try:
+        dedup = RPHelper.PaperDeduplicator()
+        harvested = (RPHelper.get_papers_from_arxiv("Pingkun Yan", school, dedup)
+                     + RPHelper.get_papers_from_crossref("Pingkun Yan", school, dedup))
+    finally:
+        RPHelper.set_response_archive(None)
+
+    # the Crossref copy of the arXiv paper is dropped again on re-parse
+    lookups = RPHelper.reparse_archive(str(tmp_path), workers=1)
+    assert list(lookups) == [("Pingkun Yan", school)]
+    assert [paper["title"] for paper in lookups[("Pingkun Yan", school)]] == [paper["title"] for paper in harvested]
+    assert len(harvested) == 1
+
+def test_lookup_budget_returns_partial_results(monkeypatch):
+    import time
+
+    def fake_get(url, params, timeout, hedge=True):
+        if "eutils" in url:
+            time.sleep(0.5)  # a hung PubMed connection
+        return fake_http_get(url, params)
+
+    monkeypatch.setattr(RPHelper, "_timed_get", fake_get)
+    monkeypatch.setattr(RPHelper, "_arxiv_last_request", 0.0)
+    status = {}
+    papers = dict(RPHelper.iter_papers("Pingkun Yan", None, budget=0.3, status=status))
+    assert status == {"arxiv": True, "pubmed": False, "doaj": False, "zenodo": False, "crossref": False}
+    assert len(papers["arxiv"]) == 1
+
+def test_arxiv_request_not_sent_when_deadline_precedes_its_slot(monkeypatch):
+    import time
+    requested = []
+    monkeypatch.setattr(RPHelper, "http_get", lambda url, params=None, **kwargs: requested.append(url))
+    monkeypatch.setattr(RPHelper, "_arxiv_last_request", time.monotonic())
+    incomplete = set()
+    papers = RPHelper.run_with_deadline(time.monotonic() + 0.5, "arxiv", incomplete,
+                                        RPHelper.get_papers_from_arxiv, "Pingkun Yan")
+    assert papers == [] and requested == [] and incomplete == {"arxiv"}
+
+def test_hedged_get_uses_the_faster_request(monkeypatch):
+    import requests
+    import time
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append(timeout)
+        if len(calls) == 1:
+            time.sleep(1)  # the first request stalls past p95
+        return FakeResponse(b"{}")
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setattr(RPHelper, "_latency_samples", RPHelper.collections.defaultdict(list))
+    RPHelper._latency_samples["hedge.example"].extend([0.01] * RPHelper.HEDGE_MIN_SAMPLES)
+    RPHelper.set_request_hedging(True)
+    try:
+        start = time.monotonic()
+        RPHelper.http_get("http://hedge.example/works")
+        assert time.monotonic() - start < 0.5
+    finally:
+        RPHelper.set_request_hedging(False)
+    assert calls == [(RPHelper.HTTP_CONNECT_TIMEOUT, RPHelper.HTTP_READ_TIMEOUT)] * 2
+
+def test_department_sweep_packs_authors_and_routes_papers(monkeypatch):
+    requested = []
+
+    def fake_get(url, params=None, **kwargs):
+        requested.append(params)
+        return fake_http_get(url, params)
+
+    monkeypatch.setattr(RPHelper, "http_get", fake_get)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    roster = ["Pingkun Yan", "Someone Else", "Ge Wang"]
+    results = RPHelper.sweep_department(roster)
+    # one query per source for the whole roster, plus the PubMed efetch
+    assert len(requested) == 6
+    assert requested[0]["search_query"] == 'au:"Pingkun Yan" OR au:"Someone Else" OR au:"Ge Wang"'
+    assert [paper["title"] for paper in results["Pingkun Yan"]] == ["Foundation Models for Medical Imaging",
+                                                                      "Deep Learning for CT"]
+    assert [paper["title"] for paper in results["Someone Else"]] == ["Unrelated Paper"]
+    assert results["Ge Wang"] == []
+
+    index = RPHelper.build_roster_index(roster)
+    assert RPHelper.route_paper({"authors": [{"name": "Yan P"}, {"name": "Wang, Ge"}]}, index) == ["Pingkun Yan",
+                                                                                                  "Ge Wang"]
+    assert RPHelper.route_paper({"authors": [{"name": "Peng Yan"}]}, index) == []
+    assert [batch for batch, query in RPHelper.pack_author_terms(roster, str, max_authors=2)] == \
+        [["Pingkun Yan", "Someone Else"], ["Ge Wang"]]
+
+def test_department_sweep_filters_each_member_by_their_school(monkeypatch):
+    import json
+    items = [{"DOI": "10.1/joint", "title": ["Joint paper"], "published": {"date-parts": [[2023]]},
+              "author": [{"given": "Pingkun", "family": "Yan", "affiliation": [{"name": "Rensselaer Polytechnic Institute"}]},
+                         {"given": "Ge", "family": "Wang", "affiliation": [{"name": "MIT CSAIL"}]}]},
+             {"DOI": "10.1/carolina", "title": ["Carolina paper"], "published": {"date-parts": [[2023]]},
+              "author": [{"given": "Bruno", "family": "De Man", "affiliation": [{"name": "USC, Columbia, SC"}]}]}]
+    crossref_page = json.dumps({"message": {"total-results": 2, "items": items}}).encode()
+    affiliations = []
+
+    def fake_get(url, params=None, **kwargs):
+        if "crossref" in url:
+            affiliations.append(params.get("query.affiliation"))
+            return FakeResponse(crossref_page)
+        return fake_http_get(url, params)
+
+    monkeypatch.setattr(RPHelper, "http_get", fake_get)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    results = RPHelper.sweep_department([("Pingkun Yan", "RPI"), ("Ge Wang", "MIT"),
+                                         ("Bruno De Man", "University of Southern California")])
+    # one packed query per school; the joint paper reaches both coauthors
+    assert affiliations == ["RPI", "MIT", "University of Southern California"]
+    assert "Joint paper" in [paper["title"] for paper in results["Pingkun Yan"]]
+    assert [paper["title"] for paper in results["Ge Wang"]] == ["Joint paper"]
+    assert results["Bruno De Man"] == []
+
+def test_profile_cache_serves_stale_and_refreshes(monkeypatch, tmp_path):
+    import time
+    harvests = []
+
+    def fake_harvest_papers(name, school):
+        harvests.append(name)
+        return [{"title": f"Medical imaging paper {len(harvests)}"}], {}
+
+    monkeypatch.setattr(RPHelper, "_harvest_papers", fake_harvest_papers)
+    RPHelper.reset_metrics()
+    query = {"name": "Pingkun Yan"}
+    first = RPHelper.get_profile(query, cache_dir=str(tmp_path))
+    assert first["papers"][0]["title"] == "Medical imaging paper 1" and "medical" in first["keywords"]
+    # callers get copies of the cached profile
+    first["papers"][0]["title"] = "Edited"
+    assert RPHelper.get_profile(query)["stale"] is False
+    assert RPHelper.get_profile(query)["papers"][0]["title"] == "Medical imaging paper 1"
+
+    # past the soft TTL: served from cache at once, refreshed in the background
+    stale = RPHelper.get_profile(query, soft_ttl=0, cache_dir=str(tmp_path))
+    assert stale["stale"] and stale["papers"][0]["title"] == "Medical imaging paper 1"
+    for _ in range(100):
+        if len(harvests) == 2 and not RPHelper._profile_refreshes:
+            break
+        time.sleep(0.01)
+    RPHelper._profile_cache.clear()
+    assert RPHelper.get_profile(query, cache_dir=str(tmp_path))["papers"][0]["title"] == "Medical imaging paper 2"
+
+    metrics = RPHelper.metrics_snapshot()
+    assert metrics["counters"]["profile_cache.miss"] == 1
+    assert metrics["counters"]["profile_cache.stale"] == 1
+    assert metrics["timings"]["profile_cache.refresh"]["count"] == 2
+
+def test_profile_cache_shares_papers_until_read_and_skips_corrupt_files(monkeypatch, tmp_path):
+    import json
+    harvests = []
+
+    def fake_harvest_papers(name, school):
+        harvests.append(name)
+        return [{"title": f"Paper {i}", "authors": [{"name": name}]} for i in range(3)], {}
+
+    monkeypatch.setattr(RPHelper, "_harvest_papers", fake_harvest_papers)
+    RPHelper._profile_cache.clear()
+    query = {"name": "Pingkun Yan"}
+    key = RPHelper.profile_cache_key("Pingkun Yan", None)
+    (tmp_path / f"{key}.json").write_text('{"version": 1, "papers": [{"tit')
+    profile = RPHelper.get_profile(query, cache_dir=str(tmp_path))
+    assert harvests == ["Pingkun Yan"] and len(profile["papers"]) == 3
+
+    served = RPHelper.get_profile(query)
+    cached = RPHelper._profile_cache[key]["papers"]
+    # nothing is copied until a paper is read
+    assert all(list.__getitem__(served["papers"], i) is cached[i] for i in range(3))
+    for paper in served["papers"]:
+        paper["authors"].append({"name": "Edited"})
+    served["papers"].pop()["title"] = "Edited"
+    assert cached == fake_harvest_papers("Pingkun Yan", None)[0]
+    assert [paper["title"] for paper in json.loads(json.dumps(RPHelper.get_profile(query)["papers"]))] == \
+        ["Paper 0", "Paper 1", "Paper 2"]
+
+def test_export_papers_streams_rows_with_sources(tmp_path):
+    import csv
+    import json
+
+    cited = make_paper("Deep Learning for CT", [("Pingkun Yan", "RPI")])
+    cited["citation_count"], cited["citation_source"] = 12, "semantic_scholar"
+    stream = [("arxiv", [make_paper("Foundation Models", [("Pingkun Yan", "RPI"), ("Ge Wang", "")],
+                                      journal="arXiv")]),
+              ("pubmed", [cited])]
+
+    assert RPHelper.export_papers(iter(stream), str(tmp_path / "papers.jsonl"), batch_size=1) == 2
+    rows = [json.loads(line) for line in (tmp_path / "papers.jsonl").read_text().splitlines()]
+    assert rows[0]["authors"] == ["Pingkun Yan", "Ge Wang"] and rows[0]["source"] == "arxiv"
+    assert rows[0]["citation_count"] is None and rows[0]["citation_source"] is None
+    assert rows[1]["citation_count"] == 12 and rows[1]["citation_source"] == "semantic_scholar"
+
+    RPHelper.export_papers(iter(stream), str(tmp_path / "papers.csv"))
+    with open(tmp_path / "papers.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["authors"] == "Pingkun Yan; Ge Wang" and rows[1]["source"] == "pubmed"
+
+def test_export_papers_parquet(tmp_path):
+    import pytest
+
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    papers = [make_paper("Foundation Models", [("Pingkun Yan", "RPI")]), make_paper("Deep Learning for CT", [])]
+    RPHelper.export_papers([("arxiv", papers)], str(tmp_path / "papers.parquet"))
+    table = pq.read_table(tmp_path / "papers.parquet")
+    assert table.column("title").to_pylist() == ["Foundation Models", "Deep Learning for CT"]
+    assert table.column("authors").to_pylist() == [["Pingkun Yan"], []]
+    assert table.column("source").to_pylist() == ["arxiv", "arxiv"]
+    assert table.schema.field("citation_count").type == pa.int64()
+
+def test_term_trends_rising_and_fading():
+    def paper(title, year, categories=()):
+        return dict(make_paper(title, [], categories=categories), publication_date=f"{year}-01-01")
+
+    trends = RPHelper.TermTrends()
+    trends.add_papers([paper("Prostate segmentation with deep networks", 2016, ["Image Segmentation"]),
+                       paper("Segmentation of cardiac MRI", 2017),
+                       paper("Ultrasound segmentation", 2018)])
+    assert trends.top_terms(1) == [("segmentation", 3)]
+
+    # papers landing later extend the year range and vocabulary in place
+    trends.add_papers([paper("Foundation models for radiology", 2023),
+                       paper("Foundation models meet segmentation", 2024),
+                       paper("Foundation models meet segmentation", 2024)])
+    years, terms, counts = trends.matrix()
+    assert list(years) == list(range(2016, 2025)) and counts.shape == (9, len(terms))
+    assert list(trends.series("foundation models")) == [0] * 7 + [1, 1]
+    assert trends.rising(3, recent_years=2) == [("foundation", 1.0), ("foundation models", 1.0), ("models", 1.0)]
+    assert trends.fading(1, recent_years=2)[0][0] == "segmentation"
+
+    # folds inside the buffer's spare capacity update it in place
+    buffer = trends._count_buffer
+    trends.add_papers([paper("Segmentation revisited", 2019)])
+    assert trends.top_terms(1) == [("segmentation", 5)] and trends._count_buffer is buffer
+    trends.add_papers([paper("Early segmentation", 2010)])
+    assert trends.years()[0] == 2010 and list(trends.series("segmentation"))[:7] == [1, 0, 0, 0, 0, 0, 1]
+
+def test_classify_domains_from_categories():
+    papers = [make_paper("A", [], categories=["cs.CV", "eess.IV"]),
+              make_paper("B", [], categories=["Tomography, X-Ray Computed", "Humans"]),
+              make_paper("C", [], categories=["Radiology, Nuclear Medicine and imaging"]),
+              make_paper("D", [], categories=["math.OC"]),
+              make_paper("E", [])]
+    domains = RPHelper.classify_domains(papers, top_k=3)
+    assert [d["domain"] for d in domains] == ["Medicine", "Medical Imaging", "Mathematics"]
+    assert domains[1] == {"domain": "Medical Imaging", "parent": "Medicine", "score": 0.5, "confidence": 0.5,
+                          "papers": 2}
+    assert RPHelper.classify_domains([make_paper("E", [])]) == []
+
+def test_affiliation_matcher_resolves_aliases():
+    matcher = RPHelper.AffiliationMatcher(["RPI", "Massachusetts Institute of Technology", "University of Rochester"])
+    assert matcher.match("Dept. of BME, Rensselaer Polytechnic Institute, Troy, NY; MIT CSAIL") == \
+        ("Rensselaer Polytechnic Institute", "Massachusetts Institute of Technology")
+    assert matcher.match("Center for Imaging Science, Univ. of Rochester") == ()
+    assert matcher.match("University of Rochester Medical Center") == ("University of Rochester",)
+    # whole words only
+    assert not matcher.mentions("Sharpie Labs, Summit NJ")
+    hits = RPHelper._scan_affiliation.cache_info().hits
+    matcher.match("University of Rochester Medical Center")
+    assert RPHelper._scan_affiliation.cache_info().hits == hits + 1
+    # acronyms other schools share only count with a qualifier
+    usc = RPHelper.AffiliationMatcher(["University of Southern California"])
+    assert not usc.mentions("Dept. of Chemistry, USC, Columbia, SC")
+    assert usc.mentions("USC Viterbi School of Engineering, Los Angeles, CA")
+
+    crossref = RPHelper.decode_json_response(CROSSREF_PAGE, "crossref")
+    assert len(RPHelper.parse_crossref_response(crossref, "Pingkun Yan", "RPI")) == 1
+    assert RPHelper.parse_crossref_response(crossref, "Pingkun Yan", "MIT") == []
+
+def test_add_full_texts_downloads_resumes_and_extracts(tmp_path):
+    import hashlib
+    from http.server import BaseHTTPRequestHandler
+
+    report = tmp_path / "report.pdf"
+    RPHelper.render_pdf_report({"name": "Pingkun Yan", "school": "RPI"},
+                               [make_paper("Deep Learning for CT", [("Pingkun Yan", "RPI")])], str(report))
+    pdf = report.read_bytes()
+    ranges = []
+
+    class FileHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            body = pdf if self.path.endswith(".pdf") else b"<html>not a pdf</html>"
+            start = int(self.headers.get("Range", "bytes=0-")[len("bytes="):].rstrip("-"))
+            ranges.append(start)
+            self.send_response(206 if start else 200)
+            self.send_header("Content-Length", str(len(body) - start))
+            self.end_headers()
+            self.wfile.write(body[start:])
+
+    server, base_url = start_stand_in_server(FileHandler)
+    store = tmp_path / "store"
+    papers = [{"title": "A", "links": {"pdf": f"{base_url}/a.pdf"}},
+              {"title": "B", "links": {"pdf": f"{base_url}/landing"}},
+              {"title": "C", "links": {}}]
+    try:
+        # half of a.pdf is already on disk from an interrupted run
+        partial = store / "partial" / hashlib.sha256(f"{base_url}/a.pdf".encode()).hexdigest()
+        partial.parent.mkdir(parents=True)
+        partial.write_bytes(pdf[:len(pdf) // 2])
+
+        stats = RPHelper.add_full_texts(papers, str(store), parse_workers=1)
+        assert stats == {"downloaded": 1, "failed": 1, "extracted": 1}
+        assert sorted(ranges) == [0, len(pdf) // 2]
+        assert "Deep Learning for CT" in papers[0]["full_text"] and "full_text" not in papers[1]
+        assert (store / "objects" / hashlib.sha256(pdf).hexdigest()[:2]).is_dir()
+
+        # already stored: no new requests, text comes from the cache
+        ranges.clear()
+        RPHelper.add_full_texts(papers[:1], str(store), parse_workers=1)
+        assert ranges == []
+        assert RPHelper.download_pdf(f"{base_url}/b.pdf", str(store / "small"), max_bytes=100) is None
+    finally:
+        server.shutdown()
+
+def test_extract_pdf_text_stdlib_reads_each_stream_once(tmp_path):
+    pdf = tmp_path / "plain.pdf"
+    pdf.write_bytes(b"%PDF-1.4\n"
+                    b"4 0 obj\n<< /Length 22 >>\nstream\nBT (Hello) Tj ET\nendstream\nendobj\n"
+                    b"5 0 obj\n<< /Length 22 >>\nstream\nBT (World) Tj ET\nendstream\nendobj\n%%EOF\n")
+    assert RPHelper._extract_pdf_text_stdlib(str(pdf)) == "Hello\nWorld"
+
+def arxiv_feed(entries, total):
+    body = "".join(f"<entry><id>http://arxiv.org/abs/{arxiv_id}</id><title>{title}</title>"
+                   f"<author><name>Pingkun Yan</name></author></entry>" for arxiv_id, title in entries)
+    return (f'<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+            f'<opensearch:totalResults>{total}</opensearch:totalResults>{body}</feed>').encode()
+
+def test_arxiv_pages_with_start_and_collapses_versions(monkeypatch):
+    sleeps = []
+    requested = []
+
+    def fake_get(url, params=None, **kwargs):
+        requested.append(params)
+        if "id_list" in params:
+            return FakeResponse(arxiv_feed([("2301.00001v1", "Old title"), ("2301.00001v3", "New title"),
+                                            ("2301.00002v1", "Other")], 2))
+        start = params["start"]
+        return FakeResponse(arxiv_feed([(f"2301.{i:05d}v1", f"Paper {i}") for i in range(start, min(start + 2, 5))], 5))
+
+    monkeypatch.setattr(RPHelper, "http_get", fake_get)
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    monkeypatch.setattr(RPHelper, "ARXIV_PAGE_SIZE", 2)
+    papers = RPHelper.get_papers_from_arxiv("Pingkun Yan", school="RPI")
+    assert [params["start"] for params in requested] == [0, 2, 4]
+    assert [paper["title"] for paper in papers] == [f"Paper {i}" for i in range(5)]
+    # requests are spaced out by the politeness interval
+    assert len(sleeps) >= 2 and all(0 < seconds <= RPHelper.ARXIV_REQUEST_INTERVAL for seconds in sleeps)
+
+    refreshed = RPHelper.refresh_arxiv_papers(["2301.00001v1", "2301.00001v2", "2301.00002"])
+    assert requested[-1]["id_list"] == "2301.00001,2301.00002"
+    assert [(p["title"], p["links"]["arxiv_id"], p["links"]["arxiv_version"]) for p in refreshed] == \
+        [("New title", "2301.00001", 3), ("Other", "2301.00002", 1)]
+
+def test_source_scheduler_skips_unproductive_sources(monkeypatch, tmp_path):
+    yields = {"arxiv": 5, "pubmed": 8, "doaj": 0, "zenodo": 0, "crossref": 2}
+
+    def fake_fetcher(source):
+        def fetch(name, school, dedup=None, top_n=None, level="full"):
+            return [make_paper(f"{source} paper {i} by {name}", [(name, None)]) for i in range(yields[source])]
+        return fetch
+
+    for source in RPHelper.PAPER_SOURCES:
+        monkeypatch.setattr(RPHelper, f"get_papers_from_{source}", fake_fetcher(source))
+    RPHelper.reset_metrics()
+    path = str(tmp_path / "scheduler.json")
+    scheduler = RPHelper.SourceScheduler(min_runs=2, min_rate=0.5, explore_every=5, path=path)
+    plans = []
+    for i in range(5):
+        plans.append([source for source, _ in RPHelper.iter_papers(f"Professor {i}", None, scheduler=scheduler,
+                                                                   domain="medical imaging")])
+    # every source is tried until it has min_runs, best first once measured,
+    # then the empty ones are skipped, and the fifth plan explores them again
+    assert plans[0] == list(RPHelper.PAPER_SOURCES)
+    assert plans[1][:3] == ["pubmed", "arxiv", "crossref"] and sorted(plans[1][3:]) == ["doaj", "zenodo"]
+    assert plans[2] == plans[3] == ["pubmed", "arxiv", "crossref"]
+    assert sorted(plans[4]) == sorted(RPHelper.PAPER_SOURCES)
+    counters = RPHelper.metrics_snapshot()["counters"]
+    assert counters["scheduler.skipped.doaj"] == 2 and counters["scheduler.explore_plans"] == 1
+
+    scheduler.save()
+    reloaded = RPHelper.SourceScheduler(min_runs=2, min_rate=0.5, path=path)
+    assert reloaded.snapshot()["domain:medical imaging/zenodo"]["runs"] == 3
+    assert reloaded.plan("medical imaging") == ["pubmed", "arxiv", "crossref"]
+
+def test_similarity_index_queries_persists_and_updates(tmp_path):
+    import numpy as np
+
+    imaging = [make_paper("Deep learning for CT image reconstruction", [("A", None)], categories=["eess.IV"]),
+               make_paper("Low-dose CT denoising with deep learning", [("A", None)], categories=["eess.IV"])]
+    imaging2 = [make_paper("Deep learning CT reconstruction from sparse views", [("B", None)], categories=["eess.IV"])]
+    astro = [make_paper("Dark matter halos in galaxy clusters", [("C", None)], categories=["astro-ph.CO"])]
+    path = str(tmp_path / "similar")
+
+    index = RPHelper.SimilarityIndex(path)
+    index.add("a", imaging)
+    index.add("c", astro)
+    index.save()
+
+    reloaded = RPHelper.SimilarityIndex(path)
+    assert isinstance(reloaded.vectors, np.memmap) and len(reloaded) == 2
+    # professors added after loading are queryable at once, and re-adding one replaces its row
+    reloaded.add("b", imaging2)
+    reloaded.add("c", astro + astro)
+    results = reloaded.query("a", k=2)
+    assert [key for key, _ in results] == ["b", "c"] and results[0][1] > results[1][1]
+    assert reloaded.query(RPHelper.profile_vector(imaging2), k=1)[0][0] == "b"
+
+    # grows past the initial file capacity
+    for i in range(100):
+        reloaded.add(f"x{i}", [make_paper(f"Topic {i} study", [("X", None)])])
+    reloaded.save()
+    again = RPHelper.SimilarityIndex(path)
+    assert len(again) == 103 and again.query("a", k=1)[0][0] == "b"
+
+def test_source_scheduler_counts_duplicates_per_source_concurrently(monkeypatch):
+    import time
+    delays = {"arxiv": 0.2, "pubmed": 0.0, "doaj": 0.2, "zenodo": 0.2, "crossref": 0.1}
+
+    def fake_fetcher(source):
+        def fetch(name, school, dedup=None, top_n=None, level="full"):
+            time.sleep(delays[source])
+            doi = "10.1000/shared" if source in ("pubmed", "crossref") else f"10.1000/{source}"
+            paper = {"title": source, "links": {"doi": doi}}
+            return [paper] if dedup.add_paper(paper, source) else []
+        return fetch
+
+    for source in RPHelper.PAPER_SOURCES:
+        monkeypatch.setattr(RPHelper, f"get_papers_from_{source}", fake_fetcher(source))
+    scheduler = RPHelper.SourceScheduler()
+    dict(RPHelper.iter_papers("Pingkun Yan", None, max_workers=5, scheduler=scheduler))
+    duplicates = {key.split("/")[1]: stats["duplicates"] for key, stats in scheduler.snapshot().items()
+                  if key.startswith("*/")}
+    assert duplicates == {"arxiv": 0, "pubmed": 0, "doaj": 0, "zenodo": 0, "crossref": 1}
+
 if __name__ == "__main__":
     # test_get_papers_from_arxiv() # issue with people with the same name
     # test_get_papers_from_pubmed()
     # test_get_papers_from_zenodo()
     # test_get_papers_from_crossref()
-    test_get_papers_from_doaj()
\ No newline at end of file
+    test_get_papers_from_doaj()
@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+import urllib.request
+
+import RPHelper
+import RPService
+
+def fake_iter_papers(name, school, max_workers=1, budget=None, status=None):
+    for source in RPHelper.PAPER_SOURCES:
+        time.sleep(0.05)
+        if status is not None:
+            status[source] = True
+        yield source, [{"title": f"{name} paper from {source}", "authors": [{"name": name, "affiliation": school}]}]
+
+def start_server(monkeypatch, **options):
+    monkeypatch.setattr(RPHelper, "iter_papers", fake_iter_papers)
+    server = RPService.create_server("127.0.0.1", 0, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def post_lookup(base_url, body):
+    request = urllib.request.Request(f"{base_url}/lookups", data=json.dumps(body).encode(), method="POST",
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def test_lookup_job_streams_and_caches(monkeypatch):
+    server, base_url = start_server(monkeypatch, workers=2, queue_size=4)
+    try:
+        status, job = post_lookup(base_url, {"name": "Pingkun Yan", "school": "RPI"})
+        assert status == 202
+
+        with urllib.request.urlopen(f"{base_url}/jobs/{job['job_id']}/stream") as response:
+            lines = [json.loads(line) for line in response.read().splitlines()]
+        assert len([line for line in lines if "paper" in line]) == len(RPHelper.PAPER_SOURCES)
+        assert lines[-1]["status"] == "done"
+
+        # repeat lookup is served from cache
+        status, repeat = post_lookup(base_url, {"name": "pingkun yan", "school": "rpi"})
+        assert status == 200
+        assert repeat["cached"] and repeat["paper_count"] == len(RPHelper.PAPER_SOURCES)
+    finally:
+        server.shutdown()
+
+def test_lookup_queue_backpressure(monkeypatch):
+    server, base_url = start_server(monkeypatch, workers=1, queue_size=1)
+    try:
+        statuses = [post_lookup(base_url, {"name": f"Professor {i}"})[0] for i in range(4)]
+        assert statuses[0] == 202
+        assert 503 in statuses
+    finally:
+        server.shutdown()
+
+def test_lookup_rejects_malformed_bodies(monkeypatch):
+    server, base_url = start_server(monkeypatch, workers=1, queue_size=1)
+    try:
+        for body in ([], "Pingkun Yan", {"name": 42}, {"name": "Pingkun Yan", "school": ["RPI"]}):
+            assert post_lookup(base_url, body)[0] == 400
+    finally:
+        server.shutdown()
+
+def test_run_job_copies_status_and_prunes_expired_cache(monkeypatch):
+    statuses = []
+
+    def recording_iter_papers(name, school, max_workers=1, budget=None, status=None):
+        statuses.append(status)
+        yield from fake_iter_papers(name, school, max_workers, budget, status)
+
+    monkeypatch.setattr(RPHelper, "iter_papers", recording_iter_papers)
+    service = RPService.create_service(workers=0, cache_ttl=0.1)
+    first = RPService._new_job("Pingkun Yan", "RPI", "queued")
+    RPService._run_job(service, first)
+    # the job only ever holds copies of the status the harvest writes to
+    assert first["completeness"] is not statuses[0]
+    assert first["completeness"] == {source: True for source in RPHelper.PAPER_SOURCES}
+
+    time.sleep(0.15)
+    RPService._run_job(service, RPService._new_job("Ge Wang", "RPI", "queued"))
+    assert list(service["cache"]) == [RPService.lookup_key("Ge Wang", "RPI")]